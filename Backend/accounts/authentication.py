@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core import metrics
+
+from .tokens import claims_cache_key, load_claims
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds request.user from the user's cached
+    claims instead of loading the user row.
+
+    The user is a real User instance holding only id, role,
+    is_profile_completed and is_active; it can be assigned to foreign
+    keys and compared like any other, and reading any other field loads
+    it from the database on demand.
+
+    The token only identifies the user: role and active state always
+    come from the database, through a short-lived cache entry that is
+    rewritten whenever the user row is saved or deleted. A cache miss
+    reads the row again, so a role change or deactivation is never
+    undone by an evicted entry or a request served by another worker.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        claims = cache.get(claims_cache_key(user_id))
+        metrics.record_cache_lookup('auth_claims', claims is not None)
+        if claims is None:
+            claims = load_claims(user_id)
+            if claims is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not claims.get('is_active'):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return self.build_user(user_id, claims)
+
+    def build_user(self, user_id, claims):
+        pk = self.user_model._meta.pk
+        values = dict(claims, **{pk.attname: pk.to_python(user_id)})
+        fields = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in values
+        ]
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, fields, [values[name] for name in fields])
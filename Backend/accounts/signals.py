@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .tokens import publish_claims, revoke_claims
+
+
+@receiver(post_save, sender=User)
+def refresh_auth_claims(sender, instance, **kwargs):
+    """Let outstanding access tokens see role, profile and active changes."""
+    publish_claims(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_auth_claims(sender, instance, **kwargs):
+    revoke_claims(instance.pk)
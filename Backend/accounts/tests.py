@@ -1,3 +1,52 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from .models import User
+from .tokens import claims_cache_key
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com', name='admin', password='password', role='ADMIN'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def list_tests(self):
+        # An admin-only endpoint, so the role read for the request matters
+        return self.client.get('/api/tests/admin/tests/')
+
+    def test_tokens_carry_no_role(self):
+        self.assertNotIn('role', self.refresh)
+        self.assertNotIn('role', self.refresh.access_token)
+
+    def test_claims_are_reused_without_a_user_query(self):
+        self.assertEqual(self.list_tests().status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.list_tests().status_code, 200)
+        self.assertFalse([query for query in queries if 'accounts_user' in query['sql']])
+
+    def test_deactivation_is_seen_after_the_cached_claims_are_lost(self):
+        self.assertEqual(self.list_tests().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        # As on a worker that never saw the change, or after eviction
+        cache.delete(claims_cache_key(self.user.pk))
+        self.assertEqual(self.list_tests().status_code, 401)
+
+    def test_demotion_is_seen_after_the_cached_claims_are_lost(self):
+        self.assertEqual(self.list_tests().status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(role='STUDENT')
+        cache.clear()
+        self.assertEqual(self.list_tests().status_code, 403)
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        self.assertEqual(self.list_tests().status_code, 401)
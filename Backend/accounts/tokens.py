@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+User = get_user_model()
+
+# User fields request.user is built from, so requests can be
+# authenticated without loading the whole user row
+CLAIM_FIELDS = ('role', 'is_profile_completed', 'is_active')
+
+# How long a user's claims are reused before they are read from the
+# database again. Changes are published straight away through the cache
+# (see accounts.signals); with a per-process cache, other workers pick
+# them up within this time.
+CLAIMS_CACHE_TIMEOUT = 60
+
+
+def claims_cache_key(user_id):
+    return f'auth-claims:{user_id}'
+
+
+def user_claims(user):
+    return {field: getattr(user, field) for field in CLAIM_FIELDS}
+
+
+def publish_claims(user):
+    """Record a user's current claims after the row changes."""
+    cache.set(claims_cache_key(user.pk), user_claims(user), CLAIMS_CACHE_TIMEOUT)
+
+
+def revoke_claims(user_id):
+    cache.set(claims_cache_key(user_id), {'is_active': False}, CLAIMS_CACHE_TIMEOUT)
+
+
+def load_claims(user_id):
+    """Claims from the database, cached briefly; None if the user is gone."""
+    row = User.objects.filter(pk=user_id).values(*CLAIM_FIELDS).first()
+    claims = row if row is not None else {'is_active': False}
+    cache.set(claims_cache_key(user_id), claims, CLAIMS_CACHE_TIMEOUT)
+    return row
@@ -7,6 +7,7 @@ from rest_framework import status, permissions
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
+from .models import User
 from .serializers import StudentRegistrationSerializer, StudentLoginSerializer, StudentProfileSerializer, UserDetailSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
@@ -55,12 +56,15 @@ class StudentProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        serializer = StudentProfileSerializer(request.user)
+        # request.user only carries the cached claims; load the full profile
+        user = User.objects.get(pk=request.user.pk)
+        serializer = StudentProfileSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
+        user = User.objects.get(pk=request.user.pk)
         serializer = StudentProfileSerializer(
-            request.user,
+            user,
             data = request.data,
             partial=True
         )
@@ -68,7 +72,7 @@ class StudentProfileView(APIView):
         if serializer.is_valid():
             serializer.save()
             # Return the updated profile data
-            updated_serializer = StudentProfileSerializer(request.user)
+            updated_serializer = StudentProfileSerializer(user)
             return Response(
                 {
                     "message":"Profile updated successfully",
@@ -0,0 +1,151 @@
+"""
+Fast inserts for synthetic data.
+
+Rows are plain tuples rather than model instances. On PostgreSQL they
+are streamed with COPY; elsewhere they go through bulk_create in
+batches. Primary keys are handed out up front (allocate_ids) so child
+rows can reference parents without reading anything back.
+"""
+import io
+from itertools import islice
+
+from django.db import connections
+from django.db.models import Max, NOT_PROVIDED
+from django.db.models.fields import AutoFieldMixin
+
+BATCH_SIZE = 5000
+
+
+def uses_copy(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def allocate_ids(model, count, using='default'):
+    """
+    Reserve 'count' primary keys for an auto-increment model.
+
+    PostgreSQL takes them from the table's sequence, so the sequence stays
+    ahead of the explicit ids. Other databases continue from the current
+    maximum, which is fine for a local database nobody else is writing to.
+    """
+    if count <= 0:
+        return []
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [model._meta.db_table, model._meta.pk.column, count]
+            )
+            return [row[0] for row in cursor.fetchall()]
+    start = (model.objects.using(using).aggregate(top=Max('pk'))['top'] or 0) + 1
+    return list(range(start, start + count))
+
+
+def _fixed_value(field, now):
+    if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+        return now
+    if field.default is not NOT_PROVIDED:
+        return field.get_default()
+    if field.null:
+        return None
+    if field.empty_strings_allowed:
+        # What the ORM stores for a blank text column
+        return ''
+    raise ValueError(f"{field.model.__name__}.{field.name} needs a value")
+
+
+def _copy_text(value):
+    """One value in COPY's text format."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class Table:
+    """
+    Insert rows into one model's table.
+
+    'columns' are the attnames each row supplies, in order; every other
+    concrete field gets its default (auto_now fields get 'now'), worked
+    out once for the whole table. An auto-increment primary key left out
+    of 'columns' is assigned by the database.
+    """
+
+    def __init__(self, model, columns, now, using='default', batch_size=BATCH_SIZE):
+        self.model = model
+        self.using = using
+        self.batch_size = batch_size
+        fixed = [
+            field for field in model._meta.concrete_fields
+            if field.attname not in columns
+            and not (field.primary_key and isinstance(field, AutoFieldMixin))
+        ]
+        self.columns = list(columns) + [field.attname for field in fixed]
+        self.fixed_values = tuple(_fixed_value(field, now) for field in fixed)
+
+    def write(self, rows):
+        """Insert an iterable of row tuples; returns how many were written."""
+        rows = (row + self.fixed_values for row in rows)
+        if uses_copy(self.using):
+            return self._copy(rows)
+        return self._bulk_create(rows)
+
+    def _copy(self, rows):
+        meta = self.model._meta
+        db_columns = {field.attname: field.column for field in meta.concrete_fields}
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            quote(meta.db_table), ', '.join(quote(db_columns[name]) for name in self.columns)
+        )
+        written = 0
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy'):
+                # psycopg 3 adapts the values itself
+                with raw.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                        written += 1
+                return written
+            # psycopg2: feed text-format batches
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return written
+                buffer = io.StringIO(''.join(
+                    '\t'.join(_copy_text(value) for value in row) + '\n' for row in batch
+                ))
+                raw.copy_expert(sql, buffer)
+                written += len(batch)
+
+    def _bulk_create(self, rows):
+        manager = self.model.objects.using(self.using)
+        written = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return written
+            manager.bulk_create(
+                [self.model(**dict(zip(self.columns, row))) for row in batch],
+                batch_size=self.batch_size
+            )
+            written += len(batch)
+
+
+def analyze(models, using='default'):
+    """Refresh planner statistics after a large load (PostgreSQL only)."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
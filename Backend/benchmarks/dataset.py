@@ -0,0 +1,336 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from courses.models import AdminNote, Chapter, Course, StudentNote, VideoLecture
+from courses.search import SEARCHABLE_MODELS, update_search_vectors
+from tests.models import AnswerOption, Question, StudentAnswer, Test, TestAssignment
+
+from .bulk import Table, allocate_ids, analyze
+
+User = get_user_model()
+
+# Seeded rows are recognised by these, so they can be removed without
+# touching real data
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_COURSE_PREFIX = 'Seed Course '
+
+# Every seeded account shares this password
+PASSWORD = 'seed-password'
+
+PRESETS = {
+    'small': {
+        'students': 1_000, 'courses': 10, 'enrollments': 3, 'chapters': 8, 'videos': 6,
+        'notes': 3, 'tests': 4, 'questions': 20, 'options': 4, 'attempted': 0.5,
+    },
+    'medium': {
+        'students': 20_000, 'courses': 30, 'enrollments': 3, 'chapters': 10, 'videos': 6,
+        'notes': 3, 'tests': 5, 'questions': 25, 'options': 4, 'attempted': 0.5,
+    },
+    'large': {
+        'students': 200_000, 'courses': 50, 'enrollments': 2, 'chapters': 10, 'videos': 8,
+        'notes': 4, 'tests': 3, 'questions': 15, 'options': 4, 'attempted': 0.4,
+    },
+}
+
+
+class Dataset:
+    """Ids of the seeded rows, for benchmarks and reporting."""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.admin_id = None
+        # Students with a graded attempt on every test of their courses,
+        # for realistic leaderboards and results
+        self.veterans = []
+        # Enrolled and assigned but not started; scenarios that start and
+        # submit tests take one each
+        self.fresh = []
+        self.courses = []
+        self.chapters = []
+        self.tests = []
+        # Rows written per model label
+        self.rows = {}
+
+
+def _picks(rng_seed, index, questions, options):
+    """
+    Option index picked for each question of a graded attempt. Derived
+    from the attempt's position alone, so marks and answers can be
+    generated in separate passes without holding every answer.
+    """
+    rng = random.Random(rng_seed * 1_000_003 + index)
+    skill = rng.random()
+    return [
+        0 if options == 1 or rng.random() < skill else rng.randrange(1, options)
+        for _ in range(questions)
+    ]
+
+
+def seed(students=200, courses=5, enrollments=None, chapters=8, videos=6, notes=3,
+         tests=4, questions=25, options=4, attempted=0.5, rng_seed=0,
+         password=PASSWORD, progress=None):
+    """
+    Create a synthetic academy and return a Dataset.
+
+    Sizes are per parent: chapters per course, videos and notes per
+    chapter, tests per course, questions per test and options per
+    question. Each student is enrolled in 'enrollments' random courses
+    (all of them when None) and assigned every test of those courses;
+    the 'attempted' share of students have a graded attempt on each.
+
+    Output only depends on the sizes and rng_seed. Rows are written with
+    COPY on PostgreSQL and bulk_create elsewhere, and the password is
+    hashed once for everyone. progress(model, rows, seconds) is called
+    after each table.
+    """
+    rng = random.Random(rng_seed)
+    now = timezone.now()
+    sizes = {
+        'students': students, 'courses': courses, 'enrollments': enrollments,
+        'chapters': chapters, 'videos': videos, 'notes': notes, 'tests': tests,
+        'questions': questions, 'options': options, 'attempted': attempted,
+        'seed': rng_seed,
+    }
+    dataset = Dataset(sizes)
+
+    def write(model, columns, rows):
+        started = time.perf_counter()
+        written = Table(model, columns, now).write(rows)
+        dataset.rows[model._meta.label] = dataset.rows.get(model._meta.label, 0) + written
+        if progress:
+            progress(model, written, time.perf_counter() - started)
+
+    with transaction.atomic():
+        # ==================== Users ====================
+
+        password_hash = make_password(password)
+        user_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(students + 1)]
+        dataset.admin_id = user_ids[0]
+        cutoff = int(students * attempted)
+        dataset.veterans = user_ids[1:cutoff + 1]
+        dataset.fresh = user_ids[cutoff + 1:]
+
+        write(User, ('id', 'email', 'name', 'password', 'role', 'is_profile_completed', 'age'), [
+            (dataset.admin_id, f'admin@{SEED_EMAIL_DOMAIN}', 'Seed Admin', password_hash, 'ADMIN', True, 30)
+        ] + [
+            (user_id, f'student-{i}@{SEED_EMAIL_DOMAIN}', f'Student {i}', password_hash,
+             'STUDENT', True, 18 + i % 30)
+            for i, user_id in enumerate(user_ids[1:])
+        ])
+
+        # ==================== Courses ====================
+
+        dataset.courses = allocate_ids(Course, courses)
+        write(Course, ('id', 'title', 'description'), (
+            (course_id, f'{SEED_COURSE_PREFIX}{i}', f'Synthetic course {i}')
+            for i, course_id in enumerate(dataset.courses)
+        ))
+
+        if enrollments is None or enrollments >= courses:
+            student_courses = [dataset.courses] * students
+        else:
+            student_courses = [rng.sample(dataset.courses, enrollments) for _ in range(students)]
+        write(Course.students.through, ('course_id', 'user_id'), (
+            (course_id, user_id)
+            for user_id, course_ids in zip(user_ids[1:], student_courses)
+            for course_id in course_ids
+        ))
+
+        dataset.chapters = allocate_ids(Chapter, courses * chapters)
+        chapters_by_course = {
+            course_id: dataset.chapters[i * chapters:(i + 1) * chapters]
+            for i, course_id in enumerate(dataset.courses)
+        }
+        write(Chapter, ('id', 'course_id', 'title', 'description', 'order'), (
+            (chapter_id, course_id, f'Chapter {j}', 'Synthetic chapter', j)
+            for course_id, chapter_ids in chapters_by_course.items()
+            for j, chapter_id in enumerate(chapter_ids)
+        ))
+
+        video_ids = allocate_ids(VideoLecture, len(dataset.chapters) * videos)
+        def video_rows():
+            for i, chapter_id in enumerate(dataset.chapters):
+                for k in range(videos):
+                    youtube_id = f'{rng.randrange(16 ** 11):011x}'
+                    yield (
+                        video_ids[i * videos + k], chapter_id, f'Video {k}',
+                        f'https://www.youtube.com/watch?v={youtube_id}', youtube_id, k,
+                    )
+
+        write(VideoLecture, ('id', 'chapter_id', 'title', 'youtube_url', 'youtube_id', 'order'), video_rows())
+        write(AdminNote, ('chapter_id', 'created_by_id', 'title', 'note_type', 'content'), (
+            (chapter_id, dataset.admin_id, f'Note {k}', 'text', 'Synthetic note. ' * 20)
+            for chapter_id in dataset.chapters
+            for k in range(notes)
+        ))
+
+        # Every tenth veteran keeps a note on the first video of each chapter
+        first_video = {
+            chapter_id: video_ids[i * videos] if videos else None
+            for i, chapter_id in enumerate(dataset.chapters)
+        }
+        write(StudentNote, ('student_id', 'chapter_id', 'video_id', 'title', 'content'), (
+            (user_id, chapter_id, first_video[chapter_id], 'My note', 'Remember this.')
+            for index, (user_id, course_ids) in enumerate(zip(user_ids[1:cutoff + 1], student_courses))
+            if index % 10 == 0
+            for course_id in course_ids
+            for chapter_id in chapters_by_course[course_id]
+        ))
+
+        # ==================== Tests ====================
+
+        dataset.tests = allocate_ids(Test, courses * tests)
+        tests_by_course = {
+            course_id: dataset.tests[i * tests:(i + 1) * tests]
+            for i, course_id in enumerate(dataset.courses)
+        }
+        write(Test, ('id', 'course_id', 'title', 'description', 'duration_minutes', 'total_marks', 'is_published'), (
+            (test_id, course_id, f'Test {j}', 'Synthetic test', 60, questions, True)
+            for course_id, test_ids in tests_by_course.items()
+            for j, test_id in enumerate(test_ids)
+        ))
+
+        question_ids = allocate_ids(Question, len(dataset.tests) * questions)
+        write(Question, ('id', 'test_id', 'text', 'marks', 'order'), (
+            (question_ids[i * questions + k], test_id, f'Question {k}?', 1, k)
+            for i, test_id in enumerate(dataset.tests)
+            for k in range(questions)
+        ))
+        option_ids = allocate_ids(AnswerOption, len(question_ids) * options)
+        write(AnswerOption, ('id', 'question_id', 'text', 'is_correct'), (
+            (option_ids[i * options + k], question_id, f'Option {k}', k == 0)
+            for i, question_id in enumerate(question_ids)
+            for k in range(options)
+        ))
+        test_index = {test_id: i for i, test_id in enumerate(dataset.tests)}
+
+        # ==================== Attempts ====================
+
+        # One assignment per (student, test of their courses); veterans'
+        # are graded. Position in this list drives the picks.
+        attempts = [
+            (user_id, test_id, index < cutoff)
+            for index, (user_id, course_ids) in enumerate(zip(user_ids[1:], student_courses))
+            for course_id in course_ids
+            for test_id in tests_by_course[course_id]
+        ]
+        assignment_ids = allocate_ids(TestAssignment, len(attempts))
+        submitted_offsets = [rng.randrange(1, 60 * 24 * 30) for _ in attempts]
+
+        def assignment_rows():
+            for position, (user_id, test_id, graded) in enumerate(attempts):
+                if not graded:
+                    yield (assignment_ids[position], user_id, test_id, 'assigned',
+                           now, None, None, None, None, None, None)
+                    continue
+                obtained = _picks(rng_seed, position, questions, options).count(0)
+                submitted_at = now - timedelta(minutes=submitted_offsets[position])
+                yield (
+                    assignment_ids[position], user_id, test_id, 'submitted',
+                    submitted_at - timedelta(hours=1), submitted_at - timedelta(minutes=45),
+                    submitted_at, submitted_at, obtained, questions,
+                    round(obtained / questions * 100, 2) if questions else None,
+                )
+
+        write(TestAssignment, (
+            'id', 'student_id', 'test_id', 'status', 'assigned_at', 'started_at',
+            'submitted_at', 'evaluated_at', 'obtained_marks', 'total_marks', 'percentage'
+        ), assignment_rows())
+
+        def answer_rows():
+            for position, (_, test_id, graded) in enumerate(attempts):
+                if not graded:
+                    continue
+                submitted_at = now - timedelta(minutes=submitted_offsets[position])
+                first_question = test_index[test_id] * questions
+                for k, pick in enumerate(_picks(rng_seed, position, questions, options)):
+                    question_number = first_question + k
+                    correct = pick == 0
+                    yield (
+                        assignment_ids[position], question_ids[question_number],
+                        option_ids[question_number * options + pick],
+                        correct, int(correct), 1, submitted_at, submitted_at,
+                    )
+
+        write(StudentAnswer, (
+            'assignment_id', 'question_id', 'selected_option_id', 'is_correct',
+            'marks_obtained', 'question_marks', 'answered_at', 'evaluated_at'
+        ), answer_rows())
+
+    # Bulk writes bypass the save hooks that fill the search vectors
+    for model in SEARCHABLE_MODELS:
+        update_search_vectors(model)
+
+    analyze([
+        User, Course, Course.students.through, Chapter, VideoLecture, AdminNote, StudentNote,
+        Test, Question, AnswerOption, TestAssignment, StudentAnswer,
+    ])
+    return dataset
+
+
+def seeded_users():
+    return User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+
+
+def seeded_courses():
+    return Course.objects.filter(title__startswith=SEED_COURSE_PREFIX)
+
+
+def clear_seeded(progress=None, batch_size=5000):
+    """
+    Delete everything seed() created, in bulk.
+
+    The seeded-only tables are emptied with plain DELETE statements,
+    children first, skipping Django's per-object collector. Users go last
+    through the regular delete, in batches, so anything else pointing at
+    them (tokens, jobs, admin log) is cascaded or nulled as usual.
+    Returns rows deleted per model label.
+    """
+    users = seeded_users().values('pk')
+    courses = seeded_courses().values('pk')
+    plan = [
+        (StudentAnswer, Q(assignment__student__in=users) | Q(assignment__test__course__in=courses)),
+        (TestAssignment, Q(student__in=users) | Q(test__course__in=courses)),
+        (AnswerOption, Q(question__test__course__in=courses)),
+        (Question, Q(test__course__in=courses)),
+        (Test, Q(course__in=courses)),
+        (StudentNote, Q(student__in=users) | Q(chapter__course__in=courses)),
+        (AdminNote, Q(chapter__course__in=courses)),
+        (VideoLecture, Q(chapter__course__in=courses)),
+        (Chapter, Q(course__in=courses)),
+        (Course.students.through, Q(user__in=users) | Q(course__in=courses)),
+        (Course, Q(pk__in=courses)),
+    ]
+
+    deleted = {}
+    with transaction.atomic():
+        for model, condition in plan:
+            started = time.perf_counter()
+            # _raw_delete issues one DELETE without loading rows or
+            # sending signals; nothing else references these rows
+            count = model.objects.filter(condition)._raw_delete(model.objects.db)
+            deleted[model._meta.label] = count
+            if progress:
+                progress(model, count, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    count = 0
+    while True:
+        batch = list(seeded_users().values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            User.objects.filter(pk__in=batch).delete()
+        count += len(batch)
+    deleted[User._meta.label] = count
+    if progress:
+        progress(User, count, time.perf_counter() - started)
+    return deleted
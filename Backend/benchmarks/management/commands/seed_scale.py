@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.dataset import PASSWORD, PRESETS, clear_seeded, seed, seeded_courses, seeded_users
+
+SIZE_OPTIONS = (
+    ('students', int, 'Students to create'),
+    ('courses', int, 'Courses to create'),
+    ('enrollments', int, 'Courses each student is enrolled in'),
+    ('chapters', int, 'Chapters per course'),
+    ('videos', int, 'Videos per chapter'),
+    ('notes', int, 'Admin notes per chapter'),
+    ('tests', int, 'Tests per course'),
+    ('questions', int, 'Questions per test'),
+    ('options', int, 'Options per question'),
+    ('attempted', float, 'Share of students with a graded attempt on each of their tests'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with production-scale synthetic data, or remove it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+        for name, kind, help_text in SIZE_OPTIONS:
+            parser.add_argument(f'--{name}', type=kind, help=f'{help_text} (overrides the preset)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--password', default=PASSWORD, help='Password of every seeded account')
+        parser.add_argument('--clean', action='store_true', help='Remove previously seeded data first')
+        parser.add_argument('--clean-only', action='store_true', help='Remove previously seeded data and exit')
+
+    def handle(self, *args, **options):
+        if options['clean'] or options['clean_only']:
+            started = time.perf_counter()
+            deleted = clear_seeded(progress=self.report)
+            self.stdout.write(self.style.SUCCESS(
+                f'Removed {sum(deleted.values())} seeded rows in {time.perf_counter() - started:.1f}s'
+            ))
+            if options['clean_only']:
+                return
+
+        if seeded_users().exists() or seeded_courses().exists():
+            raise CommandError('Seeded data already exists; run again with --clean to replace it')
+
+        sizes = dict(PRESETS[options['preset']])
+        for name, _, _ in SIZE_OPTIONS:
+            if options[name] is not None:
+                sizes[name] = options[name]
+
+        self.stdout.write(f"Seeding preset '{options['preset']}' with seed {options['seed']}: {sizes}")
+        started = time.perf_counter()
+        dataset = seed(rng_seed=options['seed'], password=options['password'], progress=self.report, **sizes)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(dataset.rows.values())} rows in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def report(self, model, rows, seconds):
+        rate = rows / seconds if seconds else 0
+        self.stdout.write(f'  {model._meta.label:32} {rows:>10} rows  {seconds:7.1f}s  {rate:>9.0f}/s')
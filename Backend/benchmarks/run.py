@@ -0,0 +1,337 @@
+"""
+Benchmark the student and admin API against a synthetic dataset.
+
+Run from the Backend directory:
+
+    python -m benchmarks.run --students 2000 --requests 200 --concurrency 16 -o bench.json
+
+A throwaway test database is created, seeded with benchmarks.dataset and
+dropped afterwards, so the configured database is never touched. Each
+scenario is driven through the Django test client (in process, one
+request at a time) and then over HTTP against a live server with
+--concurrency parallel requests. Latency percentiles and queries per
+request (read from the Server-Timing header) are written as JSON so runs
+can be compared over time.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+# ==================== Scenarios ====================
+
+class Scenario:
+    """
+    One endpoint to hit repeatedly. request(i) returns the
+    (user_id, method, path, body) of the i-th request.
+    """
+
+    def __init__(self, name, request, limit=None):
+        self.name = name
+        self.request = request
+        # Scenarios that change state (start, submit) can only run once
+        # per student
+        self.limit = limit
+
+
+def build_scenarios(dataset, students, answers):
+    """
+    Scenarios in the order they run. Start, submit and result use one
+    student each from 'students', so they walk a full attempt.
+    """
+    test_id = dataset.tests[0]
+    chapter_id = dataset.chapters[0]
+    course_id = dataset.courses[0]
+    everyone = dataset.veterans + dataset.fresh
+
+    def any_student(path):
+        return lambda i: (everyone[i % len(everyone)], 'GET', path, None)
+
+    return [
+        Scenario('course-list', any_student('/api/courses/')),
+        Scenario('course-detail', any_student(f'/api/courses/{course_id}/')),
+        Scenario('chapter-content', any_student(f'/api/courses/chapters/{chapter_id}/content/')),
+        Scenario('my-tests', any_student('/api/tests/student/my-tests/')),
+        Scenario(
+            'start-test',
+            lambda i: (students[i], 'GET', f'/api/tests/student/start/{test_id}/', None),
+            limit=len(students)
+        ),
+        Scenario(
+            'submit-test',
+            lambda i: (students[i], 'POST', f'/api/tests/student/submit/{test_id}/', answers),
+            limit=len(students)
+        ),
+        Scenario(
+            'test-result',
+            lambda i: (students[i], 'GET', f'/api/tests/student/result/{test_id}/', None),
+            limit=len(students)
+        ),
+        Scenario(
+            'admin-test-detail',
+            lambda i: (dataset.admin_id, 'GET', f'/api/tests/admin/tests/{test_id}/', None)
+        ),
+    ]
+
+
+# ==================== Drivers ====================
+
+def queries_from(server_timing):
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+def run_client(scenario, count, tokens):
+    """Drive a scenario through the Django test client, one request at a time."""
+    from django.test import Client
+
+    client = Client()
+    samples = []
+    for i in range(count):
+        user_id, method, path, body = scenario.request(i)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {tokens[user_id]}'}
+        started = time.perf_counter()
+        if method == 'GET':
+            response = client.get(path, **headers)
+        else:
+            response = client.post(path, json.dumps(body), content_type='application/json', **headers)
+        elapsed = time.perf_counter() - started
+        samples.append((elapsed, response.status_code, queries_from(response.get('Server-Timing'))))
+    return samples
+
+
+def _http_request(base_url, tokens, request):
+    user_id, method, path, body = request
+    data = json.dumps(body).encode() if body is not None else None
+    http_request = urllib.request.Request(base_url + path, data=data, method=method, headers={
+        'Authorization': f'Bearer {tokens[user_id]}',
+        'Content-Type': 'application/json',
+    })
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(http_request, timeout=60) as response:
+            response.read()
+            status, server_timing = response.status, response.headers.get('Server-Timing')
+    except urllib.error.HTTPError as error:
+        status, server_timing = error.code, error.headers.get('Server-Timing')
+    return time.perf_counter() - started, status, queries_from(server_timing)
+
+
+def run_http(scenario, count, tokens, base_url, concurrency):
+    """Drive a scenario over HTTP with 'concurrency' requests in flight."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(
+            lambda i: _http_request(base_url, tokens, scenario.request(i)),
+            range(count)
+        ))
+
+
+def start_live_server():
+    """Serve the app from a thread against the test database."""
+    from django.db import connections
+    from django.test.testcases import LiveServerThread
+
+    # In-memory SQLite databases only exist on this connection
+    connections_override = {
+        conn.alias: conn for conn in connections.all()
+        if conn.vendor == 'sqlite' and conn.is_in_memory_db()
+    }
+    for conn in connections_override.values():
+        conn.inc_thread_sharing()
+
+    server = LiveServerThread('localhost', lambda app: app, connections_override=connections_override)
+    server.daemon = True
+    server.start()
+    server.is_ready.wait()
+    if server.error:
+        raise server.error
+    return server, f'http://localhost:{server.port}'
+
+
+# ==================== Stats ====================
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_time=None):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    queries = sorted(count for _, _, count in samples if count is not None)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    summary = {
+        'requests': len(samples),
+        'statuses': statuses,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            'p50': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99': round(percentile(latencies, 99), 2) if latencies else None,
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+        'queries': {
+            'p50': percentile(queries, 50),
+            'max': queries[-1] if queries else None,
+        },
+    }
+    if wall_time:
+        summary['throughput_rps'] = round(len(samples) / wall_time, 1)
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==================== Main ====================
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--courses', type=int, default=5)
+    parser.add_argument('--chapters', type=int, default=8, help='Chapters per course')
+    parser.add_argument('--videos', type=int, default=6, help='Videos per chapter')
+    parser.add_argument('--notes', type=int, default=3, help='Admin notes per chapter')
+    parser.add_argument('--tests', type=int, default=4, help='Tests per course')
+    parser.add_argument('--questions', type=int, default=25, help='Questions per test')
+    parser.add_argument('--attempted', type=float, default=0.5,
+                        help='Share of students with a graded attempt on every test')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per scenario and driver')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallel HTTP requests')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-http', action='store_true', help='Only use the test client')
+    parser.add_argument('-o', '--output', help='Write JSON here instead of stdout')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    django.setup()
+
+    from django.test.utils import (
+        override_settings, setup_databases, setup_test_environment,
+        teardown_databases, teardown_test_environment,
+    )
+    from django.db import connection
+
+    from accounts.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from tests.models import AnswerOption
+
+    from .dataset import seed
+
+    # Per-request timing lines would drown the progress output; the
+    # numbers end up in the report anyway
+    logging.getLogger('core.timing').setLevel(logging.ERROR)
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    # Budgets are reported, not enforced, and the query count comes
+    # back in Server-Timing
+    settings_override = override_settings(
+        DEBUG=False, SERVER_TIMING_HEADER=True, REQUEST_BUDGETS_ENFORCE=False
+    )
+    settings_override.enable()
+    try:
+        started = time.perf_counter()
+        dataset = seed(
+            students=args.students, courses=args.courses, chapters=args.chapters,
+            videos=args.videos, notes=args.notes, tests=args.tests,
+            questions=args.questions, attempted=args.attempted, rng_seed=args.seed
+        )
+        seed_seconds = time.perf_counter() - started
+
+        answers = [
+            {'question_id': question_id, 'selected_option_id': option_id}
+            for question_id, option_id in AnswerOption.objects.filter(
+                question__test_id=dataset.tests[0], is_correct=True
+            ).values_list('question_id', 'id')
+        ]
+        user_ids = [dataset.admin_id] + dataset.veterans + dataset.fresh
+        tokens = {
+            user.pk: str(RefreshToken.for_user(user).access_token)
+            for user in User.objects.filter(pk__in=user_ids)
+        }
+
+        concurrency = args.concurrency
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Live server threads share the one in-memory connection, which
+            # cannot run requests in parallel
+            print('In-memory SQLite: running HTTP requests one at a time', file=sys.stderr)
+            concurrency = 1
+
+        # Each driver walks attempts with its own half of the fresh students
+        drivers = [('client', dataset.fresh[0::2])]
+        if not args.skip_http:
+            drivers.append(('http', dataset.fresh[1::2]))
+
+        results = {}
+        server = None
+        try:
+            for driver, students in drivers:
+                if driver == 'http':
+                    server, base_url = start_live_server()
+                results[driver] = {}
+                for scenario in build_scenarios(dataset, students, answers):
+                    count = min(args.requests, scenario.limit) if scenario.limit is not None else args.requests
+                    started = time.perf_counter()
+                    if driver == 'client':
+                        samples = run_client(scenario, count, tokens)
+                    else:
+                        samples = run_http(scenario, count, tokens, base_url, concurrency)
+                    results[driver][scenario.name] = summarize(samples, time.perf_counter() - started)
+                    print(f'{driver:6} {scenario.name:20} {results[driver][scenario.name]["latency_ms"]}', file=sys.stderr)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.join()
+
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'dataset': dataset.sizes,
+            'seed_seconds': round(seed_seconds, 2),
+            'requests': args.requests,
+            'concurrency': concurrency,
+            'results': results,
+        }
+    finally:
+        settings_override.disable()
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only
+PER_PROCESS_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Autosave buffers, enrollment sets and content caches are written by
+    one process and read or invalidated by others, so in production the
+    default cache has to be shared between them.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PER_PROCESS_CACHE_BACKENDS:
+        return [
+            Error(
+                f'The default cache ({backend}) is not shared between processes.',
+                hint='Set REDIS_URL so every worker and the flush_autosaves command share one cache.',
+                id='core.E001',
+            )
+        ]
+    return []
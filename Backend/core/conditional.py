@@ -0,0 +1,38 @@
+"""
+Conditional GET for API views whose content is tracked by a version.
+
+The view computes an ETag, and a Last-Modified time where one exists,
+from cheap version lookups, asks not_modified() before building the
+body and returns its 304 when the client's copy is current; otherwise
+it serializes as usual and stamps the response with set_validators().
+"""
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag('.'.join(str(part) for part in parts))
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Add the validators to a response. Bodies differ per user, so only
+    private caches may keep them, and they must revalidate each time.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    The 304 (or, for If-Match, 412) response when the request's
+    preconditions decide it, else None.
+    """
+    headers = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=headers)
+    return None if response is headers else response
@@ -0,0 +1,183 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('core.timing')
+
+# Transaction control statements are not counted as queries: whether a
+# view's atomic() block shows up as BEGIN/COMMIT or as savepoints depends
+# on the backend and on whether the request already runs in a transaction
+# (as it does under TestCase), not on the view
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+# Requests that write nothing, so failing one after the view has run
+# loses no work
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+
+class RequestBudgetExceeded(AssertionError):
+    """A request issued more queries or took longer than its URL's budget."""
+
+
+class RequestTimer:
+    """
+    Counts queries and time for one request.
+
+    Installed as a database execute wrapper, so every query on every
+    connection is counted whether or not DEBUG is on. Transaction
+    control statements add to DB time but not to the query count.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_queries = 0
+        self.serialize_db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+                self.queries += 1
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def get_budget(view_name):
+    budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+    return budgets.get(view_name, budgets.get('default', {}))
+
+
+def budgets_enforced():
+    """Whether exceeding a budget raises for every request (test runs)."""
+    return bool(getattr(settings, 'REQUEST_BUDGETS_ENFORCE', False))
+
+
+def fails_loudly(request):
+    """
+    Whether a request over its budget raises. Outside test runs only
+    reads do, and only in DEBUG: by the time the budget is checked a
+    write has been committed, so those are never turned into errors.
+    """
+    return budgets_enforced() or (settings.DEBUG and request.method in READ_ONLY_METHODS)
+
+
+def check_budget(record):
+    """Names of the limits in the request's budget it went over."""
+    budget = get_budget(record['view'])
+    exceeded = []
+    if 'queries' in budget and record['queries'] > budget['queries']:
+        exceeded.append(f"{record['queries']} queries (budget {budget['queries']})")
+    if 'ms' in budget and record['total_ms'] > budget['ms']:
+        exceeded.append(f"{record['total_ms']}ms (budget {budget['ms']}ms)")
+    return exceeded
+
+
+def server_timing(record):
+    return ', '.join([
+        f'db;dur={record["db_ms"]};desc="{record["queries"]} queries"',
+        f'serialize;dur={record["serialize_ms"]}',
+        f'app;dur={record["app_ms"]}',
+        f'total;dur={record["total_ms"]}',
+    ])
+
+
+class RequestTimingMiddleware:
+    """
+    Record query count, DB time, response serialization time and total
+    time for every request.
+
+    The numbers go to the 'core.timing' logger as one JSON object per
+    request, to the Prometheus histograms in core.metrics and, when
+    SERVER_TIMING_HEADER is on, to a Server-Timing header the browser dev
+    tools display. Each request is checked
+    against the REQUEST_BUDGETS entry for its URL name. Going over logs
+    an error for GET and HEAD requests and a warning for writes; it
+    raises RequestBudgetExceeded for every request when budgets are
+    enforced (in tests), and for GET and HEAD requests in DEBUG.
+
+    Serialization covers rendering the response body (DRF renderers);
+    queries lazily run while rendering are counted separately as
+    serialize_queries, and serializer work done inside the view counts
+    towards app time.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        request._timer = timer
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+
+        record = self.build_record(request, response, timer)
+        metrics.observe_request(record)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', settings.DEBUG):
+            response['Server-Timing'] = server_timing(record)
+
+        exceeded = check_budget(record)
+        record['over_budget'] = exceeded
+        if exceeded:
+            level = logging.ERROR if request.method in READ_ONLY_METHODS else logging.WARNING
+            logger.log(level, json.dumps(record))
+            if fails_loudly(request):
+                raise RequestBudgetExceeded(
+                    f"{request.method} {request.path} ({record['view']}) went over budget: "
+                    + ', '.join(exceeded)
+                )
+        else:
+            logger.info(json.dumps(record))
+
+        return response
+
+    def process_template_response(self, request, response):
+        """Render here so the time it takes can be told apart from the view's."""
+        timer = getattr(request, '_timer', None)
+        if timer is None:
+            return response
+
+        queries, db_time = timer.queries, timer.db_time
+        started = time.perf_counter()
+        response.render()
+        timer.serialize_time += time.perf_counter() - started
+        timer.serialize_queries += timer.queries - queries
+        timer.serialize_db_time += timer.db_time - db_time
+        return response
+
+    def build_record(self, request, response, timer):
+        total = timer.total_time
+        # Queries run while rendering count as DB time, not serialization,
+        # so the db, serialize and app phases add up to the total
+        serialize_time = timer.serialize_time - timer.serialize_db_time
+        app_time = total - timer.db_time - serialize_time
+        match = request.resolver_match
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': timer.queries,
+            'serialize_queries': timer.serialize_queries,
+            'db_ms': round(timer.db_time * 1000, 2),
+            'serialize_ms': round(serialize_time * 1000, 2),
+            'app_ms': round(max(app_time, 0) * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Under a multi-process server (gunicorn with several workers) set the
+PROMETHEUS_MULTIPROC_DIR environment variable to an empty, writable
+directory before the workers start. Each process then writes its values
+to files there, /metrics aggregates all of them, and gunicorn's config
+should call child_exit below when a worker exits.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# ==================== Requests ====================
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by URL name',
+    ['method', 'view', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries per request by URL name',
+    ['view'],
+    buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in the database per request by URL name',
+    ['view'],
+    buckets=LATENCY_BUCKETS,
+)
+
+# ==================== Caches ====================
+
+CACHE_LOOKUPS = Counter(
+    'app_cache_lookups_total',
+    'Application cache lookups by cache and result (hit or miss)',
+    ['cache', 'result'],
+)
+
+# ==================== Domain ====================
+
+TEST_ATTEMPTS_STARTED = Counter(
+    'tests_attempts_started_total',
+    'Test attempts started (page reloads of a started attempt excluded)',
+)
+TEST_SUBMISSIONS = Counter(
+    'tests_submissions_total',
+    'Test attempts submitted, by the student or by the expiry sweeper',
+    ['source'],
+)
+TESTS_GRADED = Counter(
+    'tests_graded_total',
+    'Test attempts graded, by source (submission, timeout or regrade)',
+    ['source'],
+)
+TEST_AUTOSAVES = Counter(
+    'tests_autosaves_total',
+    'Autosave requests accepted',
+)
+TEST_RESULTS_VIEWED = Counter(
+    'tests_results_viewed_total',
+    'Test results viewed by students',
+)
+CHAPTER_CONTENT_VIEWS = Counter(
+    'courses_chapter_content_views_total',
+    'Chapter content pages served',
+)
+COURSE_ENROLLMENTS = Counter(
+    'courses_enrollment_changes_total',
+    'Students enrolled in or removed from courses, however the change was made',
+    ['action'],
+)
+
+
+def record_cache_lookup(cache_name, hit):
+    CACHE_LOOKUPS.labels(cache=cache_name, result='hit' if hit else 'miss').inc()
+
+
+def observe_request(record):
+    """Record a request timed by core.instrumentation.RequestTimingMiddleware."""
+    view = record['view'] or 'unmatched'
+    REQUEST_LATENCY.labels(
+        method=record['method'], view=view, status=str(record['status'])
+    ).observe(record['total_ms'] / 1000)
+    REQUEST_QUERIES.labels(view=view).observe(record['queries'])
+    REQUEST_DB_TIME.labels(view=view).observe(record['db_ms'] / 1000)
+
+
+def render():
+    """Current metrics in the Prometheus text format, and its content type."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def child_exit(server, worker):
+    """gunicorn hook: drop the files of a worker that has exited."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,60 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination for list endpoints.
+
+    Pages are fetched with a WHERE on the ordering column instead of an
+    OFFSET, so every page costs the same however deep the client goes.
+    Views pick the column with a `cursor_ordering` attribute, which should
+    be backed by an index; the default is newest first.
+
+    Responses keep the {count, results} envelope and add next/previous
+    cursor links. Counting a large table is not free, so `count` is only
+    exact when the client asks for it with ?count=true, or when the
+    whole result fits on one page; otherwise it is null.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-created_at'
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def wants_count(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count() if self.wants_count(request) else None
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_envelope(self, data):
+        count = self.count
+        if count is None and not self.has_next and not self.has_previous:
+            count = len(data)
+        return {
+            'count': count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_envelope(data))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'nullable': True,
+            'example': 123,
+        }
+        return response_schema
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,6 +27,9 @@ SECRET_KEY = "django-insecure-a)8tjfnbzfw1*#7&@4#n)b_4p%o@b#b7o&(edrlsn*&x8^^-+o
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Running under manage.py test
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = ['*', 'localhost', '127.0.0.1', 'testserver']
 
 
@@ -37,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     'corsheaders',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -47,6 +53,9 @@ INSTALLED_APPS = [
     'enrollments',
     'courses',
     'teachers',
+    'jobs',
+    'benchmarks',
+    'profiling',
     
 ]
 
@@ -57,6 +66,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "profiling.middleware.ProfilingMiddleware",
+    "core.instrumentation.RequestTimingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -97,6 +108,103 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# The cache must be shared by every worker process and by the background
+# commands: autosaved answers are buffered there until flush_autosaves
+# persists them, and enrollment sets and versions are invalidated there.
+# Set REDIS_URL (e.g. redis://localhost:6379/0) when running more than one
+# process; local memory is only fit for a single development server or
+# the test runner. manage.py check --deploy fails without a shared cache.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'techwards-academy',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'techwards-academy',
+        }
+    }
+
+
+
+# Full-text search (courses.search): the PostgreSQL text search
+# configuration used to build and query the search vectors. After changing
+# it, run manage.py update_search_vectors.
+SEARCH_CONFIG = 'english'
+
+
+# Request instrumentation
+# core.instrumentation.RequestTimingMiddleware logs query count and timings
+# for every request to the 'core.timing' logger and checks them against
+# these budgets, keyed by URL name. Going over logs an error for GET/HEAD
+# and a warning for writes. In DEBUG it also fails GET/HEAD requests, and
+# under manage.py test (REQUEST_BUDGETS_ENFORCE) every request, so a query
+# regression fails the tests. Writes are never failed otherwise: their
+# changes are committed by then. 'queries' is a query count, not counting
+# BEGIN/COMMIT/savepoints, 'ms' the total time. Test runs only log
+# requests over budget.
+
+REQUEST_BUDGETS = {
+    'default': {'queries': 20},
+    'course-list': {'queries': 3},
+    'course-detail': {'queries': 5},
+    'chapter-content': {'queries': 8},
+    'course-search': {'queries': 7},
+    'my-tests': {'queries': 4},
+    'start-test': {'queries': 8},
+    'autosave-test': {'queries': 2},
+    'submit-test': {'queries': 10},
+    'test-result': {'queries': 7},
+    'test-history': {'queries': 8},
+    'admin-test-list': {'queries': 3},
+    'admin-test-detail': {'queries': 6},
+    'admin-assignment-list': {'queries': 3},
+}
+REQUEST_BUDGETS_ENFORCE = TESTING
+
+# Server-Timing response header with the same numbers, for browser dev tools
+SERVER_TIMING_HEADER = DEBUG
+
+# On-demand profiling: ADMIN users get a request profiled by sending an
+# X-Profile: 1 header or ?_profile=1. Profiles are listed in the Django
+# admin; only the newest PROFILING_KEEP are kept. pyinstrument is used
+# when installed unless PROFILING_USE_SAMPLING is off.
+PROFILING_ENABLED = True
+PROFILING_KEEP = 200
+PROFILING_USE_SAMPLING = True
+
+# Prometheus scrape endpoint at /metrics (see core.metrics for running
+# under several worker processes). Set a token to require
+# 'Authorization: Bearer <token>' from the scraper.
+METRICS_AUTH_TOKEN = None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'WARNING' if TESTING else 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -119,11 +227,13 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     # 'DEFAULT_PERMISSION_CLASSES': (
     #     'rest_framework.permissions.IsAuthenticated',
     # ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
 # JWT Settings
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from .checks import check_shared_cache
+from .instrumentation import RequestBudgetExceeded, RequestTimer
+
+User = get_user_model()
+
+TIGHT_BUDGETS = {'default': {'queries': 0}}
+
+
+class RequestTimerTests(TestCase):
+    def test_transaction_statements_are_not_counted(self):
+        timer = RequestTimer()
+        with connection.execute_wrapper(timer):
+            with transaction.atomic():
+                Course.objects.count()
+        self.assertEqual(timer.queries, 1)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_fails(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/0',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class RequestBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(email='student@example.com', name='student', password='password')
+        Course.objects.create(title='Physics', description='Mechanics')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    @override_settings(REQUEST_BUDGETS=TIGHT_BUDGETS, REQUEST_BUDGETS_ENFORCE=False)
+    def test_overrun_is_logged_without_failing_the_request(self):
+        with self.assertLogs('core.timing', 'WARNING') as logs:
+            response = self.client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(logs.records[0].levelname, 'ERROR')
+        self.assertIn('"over_budget": ["', logs.output[0])
+
+    @override_settings(REQUEST_BUDGETS=TIGHT_BUDGETS, DEBUG=True, REQUEST_BUDGETS_ENFORCE=False)
+    def test_read_overrun_fails_in_debug(self):
+        with self.assertLogs('core.timing', 'ERROR'), self.assertRaises(RequestBudgetExceeded):
+            self.client.get('/api/courses/')
+
+    @override_settings(REQUEST_BUDGETS={'default': {'ms': 0}}, DEBUG=True, REQUEST_BUDGETS_ENFORCE=False)
+    def test_write_overrun_is_only_logged_in_debug(self):
+        with self.assertLogs('core.timing', 'WARNING') as logs:
+            response = self.client.post('/api/courses/', {'title': 'Chemistry'})
+        self.assertNotEqual(response.status_code, 500)
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+
+    @override_settings(REQUEST_BUDGETS=TIGHT_BUDGETS, REQUEST_BUDGETS_ENFORCE=True)
+    def test_overrun_fails_when_enforced(self):
+        with self.assertLogs('core.timing', 'WARNING'), self.assertRaises(RequestBudgetExceeded):
+            self.client.get('/api/courses/')
+
+    def test_tests_run_with_budgets_enforced(self):
+        self.assertTrue(settings.REQUEST_BUDGETS_ENFORCE)
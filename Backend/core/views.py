@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+
+
+def metrics_view(request):
+    """
+    GET /metrics - Prometheus scrape endpoint.
+
+    When METRICS_AUTH_TOKEN is set, scrapers must send it as a bearer
+    token; otherwise keep the endpoint off the public network.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+
+    content, content_type = metrics.render()
+    return HttpResponse(content, content_type=content_type)
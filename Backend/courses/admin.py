@@ -1,12 +1,43 @@
 from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+
 from .models import Course, Chapter, VideoLecture, AdminNote, StudentNote
+from .search import SEARCH_CONFIG, uses_full_text
+
+
+class FullTextSearchMixin:
+    """
+    On PostgreSQL, match the long text fields listed in full_text_fields
+    through the GIN-indexed search_vector instead of icontains scans; the
+    other search_fields still use icontains.
+    """
+    full_text_fields = ()
+
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if uses_full_text():
+            fields = [field for field in fields if field not in self.full_text_fields]
+        return fields
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not uses_full_text():
+            return super().get_search_results(request, queryset, search_term)
+        matches = Q(search_vector=SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG))
+        may_have_duplicates = False
+        if self.get_search_fields(request):
+            others, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+            matches |= Q(pk__in=others.values('pk'))
+        return queryset.filter(matches), may_have_duplicates
+
 
 # Register your models here.
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'thumbnail_preview', 'is_active', 'created_at', 'archived_at')
     list_filter = ('is_active', 'created_at', 'archived_at')
     search_fields = ('title', 'description')
+    full_text_fields = ('description',)
     readonly_fields = ('created_at', 'updated_at', 'archived_at', 'archived_by', 'thumbnail_preview')
     fieldsets = (
         ('Course Info', {'fields': ('title', 'description', 'thumbnail')}),
@@ -41,11 +72,11 @@ class VideoLectureAdmin(admin.ModelAdmin):
     list_filter = ('is_published', 'chapter__course', 'created_at')
     search_fields = ('title', 'chapter__title', 'chapter__course__title')
     ordering = ('chapter', 'order')
-    readonly_fields = ('created_at', 'updated_at', 'get_youtube_id', 'get_embed_url')
+    readonly_fields = ('created_at', 'updated_at', 'youtube_id', 'get_embed_url')
     
     fieldsets = (
         ('Video Info', {'fields': ('title', 'description', 'chapter', 'order')}),
-        ('YouTube', {'fields': ('youtube_url', 'get_youtube_id', 'get_embed_url')}),
+        ('YouTube', {'fields': ('youtube_url', 'youtube_id', 'get_embed_url')}),
         ('Metadata', {'fields': ('is_published',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
@@ -58,16 +89,23 @@ class VideoLectureAdmin(admin.ModelAdmin):
 # ============================================================================
 
 @admin.register(AdminNote)
-class AdminNoteAdmin(admin.ModelAdmin):
+class AdminNoteAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'chapter', 'note_type', 'created_by', 'created_at')
     list_filter = ('note_type', 'chapter__course', 'created_at')
     search_fields = ('title', 'content', 'chapter__title')
-    readonly_fields = ('created_at', 'updated_at', 'created_by', 'get_file_name', 'get_file_size')
+    full_text_fields = ('content',)
+    readonly_fields = (
+        'created_at', 'updated_at', 'created_by',
+        'file_original_name', 'file_size', 'file_content_type', 'file_sha256'
+    )
     
     fieldsets = (
         ('Note Info', {'fields': ('title', 'chapter', 'note_type')}),
         ('Content', {'fields': ('content', 'file')}),
-        ('File Info', {'fields': ('get_file_name', 'get_file_size'), 'classes': ('collapse',)}),
+        ('File Info', {
+            'fields': ('file_original_name', 'file_size', 'file_content_type', 'file_sha256'),
+            'classes': ('collapse',)
+        }),
         ('Metadata', {'fields': ('created_by', 'created_at', 'updated_at')}),
     )
     
@@ -83,10 +121,11 @@ class AdminNoteAdmin(admin.ModelAdmin):
 # ============================================================================
 
 @admin.register(StudentNote)
-class StudentNoteAdmin(admin.ModelAdmin):
+class StudentNoteAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'student', 'chapter', 'video', 'updated_at')
     list_filter = ('chapter__course', 'chapter', 'updated_at')
     search_fields = ('title', 'content', 'student__name', 'student__email')
+    full_text_fields = ('content',)
     readonly_fields = ('created_at', 'updated_at', 'student')
     
     fieldsets = (
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from core import metrics
+
+from .models import AdminNote, Chapter, StudentNote
+from .serializers import ChapterContentSerializer, StudentNoteListSerializer
+
+CHAPTER_CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _chapter_content_cache_key(chapter_id, version):
+    return f'chapter-content:{chapter_id}:v{version}'
+
+
+def chapter_content_json(chapter_id, version):
+    """
+    A chapter with its videos and admin notes, rendered to JSON once and
+    shared by every student; None if the chapter does not exist.
+
+    Keyed by the chapter's content version (see courses.versions), so an
+    edit is seen by the next request and old bundles simply age out. The
+    version is kept in the database and only moves forward, so a bundle
+    cached for an older version is never picked up again.
+    """
+    key = _chapter_content_cache_key(chapter_id, version)
+    content = cache.get(key)
+    metrics.record_cache_lookup('chapter_content', content is not None)
+    if content is None:
+        chapter = (
+            Chapter.objects.select_related('course')
+            .prefetch_related(
+                'videos',
+                Prefetch('admin_notes', queryset=AdminNote.objects.select_related('created_by'))
+            )
+            .filter(id=chapter_id)
+            .first()
+        )
+        if chapter is None:
+            return None
+        content = JSONRenderer().render(ChapterContentSerializer(chapter).data)
+        cache.set(key, content, CHAPTER_CONTENT_CACHE_TIMEOUT)
+    return content
+
+
+def student_notes_json(request, chapter_id):
+    """The requesting student's own notes in a chapter, rendered to JSON."""
+    notes = (
+        StudentNote.objects.filter(student=request.user, chapter_id=chapter_id)
+        .select_related('chapter__course', 'video')
+    )
+    return JSONRenderer().render(
+        StudentNoteListSerializer(notes, many=True, context={'request': request}).data
+    )
+
+
+def render_chapter_content(chapter_id, version, notes_json):
+    """
+    The full chapter content response body: the shared bundle with the
+    student's rendered notes spliced in, without decoding the bundle again.
+    """
+    content = chapter_content_json(chapter_id, version)
+    if content is None:
+        return None
+    return content[:-1] + b',"student_notes":' + notes_json + b'}'
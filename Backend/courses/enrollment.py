@@ -0,0 +1,84 @@
+from django.core.cache import cache
+
+from core import metrics
+
+from .models import Chapter, Course
+
+# Cached sets are invalidated by whichever process changes a membership
+# (see courses.signals), so the cache has to be shared by every worker for
+# the invalidation to reach the others; a per-process cache would keep
+# serving revoked enrollments until the timeout. core.checks fails the
+# deploy check without one (see CACHES in core.settings).
+
+ENROLLMENT_CACHE_TIMEOUT = 60 * 5
+
+CHAPTER_COURSE_CACHE_TIMEOUT = 60 * 60
+
+
+def _enrollment_cache_key(user_id):
+    return f'enrolled-courses:{user_id}'
+
+
+def _chapter_course_cache_key(chapter_id):
+    return f'chapter-course:{chapter_id}'
+
+
+def enrolled_course_ids(request):
+    """
+    IDs of the courses the requesting user is enrolled in.
+
+    Loaded at most once per request: the set is kept on the request, so
+    permission classes, views and serializers share it, and between
+    requests it comes from the cache. Membership changes invalidate the
+    cached set (see courses.signals).
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    # DRF's Request wraps the Django request; memoise on the inner one so
+    # the set survives the view re-wrapping it
+    holder = getattr(request, '_request', request)
+    course_ids = getattr(holder, '_enrolled_course_ids', None)
+    if course_ids is None:
+        key = _enrollment_cache_key(user.pk)
+        course_ids = cache.get(key)
+        metrics.record_cache_lookup('enrollments', course_ids is not None)
+        if course_ids is None:
+            course_ids = frozenset(
+                Course.students.through.objects.filter(user_id=user.pk)
+                .values_list('course_id', flat=True)
+            )
+            cache.set(key, course_ids, ENROLLMENT_CACHE_TIMEOUT)
+        holder._enrolled_course_ids = course_ids
+    return course_ids
+
+
+def is_enrolled(request, course_id):
+    return course_id in enrolled_course_ids(request)
+
+
+def chapter_course_id(chapter_id):
+    """Course of a chapter, without loading the chapter; None if missing."""
+    key = _chapter_course_cache_key(chapter_id)
+    course_id = cache.get(key)
+    metrics.record_cache_lookup('chapter_course', course_id is not None)
+    if course_id is None:
+        course_id = Chapter.objects.filter(id=chapter_id).values_list('course_id', flat=True).first()
+        if course_id is not None:
+            cache.set(key, course_id, CHAPTER_COURSE_CACHE_TIMEOUT)
+    return course_id
+
+
+def is_enrolled_in_chapter(request, chapter_id):
+    course_id = chapter_course_id(chapter_id)
+    return course_id is not None and is_enrolled(request, course_id)
+
+
+def invalidate_enrollments(user_ids):
+    """Forget the cached course sets of the given users."""
+    cache.delete_many([_enrollment_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_chapter(chapter_id):
+    cache.delete(_chapter_course_cache_key(chapter_id))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from courses.models import AdminNote
+
+
+class Command(BaseCommand):
+    help = 'Record name, size, content type and SHA-256 of admin note files uploaded before they were stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-read every file, not only notes missing metadata')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        notes = AdminNote.objects.exclude(file='').exclude(file__isnull=True)
+        if not options['all']:
+            notes = notes.filter(Q(file_size__isnull=True) | Q(file_sha256=''))
+        notes = notes.order_by('pk').only('pk', 'file', *AdminNote.FILE_METADATA_FIELDS)
+
+        updated = 0
+        missing = []
+        batch = []
+        for note in notes.iterator(chunk_size=options['batch_size']):
+            try:
+                with note.file.open('rb') as file:
+                    # The upload's own name is gone; the stored name is the best left
+                    note.set_file_metadata(file, name=note.file.name)
+            except OSError:
+                missing.append(note.pk)
+                continue
+            batch.append(note)
+            if len(batch) >= options['batch_size']:
+                updated += self.flush(batch)
+        updated += self.flush(batch)
+
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f'Could not read the files of {len(missing)} notes: {", ".join(map(str, missing))}'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Recorded file metadata of {updated} notes'))
+
+    def flush(self, batch):
+        AdminNote.objects.bulk_update(batch, AdminNote.FILE_METADATA_FIELDS)
+        count = len(batch)
+        batch.clear()
+        return count
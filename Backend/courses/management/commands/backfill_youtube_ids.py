@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import VideoLecture, extract_youtube_id
+
+
+class Command(BaseCommand):
+    help = 'Store the YouTube id of videos saved before it was extracted on save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-extract every video, not only missing ids')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        videos = VideoLecture.objects.all()
+        if not options['all']:
+            videos = videos.filter(youtube_id__isnull=True)
+        pending = videos.order_by('pk').values_list('pk', 'chapter_id', 'youtube_url')
+
+        updated = 0
+        duplicates = []
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            # Ids other videos of these chapters already hold
+            taken = set(
+                VideoLecture.objects.filter(chapter_id__in={chapter_id for _, chapter_id, _ in batch})
+                .exclude(pk__in=[pk for pk, _, _ in batch])
+                .exclude(youtube_id__isnull=True)
+                .exclude(youtube_id='')
+                .values_list('chapter_id', 'youtube_id')
+            )
+            rows = []
+            for pk, chapter_id, youtube_url in batch:
+                youtube_id = extract_youtube_id(youtube_url)
+                if youtube_id:
+                    if (chapter_id, youtube_id) in taken:
+                        duplicates.append(pk)
+                        continue
+                    taken.add((chapter_id, youtube_id))
+                rows.append(VideoLecture(pk=pk, youtube_id=youtube_id))
+            VideoLecture.objects.bulk_update(rows, ['youtube_id'])
+            updated += len(rows)
+
+        if duplicates:
+            # Left without an id (their embed URL is still worked out on
+            # each request) until the duplicate is removed
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {len(duplicates)} videos repeating a YouTube video in their chapter: '
+                f'{", ".join(map(str, duplicates))}'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Stored YouTube ids of {updated} videos'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import SEARCHABLE_MODELS, update_search_vectors, uses_full_text
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search vectors of every course, chapter, video and note'
+
+    def handle(self, *args, **options):
+        if not uses_full_text():
+            self.stdout.write('Full-text search needs PostgreSQL; nothing to do')
+            return
+
+        total = 0
+        for model in SEARCHABLE_MODELS:
+            updated = update_search_vectors(model)
+            total += updated
+            self.stdout.write(f'  {model._meta.label:24} {updated:>10} rows')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} search vectors'))
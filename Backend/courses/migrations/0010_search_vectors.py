@@ -0,0 +1,102 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:02
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Weighted (title, body) fields of each searchable model
+SEARCH_FIELDS = {
+    "course": ("title", "description"),
+    "chapter": ("title", "description"),
+    "videolecture": ("title", "description"),
+    "adminnote": ("title", "content"),
+    "studentnote": ("title", "content"),
+}
+
+GIN_INDEXES = {
+    "course": "course_search_gin",
+    "chapter": "chapter_search_gin",
+    "videolecture": "video_search_gin",
+    "adminnote": "admin_note_search_gin",
+    "studentnote": "student_note_search_gin",
+}
+
+
+def _gin_indexes(apps):
+    for model_name, index_name in GIN_INDEXES.items():
+        yield apps.get_model("courses", model_name), GinIndex(
+            fields=["search_vector"], name=index_name
+        )
+
+
+def add_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for model, index in _gin_indexes(apps):
+            schema_editor.add_index(model, index)
+
+
+def remove_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for model, index in _gin_indexes(apps):
+            schema_editor.remove_index(model, index)
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, (title, body) in SEARCH_FIELDS.items():
+        apps.get_model("courses", model_name).objects.update(
+            search_vector=SearchVector(title, weight="A", config="english")
+            + SearchVector(body, weight="B", config="english")
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0009_remove_videolecture_duration_seconds"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminnote",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="chapter",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentnote",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="videolecture",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # Outside the model state: GIN indexes only exist on PostgreSQL, and
+        # SQLite would fail to rebuild them whenever it remakes these tables
+        migrations.RunPython(add_gin_indexes, remove_gin_indexes),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0010_search_vectors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videolecture",
+            name="youtube_id",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=11, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="videolecture",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("youtube_id", ""), _negated=True),
+                fields=("chapter", "youtube_id"),
+                name="unique_youtube_video_per_chapter",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0011_videolecture_youtube_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminnote",
+            name="file_content_type",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="adminnote",
+            name="file_original_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="adminnote",
+            name="file_sha256",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="adminnote",
+            name="file_size",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
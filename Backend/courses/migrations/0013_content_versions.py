@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:23
+
+import time
+
+from django.db import migrations, models
+
+
+def start_content_versions(apps, schema_editor):
+    # Start from the current time so no version handed out before this
+    # migration can match one handed out after it
+    now_ms = int(time.time() * 1000)
+    for model_name in ("course", "chapter"):
+        apps.get_model("courses", model_name).objects.update(content_version=now_ms)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0012_adminnote_file_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chapter",
+            name="content_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="content_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(start_content_versions, migrations.RunPython.noop),
+    ]
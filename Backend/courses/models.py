@@ -1,13 +1,73 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
+import hashlib
+import mimetypes
 import os
+import re
+import time
 
 User = settings.AUTH_USER_MODEL
 
+# watch?v=, youtu.be/ and embed/ URLs
+YOUTUBE_ID_RE = re.compile(
+    r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([A-Za-z0-9_-]{11})'
+)
 
-class Course(models.Model): 
+DUPLICATE_VIDEO_MESSAGE = "This video is already in the chapter."
+
+
+def extract_youtube_id(url):
+    """The 11-character video id of a YouTube URL, or '' for other URLs."""
+    match = YOUTUBE_ID_RE.search(url or '')
+    return match.group(1) if match else ''
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def next_content_version():
+    """
+    Expression moving a content_version forward: the current time in
+    milliseconds, or one past the stored value should that be ahead. So
+    a version only ever increases, even across clock steps, and doubles
+    as the content's modification time.
+    """
+    return Greatest(models.F('content_version') + 1, models.Value(_now_ms()))
+
+
+class ContentVersionMixin:
+    """
+    Keeps a content_version column that every save moves forward, in the
+    same transaction as the change. Responses built from the row are
+    cached and validated against it (see courses.versions), so unlike a
+    counter in the cache it survives eviction, restarts and other worker
+    processes, and never goes back.
+    """
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.content_version = _now_ms()
+        else:
+            self.content_version = next_content_version()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'content_version'}
+        super().save(*args, **kwargs)
+        if hasattr(self.content_version, 'resolve_expression'):
+            self.refresh_from_db(fields=['content_version'])
+
+    @classmethod
+    def bump_content_version(cls, **filters):
+        """Move the content_version of the matching rows forward"""
+        cls.objects.filter(**filters).update(content_version=next_content_version())
+
+
+class Course(ContentVersionMixin, models.Model): 
     title = models.CharField(max_length=200, unique=True)
     description = models.TextField()
     thumbnail = models.ImageField(upload_to='course_thumbnails/', blank=True, null=True)
@@ -29,6 +89,14 @@ class Course(models.Model):
         help_text='Students enrolled in this course'
     )
     
+    # Weighted title and body for full-text search, on this and the other
+    # searchable models (see courses.search); filled on PostgreSQL only
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Version of the course detail page: the course, its chapter list and
+    # its students (see ContentVersionMixin)
+    content_version = models.BigIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -50,7 +118,7 @@ class Course(models.Model):
         self.save()
 
 
-class Chapter(models.Model):
+class Chapter(ContentVersionMixin, models.Model):
     
     
     course = models.ForeignKey(
@@ -62,6 +130,12 @@ class Chapter(models.Model):
     title = models.CharField(max_length=150) 
     description = models.TextField(null=True, blank=True)
     order = models.PositiveIntegerField()
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Version of what every student sees on the chapter page: the chapter,
+    # its course's title, its videos and admin notes
+    content_version = models.BigIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -91,10 +165,15 @@ class VideoLecture(models.Model):
     youtube_url = models.URLField(
         help_text='YouTube video URL or embed URL (e.g., https://www.youtube.com/watch?v=dQw4w9WgXcQ)'
     )
+    # Extracted from youtube_url on save: '' when it is not a YouTube URL,
+    # NULL until backfilled (manage.py backfill_youtube_ids)
+    youtube_id = models.CharField(max_length=11, null=True, blank=True, editable=False, db_index=True)
 
 
     order = models.PositiveIntegerField()
     is_published = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -107,21 +186,43 @@ class VideoLecture(models.Model):
             models.Index(fields=['chapter', 'order']),
             models.Index(fields=['is_published']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chapter', 'youtube_id'],
+                condition=~models.Q(youtube_id=''),
+                name='unique_youtube_video_per_chapter'
+            )
+        ]
     
     def __str__(self):
         return f"{self.chapter.title} - {self.title}"
     
+    def save(self, *args, **kwargs):
+        self.youtube_id = extract_youtube_id(self.youtube_url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'youtube_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'youtube_id'}
+        super().save(*args, **kwargs)
+    
+    def clean(self):
+        if self.youtube_id_taken(self.chapter_id, self.youtube_url, exclude_pk=self.pk):
+            raise ValidationError({'youtube_url': DUPLICATE_VIDEO_MESSAGE})
+    
+    @classmethod
+    def youtube_id_taken(cls, chapter_id, youtube_url, exclude_pk=None):
+        """Whether another video of the chapter has the same YouTube id."""
+        youtube_id = extract_youtube_id(youtube_url)
+        if not youtube_id or not chapter_id:
+            return False
+        return cls.objects.filter(
+            chapter_id=chapter_id, youtube_id=youtube_id
+        ).exclude(pk=exclude_pk).exists()
+    
     def get_youtube_id(self):
-        import re
-        # Handle different YouTube URL formats
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([A-Za-z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, self.youtube_url)
-            if match:
-                return match.group(1)
-        return None
+        if self.youtube_id is None:
+            # Not backfilled yet
+            return extract_youtube_id(self.youtube_url) or None
+        return self.youtube_id or None
     
     def get_embed_url(self):
         video_id = self.get_youtube_id()
@@ -176,6 +277,15 @@ class AdminNote(models.Model):
         help_text='PDF, Word, or other document files'
     )
     
+    # Recorded when a file is uploaded, so reading a note never touches the
+    # storage backend (manage.py backfill_note_files for older uploads)
+    file_original_name = models.CharField(max_length=255, blank=True, editable=False)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    file_content_type = models.CharField(max_length=100, blank=True, editable=False)
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -191,14 +301,42 @@ class AdminNote(models.Model):
     def __str__(self):
         return f"{self.chapter.title} - {self.title}"
     
+    FILE_METADATA_FIELDS = ('file_original_name', 'file_size', 'file_content_type', 'file_sha256')
+    
+    def save(self, *args, **kwargs):
+        # An uncommitted file is a new upload, written to storage by this save
+        if self.file and not self.file._committed:
+            self.set_file_metadata(self.file.file, name=self.file.file.name)
+        elif not self.file:
+            self.file_original_name, self.file_size = '', None
+            self.file_content_type, self.file_sha256 = '', ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'file' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.FILE_METADATA_FIELDS}
+        super().save(*args, **kwargs)
+    
+    def set_file_metadata(self, file, name):
+        """Record name, size, type and SHA-256 of a file, reading it once."""
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in file.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        self.file_original_name = os.path.basename(name)[:255]
+        self.file_size = size
+        self.file_content_type = (
+            getattr(file, 'content_type', None) or mimetypes.guess_type(name)[0] or ''
+        )[:100]
+        self.file_sha256 = digest.hexdigest()
+    
     def get_file_name(self):
         if self.file:
-            return os.path.basename(self.file.name)
+            return self.file_original_name or os.path.basename(self.file.name)
         return None
     
     def get_file_size(self):
         if self.file:
-            return self.file.size
+            return self.file_size
         return None
 
 
@@ -228,6 +366,8 @@ class StudentNote(models.Model):
     
     title = models.CharField(max_length=200)
     content = models.TextField()
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from .models import StudentNote
+from .enrollment import is_enrolled, is_enrolled_in_chapter
 
 class IsTeacherOrAdmin(BasePermission):
     def has_permission(self, request, view):
@@ -36,10 +37,12 @@ class IsAdminOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         # Allow read if enrolled
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
-            if hasattr(obj, 'chapter'):
-                return obj.chapter.course.students.filter(id=request.user.id).exists() or request.user.role == 'ADMIN'
-            elif hasattr(obj, 'course'):
-                return obj.course.students.filter(id=request.user.id).exists() or request.user.role == 'ADMIN'
+            if request.user.role == 'ADMIN':
+                return True
+            if hasattr(obj, 'chapter_id'):
+                return is_enrolled_in_chapter(request, obj.chapter_id)
+            elif hasattr(obj, 'course_id'):
+                return is_enrolled(request, obj.course_id)
         # Admin only for write
         return request.user.role == 'ADMIN'
 
@@ -60,13 +63,8 @@ class IsEnrolledStudentOrAdmin(BasePermission):
         # Get chapter from kwargs
         chapter_id = view.kwargs.get('chapter_id')
         if chapter_id:
-            from .models import Chapter
-            try:
-                chapter = Chapter.objects.get(id=chapter_id)
-                # Check if user is enrolled in the course
-                return chapter.course.students.filter(id=request.user.id).exists()
-            except Chapter.DoesNotExist:
-                return False
+            # Check if user is enrolled in the chapter's course
+            return is_enrolled_in_chapter(request, chapter_id)
         
         return True
 
@@ -87,7 +85,7 @@ class IsAdminNoteOwnerOrReadOnly(BasePermission):
             # Check if student is enrolled in the course or is admin
             if request.user.role == 'ADMIN':
                 return True
-            return obj.chapter.course.students.filter(id=request.user.id).exists()
+            return is_enrolled_in_chapter(request, obj.chapter_id)
         
         # Only admin can modify
         return request.user.role == 'ADMIN'
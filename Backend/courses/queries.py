@@ -0,0 +1,36 @@
+from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Course
+
+
+def catalog_queryset(user, queryset=None):
+    """
+    Course queryset for catalog listings.
+
+    Annotates students_count and is_enrolled with subqueries so the
+    serializers never have to hit the database per course. The whole
+    listing costs a single query regardless of catalog size.
+    """
+    if queryset is None:
+        queryset = Course.objects.filter(is_active=True)
+
+    memberships = Course.students.through.objects.filter(course_id=OuterRef('pk'))
+
+    students_count = Subquery(
+        memberships.order_by()
+        .values('course_id')
+        .annotate(total=Count('pk'))
+        .values('total'),
+        output_field=IntegerField()
+    )
+
+    if user is not None and user.is_authenticated:
+        is_enrolled = Exists(memberships.filter(user_id=user.pk))
+    else:
+        is_enrolled = Value(False)
+
+    return queryset.select_related('archived_by').annotate(
+        students_count=Coalesce(students_count, Value(0)),
+        is_enrolled=is_enrolled
+    )
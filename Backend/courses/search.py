@@ -0,0 +1,218 @@
+"""
+Full-text search over courses, chapters, videos and notes.
+
+On PostgreSQL every searchable model keeps a weighted tsvector in its
+search_vector column (title A, body B), GIN-indexed and refreshed on save
+(see courses.signals); queries use websearch syntax, are ranked with
+ts_rank and highlighted with ts_headline. Other databases, such as the
+SQLite used for local runs, fall back to icontains matching with a simple
+title-over-body ranking and a snippet cut in Python.
+
+Headlines are HTML: the text is escaped and matches wrapped in <mark>.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from django.utils.html import escape
+
+from .enrollment import enrolled_course_ids
+from .models import AdminNote, Chapter, Course, StudentNote, VideoLecture
+
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'english')
+
+MAX_RESULTS = 50
+
+# ts_headline marks matches with these; the text is escaped before they
+# become <mark> tags, so note content cannot inject markup
+_START, _STOP = '\ue000', '\ue001'
+
+HEADLINE_WORDS = 30
+
+
+class SearchSource:
+    """A searchable model: its weighted fields and what a user may see."""
+
+    def __init__(self, model, title, body, course, chapter, visible):
+        self.model = model
+        self.title = title
+        self.body = body
+        # Paths to the course and chapter ids returned with each result
+        self.course = course
+        self.chapter = chapter
+        self.visible = visible
+
+    def vector(self):
+        return (
+            SearchVector(self.title, weight='A', config=SEARCH_CONFIG)
+            + SearchVector(self.body, weight='B', config=SEARCH_CONFIG)
+        )
+
+    def queryset(self, request):
+        return self.visible(request, self.model.objects.all())
+
+
+def _is_admin(request):
+    return request.user.role == 'ADMIN'
+
+
+def _courses(request, queryset):
+    return queryset.filter(is_active=True)
+
+
+def _chapters(request, queryset):
+    queryset = queryset.filter(course__is_active=True)
+    if not _is_admin(request):
+        queryset = queryset.filter(course_id__in=enrolled_course_ids(request))
+    return queryset
+
+
+def _videos(request, queryset):
+    queryset = queryset.filter(chapter__course__is_active=True)
+    if not _is_admin(request):
+        queryset = queryset.filter(
+            chapter__course_id__in=enrolled_course_ids(request), is_published=True
+        )
+    return queryset
+
+
+def _admin_notes(request, queryset):
+    queryset = queryset.filter(chapter__course__is_active=True)
+    if not _is_admin(request):
+        queryset = queryset.filter(chapter__course_id__in=enrolled_course_ids(request))
+    return queryset
+
+
+def _own_notes(request, queryset):
+    return queryset.filter(student=request.user)
+
+
+SOURCES = {
+    'course': SearchSource(Course, 'title', 'description', 'id', None, _courses),
+    'chapter': SearchSource(Chapter, 'title', 'description', 'course_id', 'id', _chapters),
+    'video': SearchSource(
+        VideoLecture, 'title', 'description', 'chapter__course_id', 'chapter_id', _videos
+    ),
+    'note': SearchSource(
+        AdminNote, 'title', 'content', 'chapter__course_id', 'chapter_id', _admin_notes
+    ),
+    'my_note': SearchSource(
+        StudentNote, 'title', 'content', 'chapter__course_id', 'chapter_id', _own_notes
+    ),
+}
+
+SEARCHABLE_MODELS = {source.model: source for source in SOURCES.values()}
+
+
+def uses_full_text():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vectors(model, pks=None):
+    """
+    Recompute the search_vector of the given rows, or of every row.
+
+    Saves do this through a signal; call it after writes that bypass
+    save(), such as bulk loads. A no-op without PostgreSQL.
+    """
+    if not uses_full_text():
+        return 0
+    queryset = model.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(search_vector=SEARCHABLE_MODELS[model].vector())
+
+
+# ==================== Search ====================
+
+def _result_values(source):
+    return {
+        'result_id': F('id'),
+        'result_title': F(source.title),
+        'result_course': F(source.course),
+        'result_chapter': F(source.chapter) if source.chapter else Value(None, IntegerField()),
+    }
+
+
+def _full_text_results(source, request, text, limit):
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    rows = (
+        source.queryset(request)
+        .filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            headline=SearchHeadline(
+                Coalesce(NullIf(source.body, Value('')), source.title),
+                query,
+                config=SEARCH_CONFIG,
+                start_sel=_START,
+                stop_sel=_STOP,
+                max_words=HEADLINE_WORDS,
+            ),
+            **_result_values(source),
+        )
+        .order_by('-rank')
+        .values('result_id', 'result_title', 'result_course', 'result_chapter', 'rank', 'headline')[:limit]
+    )
+    for row in rows:
+        row['headline'] = escape(row['headline']).replace(_START, '<mark>').replace(_STOP, '</mark>')
+        yield row
+
+
+def _snippet(text, needle):
+    """A window of text around the first match, escaped and marked."""
+    start = text.lower().find(needle.lower())
+    if start < 0:
+        return escape(' '.join(text.split()[:HEADLINE_WORDS]))
+    end = start + len(needle)
+    before = text[:start].split()[-(HEADLINE_WORDS // 2):]
+    after = text[end:].split()[:HEADLINE_WORDS // 2]
+    prefix = ' '.join(before) + (' ' if text[:start][-1:].isspace() else '')
+    suffix = (' ' if text[end:end + 1].isspace() else '') + ' '.join(after)
+    return f'{escape(prefix)}<mark>{escape(text[start:end])}</mark>{escape(suffix)}'
+
+
+def _fallback_results(source, request, text, limit):
+    title_match = Q(**{f'{source.title}__icontains': text})
+    rows = (
+        source.queryset(request)
+        .filter(title_match | Q(**{f'{source.body}__icontains': text}))
+        .annotate(
+            rank=Case(When(title_match, then=Value(1.0)), default=Value(0.4), output_field=FloatField()),
+            result_body=F(source.body),
+            **_result_values(source),
+        )
+        .order_by('-rank', '-id')
+        .values('result_id', 'result_title', 'result_body', 'result_course', 'result_chapter', 'rank')[:limit]
+    )
+    for row in rows:
+        body = row.pop('result_body') or ''
+        row['headline'] = _snippet(body if text.lower() in body.lower() else row['result_title'], text)
+        yield row
+
+
+def search(request, text, types=None, limit=20):
+    """
+    Results visible to the requesting user, best first, as dicts of
+    type, id, title, course, chapter, rank and headline.
+
+    Students only see content of courses they are enrolled in, published
+    videos and their own notes; admins see everything in active courses.
+    """
+    limit = max(1, min(limit, MAX_RESULTS))
+    find = _full_text_results if uses_full_text() else _fallback_results
+    results = []
+    for name in types or SOURCES:
+        for row in find(SOURCES[name], request, text, limit):
+            results.append({
+                'type': name,
+                'id': row['result_id'],
+                'title': row['result_title'],
+                'course': row['result_course'],
+                'chapter': row['result_chapter'],
+                'rank': round(row['rank'], 4),
+                'headline': row['headline'],
+            })
+    results.sort(key=lambda result: result['rank'], reverse=True)
+    return results[:limit]
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Chapter, Course, VideoLecture, AdminNote, StudentNote
+from .models import Chapter, Course, VideoLecture, AdminNote, StudentNote, DUPLICATE_VIDEO_MESSAGE
+from .enrollment import is_enrolled
 from accounts.models import User
 
 
@@ -10,6 +11,22 @@ class StudentDetailSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
 
+def _students_count(course):
+    """Use the catalog annotation when present, otherwise count."""
+    if hasattr(course, 'students_count'):
+        return course.students_count
+    return course.students.count()
+
+
+def _is_enrolled(course, request):
+    """Use the catalog annotation when present, otherwise check membership."""
+    if hasattr(course, 'is_enrolled'):
+        return course.is_enrolled
+    if request and request.user.is_authenticated:
+        return is_enrolled(request, course.id)
+    return False
+
+
 class CourseSerializer(serializers.ModelSerializer):
     archived_by_name = serializers.CharField(
         source='archived_by.name',
@@ -36,14 +53,11 @@ class CourseSerializer(serializers.ModelSerializer):
 
     def get_students_count(self, obj):
         """Count of enrolled students"""
-        return obj.students.count()
+        return _students_count(obj)
     
     def get_is_enrolled(self, obj):
         """Check if current user is enrolled"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.students.filter(id=request.user.id).exists()
-        return False
+        return _is_enrolled(obj, self.context.get('request'))
 
     def validate_title(self, value):
         if not value or not value.strip():
@@ -91,14 +105,11 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     
     def get_students_count(self, obj):
         """Count of enrolled students"""
-        return obj.students.count()
+        return _students_count(obj)
     
     def get_is_enrolled(self, obj):
         """Check if current user is enrolled"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.students.filter(id=request.user.id).exists()
-        return False
+        return _is_enrolled(obj, self.context.get('request'))
         
         
 
@@ -115,19 +126,32 @@ class VideoLectureSerializer(serializers.ModelSerializer):
         model = VideoLecture
         fields = (
             'id', 'chapter', 'chapter_title', 'title', 'description',
-            'youtube_url', 'embed_url', 'order',
+            'youtube_url', 'youtube_id', 'embed_url', 'order',
             'is_published', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'chapter', 'embed_url', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'chapter', 'youtube_id', 'embed_url', 'created_at', 'updated_at')
     
     def get_embed_url(self, obj):
-        """Generate embed URL from YouTube URL"""
+        """Embed URL from the stored YouTube id"""
         return obj.get_embed_url()
     
     def validate_order(self, value):
         if value < 1:
             raise serializers.ValidationError("Video order must be greater than 0.")
         return value
+    
+    def validate(self, attrs):
+        """The same YouTube video only once per chapter"""
+        if self.instance is not None:
+            chapter_id = self.instance.chapter_id
+            youtube_url = attrs.get('youtube_url', self.instance.youtube_url)
+        else:
+            view = self.context.get('view')
+            chapter_id = view.kwargs.get('chapter_id') if view else None
+            youtube_url = attrs.get('youtube_url')
+        if VideoLecture.youtube_id_taken(chapter_id, youtube_url, exclude_pk=getattr(self.instance, 'pk', None)):
+            raise serializers.ValidationError({'youtube_url': DUPLICATE_VIDEO_MESSAGE})
+        return attrs
 
 
 class VideoListSerializer(serializers.ModelSerializer):
@@ -163,20 +187,22 @@ class AdminNoteSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'chapter', 'chapter_title', 'title', 'note_type',
             'content', 'file', 'file_name', 'file_size',
+            'file_content_type', 'file_sha256',
             'created_by', 'created_by_name',
             'created_at', 'updated_at'
         )
         read_only_fields = (
             'id', 'chapter', 'created_by', 'created_by_name', 'file_name', 'file_size',
+            'file_content_type', 'file_sha256',
             'created_at', 'updated_at'
         )
     
     def get_file_name(self, obj):
-        """Get file name if file exists"""
+        """Original name of the uploaded file, from the stored metadata"""
         return obj.get_file_name()
     
     def get_file_size(self, obj):
-        """Get file size if file exists"""
+        """Size recorded at upload; storage is not consulted"""
         return obj.get_file_size()
     
     def validate(self, data):
@@ -242,7 +268,7 @@ class StudentNoteSerializer(serializers.ModelSerializer):
         """Ensure student is enrolled in the chapter's course"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            if not value.course.students.filter(id=request.user.id).exists():
+            if not is_enrolled(request, value.course_id):
                 raise serializers.ValidationError(
                     "You must be enrolled in this course to create notes."
                 )
@@ -274,16 +300,13 @@ class StudentNoteListSerializer(serializers.ModelSerializer):
 
 
 
-class ChapterWithContentSerializer(serializers.ModelSerializer):
+class ChapterContentSerializer(serializers.ModelSerializer):
     """
-    Serializer for chapter with all its learning content:
-    - Videos
-    - Admin notes
-    - Student personal notes
+    The part of a chapter page that is the same for every student:
+    the chapter with its videos and admin notes.
     """
     videos = VideoListSerializer(many=True, read_only=True)
     admin_notes = AdminNoteListSerializer(many=True, read_only=True)
-    student_notes = serializers.SerializerMethodField()
     course_title = serializers.CharField(source='course.title', read_only=True)
     
     class Meta:
@@ -291,18 +314,10 @@ class ChapterWithContentSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'title', 'description', 'order',
             'course', 'course_title',
-            'videos', 'admin_notes', 'student_notes',
+            'videos', 'admin_notes',
             'created_at'
         )
         read_only_fields = ('id', 'created_at')
-    
-    def get_student_notes(self, obj):
-        """Get student notes for current user only"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            notes = obj.student_notes.filter(student=request.user)
-            return StudentNoteListSerializer(notes, many=True).data
-        return []
 
 
         
@@ -0,0 +1,138 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+
+from core import metrics
+
+from .enrollment import invalidate_chapter, invalidate_enrollments
+from .models import AdminNote, Chapter, Course, StudentNote, VideoLecture
+from .search import SEARCHABLE_MODELS, update_search_vectors
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def invalidate_enrollment_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop the cached course sets of students whose enrollments changed:
+    enroll, remove_student, admin edits and clear() from either side.
+
+    Done once the change commits; dropping them earlier would let a
+    concurrent request cache the old set again until it expires.
+    """
+    if action == 'pre_clear' and not reverse:
+        # The students are gone by post_clear, so remember them now
+        instance._cleared_student_ids = list(instance.students.values_list('pk', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        # user.enrolled_courses.add/remove/clear(...)
+        user_ids = [instance.pk]
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_student_ids', [])
+    else:
+        user_ids = pk_set or []
+
+    if user_ids:
+        transaction.on_commit(partial(invalidate_enrollments, list(user_ids)))
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def bump_enrolled_course_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Course detail lists the enrolled students."""
+    if reverse and action == 'pre_clear':
+        instance._cleared_course_ids = list(instance.enrolled_courses.values_list('pk', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        course_ids = [instance.pk]
+    elif action == 'post_clear':
+        course_ids = getattr(instance, '_cleared_course_ids', [])
+    else:
+        course_ids = pk_set or []
+
+    if course_ids:
+        Course.bump_content_version(pk__in=course_ids)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def count_enrollment_changes(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Count enrollments and removals made any way, once they commit. Runs
+    after the receivers above, which remember what clear() removes.
+    """
+    if action in ('post_add', 'post_remove'):
+        changed = len(pk_set or ())
+    elif action == 'post_clear':
+        cleared = '_cleared_course_ids' if reverse else '_cleared_student_ids'
+        changed = len(getattr(instance, cleared, ()))
+    else:
+        return
+    if changed:
+        counter = metrics.COURSE_ENROLLMENTS.labels(action='enroll' if action == 'post_add' else 'remove')
+        transaction.on_commit(partial(counter.inc, changed))
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def invalidate_chapter_course(sender, instance, **kwargs):
+    invalidate_chapter(instance.pk)
+
+
+# ==================== Content versions ====================
+# Course and Chapter move their own content_version on save; these move
+# it for changes made elsewhere, in the same transaction as the change.
+
+@receiver(post_save, sender=Course)
+def bump_course_chapters(sender, instance, **kwargs):
+    """Chapter pages show the course title."""
+    Chapter.bump_content_version(course_id=instance.pk)
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def bump_chapter_course(sender, instance, **kwargs):
+    """Course detail lists the chapters."""
+    Course.bump_content_version(pk=instance.course_id)
+
+
+@receiver(post_save, sender=VideoLecture)
+@receiver(post_delete, sender=VideoLecture)
+@receiver(post_save, sender=AdminNote)
+@receiver(post_delete, sender=AdminNote)
+def bump_chapter_content(sender, instance, **kwargs):
+    Chapter.bump_content_version(pk=instance.chapter_id)
+
+
+@receiver(post_save, sender=User)
+def bump_user_courses(sender, instance, created, update_fields, **kwargs):
+    """
+    Students' names appear on course detail and admins' on the notes
+    they wrote. Logins only touch last_login and leave them alone.
+    """
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    Course.bump_content_version(students=instance)
+    Chapter.bump_content_version(pk__in=AdminNote.objects.filter(created_by=instance).values('chapter_id'))
+
+
+# ==================== Search ====================
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Chapter)
+@receiver(post_save, sender=VideoLecture)
+@receiver(post_save, sender=AdminNote)
+@receiver(post_save, sender=StudentNote)
+def refresh_search_vector(sender, instance, update_fields, **kwargs):
+    source = SEARCHABLE_MODELS[sender]
+    if update_fields and not {source.title, source.body} & set(update_fields):
+        return
+    update_search_vectors(sender, [instance.pk])
@@ -1,3 +1,169 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from .enrollment import enrolled_course_ids
+from .models import Chapter, Course, StudentNote, VideoLecture
+
+User = get_user_model()
+
+
+def make_user(email, role='STUDENT', **extra_fields):
+    return User.objects.create_user(
+        email=email, name=email.split('@')[0], password='password', role=role, **extra_fields
+    )
+
+
+class EnrollmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('student@example.com')
+        cls.course = Course.objects.create(title='Physics', description='Mechanics')
+
+    def setUp(self):
+        cache.clear()
+
+    def course_ids(self):
+        return enrolled_course_ids(SimpleNamespace(user=self.student))
+
+    def test_set_cached_during_the_transaction_is_dropped_on_commit(self):
+        self.assertEqual(self.course_ids(), frozenset())
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.course.students.add(self.student)
+                # A concurrent request that still sees the old membership
+                # caches it again before the enrollment commits
+                cache.set(f'enrolled-courses:{self.student.pk}', frozenset())
+        self.assertEqual(self.course_ids(), {self.course.pk})
+
+    def test_removal_from_the_student_side_is_seen(self):
+        self.course.students.add(self.student)
+        self.assertEqual(self.course_ids(), {self.course.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.enrolled_courses.clear()
+        self.assertEqual(self.course_ids(), frozenset())
+
+
+class EnrollmentMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_user(f'student{index}@example.com') for index in range(3)]
+        cls.course = Course.objects.create(title='Physics', description='Mechanics')
+
+    def count(self, action):
+        return REGISTRY.get_sample_value('courses_enrollment_changes_total', {'action': action}) or 0
+
+    def test_changes_made_outside_the_enroll_views_are_counted(self):
+        enrolled, removed = self.count('enroll'), self.count('remove')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.students.add(*self.students)
+            # Already enrolled, so not counted again
+            self.course.students.add(self.students[0])
+        self.assertEqual(self.count('enroll') - enrolled, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.students[0].enrolled_courses.clear()
+            self.course.students.clear()
+        self.assertEqual(self.count('remove') - removed, 3)
+
+
+class ChapterContentMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('student@example.com')
+        cls.course = Course.objects.create(title='Physics', description='Mechanics')
+        cls.course.students.add(cls.student)
+        cls.chapter = Chapter.objects.create(course=cls.course, title='Motion', order=1)
+        cls.video = VideoLecture.objects.create(
+            chapter=cls.chapter, title='Velocity', youtube_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ', order=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def content(self, **headers):
+        return self.client.get(f'/api/courses/chapters/{self.chapter.pk}/content/', **headers)
+
+    def chapter_version(self):
+        return Chapter.objects.values_list('content_version', flat=True).get(pk=self.chapter.pk)
+
+
+class ContentVersionTests(ChapterContentMixin, TestCase):
+    def test_changes_move_the_version_forward(self):
+        versions = [self.chapter_version()]
+        self.video.title = 'Acceleration'
+        self.video.save()
+        versions.append(self.chapter_version())
+        Course.objects.get(pk=self.course.pk).save()
+        versions.append(self.chapter_version())
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_version_never_goes_back_with_the_clock(self):
+        before = self.chapter_version()
+        with mock.patch('courses.models._now_ms', return_value=0):
+            self.video.delete()
+        self.assertEqual(self.chapter_version(), before + 1)
+
+    def test_bundle_of_an_older_version_is_not_served(self):
+        self.assertContains(self.content(), 'Velocity')
+        # Leaves no newer timestamp behind, and the old bundle stays cached
+        self.video.delete()
+        self.assertNotContains(self.content(), 'Velocity')
+
+
+class ConditionalGetTests(ChapterContentMixin, TestCase):
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_chapter_is_not_modified(self):
+        response = self.content()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_course_rename_is_seen_after_the_cache_is_lost(self):
+        etag = self.content()['ETag']
+        self.course.title = 'Mechanics'
+        self.course.save()
+        cache.clear()
+        response = self.content(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Mechanics')
+
+    def test_deleted_note_is_not_served(self):
+        note = StudentNote.objects.create(
+            student=self.student, chapter=self.chapter, title='Reminder', content='Revise'
+        )
+        etag = self.content()['ETag']
+        note.delete()
+        cache.clear()
+        response = self.content(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Reminder')
+
+    def test_enrollment_change_is_seen_on_course_detail(self):
+        for url in (f'/api/courses/{self.course.pk}/', f'/api/courses/subjects/{self.course.pk}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.revalidate(url, response).status_code, 304)
+                other = make_user(f'other{len(url)}@example.com')
+                self.course.students.add(other)
+                cache.clear()
+                response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, other.email)
+
+    def test_missing_course_is_not_found(self):
+        self.assertEqual(self.client.get('/api/courses/subjects/0/').status_code, 404)
+
+    @override_settings(REQUEST_BUDGETS_ENFORCE=True)
+    def test_cold_chapter_content_stays_within_budget(self):
+        StudentNote.objects.create(student=self.student, chapter=self.chapter, title='Reminder', content='Revise')
+        self.assertEqual(self.content().status_code, 200)
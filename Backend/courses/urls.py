@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CourseDetailView, CourseListView, ChapterListView, CourseViewSet,
     VideoLectureViewSet, AdminNoteViewSet, StudentNoteViewSet,
-    ChapterContentView
+    ChapterContentView, CourseSearchView
 )
 
 
@@ -19,6 +19,8 @@ urlpatterns = [
     }), name='student-note-list'),
     path('student-notes/<int:pk>/', StudentNoteViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='student-note-detail'),
 
+    path('search/', CourseSearchView.as_view(), name='course-search'),
+
     # Legacy URLs (must be before router to avoid conflicts)
     path('subjects/', CourseListView.as_view()),
     path('subjects/<int:pk>/', CourseDetailView.as_view()),
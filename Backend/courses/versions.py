@@ -0,0 +1,53 @@
+import hashlib
+
+from core.conditional import make_etag
+
+from .models import Chapter, Course
+
+# Course and chapter versions are their content_version columns (see
+# ContentVersionMixin), moved forward in the same transaction as every
+# change that shows up in the responses built from them. They live in the
+# database, so losing the cache never brings an old version back. Each is
+# a time in milliseconds, so it doubles as the Last-Modified of the
+# responses built from that content.
+
+
+def course_version(course_id):
+    """
+    Version of what a course's detail page shows: the course, its
+    chapter list and its enrolled students; None if there is no course.
+    """
+    return Course.objects.filter(pk=course_id).values_list('content_version', flat=True).first()
+
+
+def chapter_version(chapter_id):
+    """
+    Version of the content every student sees on a chapter page: the
+    chapter, its course's title, its videos and admin notes; None if
+    there is no chapter.
+    """
+    return Chapter.objects.filter(pk=chapter_id).values_list('content_version', flat=True).first()
+
+
+# ==================== HTTP validators ====================
+
+def course_validators(request, course_id):
+    """
+    ETag and Last-Modified of a course detail response for this user,
+    or None if there is no such course.
+    """
+    version = course_version(course_id)
+    if version is None:
+        return None
+    return make_etag('course', course_id, version, request.user.pk), version // 1000
+
+
+def chapter_etag(request, chapter_id, content_version, notes_json):
+    """
+    ETag of a chapter content response for this user. The student's own
+    notes are part of the body, so they go into the tag as a digest of
+    what is sent; there is no Last-Modified, as deleting a note leaves
+    no newer timestamp behind.
+    """
+    notes = hashlib.sha1(notes_json).hexdigest()[:16]
+    return make_etag('chapter', chapter_id, content_version, notes, request.user.pk)
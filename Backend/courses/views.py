@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from django.http import HttpResponse
 
 from .models import Course, Chapter, VideoLecture, AdminNote, StudentNote
 from .serializers import (
@@ -11,12 +12,18 @@ from .serializers import (
     VideoLectureSerializer, VideoListSerializer,
     AdminNoteSerializer, AdminNoteListSerializer,
     StudentNoteSerializer, StudentNoteListSerializer,
-    ChapterWithContentSerializer
 )
 from .permissions import (
     IsTeacherOrAdmin, IsAdminUser, IsAdminOrReadOnly, 
     IsEnrolledStudentOrAdmin, IsAdminNoteOwnerOrReadOnly, IsStudentNoteOwner
 )
+from .queries import catalog_queryset
+from .enrollment import chapter_course_id, is_enrolled
+from .versions import chapter_etag, chapter_version, course_validators
+from .content import render_chapter_content, student_notes_json
+from .search import SOURCES as SEARCH_SOURCES, search
+from core import metrics
+from core.conditional import not_modified, set_validators
 from accounts.models import User
 
 # Create your views here.
@@ -28,6 +35,14 @@ class CourseViewSet(viewsets.ModelViewSet):
     """
     queryset = Course.objects.filter(is_active=True)
     permission_classes = [IsAuthenticated]
+    cursor_ordering = '-created_at'
+    
+    def get_queryset(self):
+        """Annotate enrollment data for read actions"""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return catalog_queryset(self.request.user, queryset)
+        return queryset
     
     def get_serializer_class(self):
         """Use detail serializer for retrieve"""
@@ -38,15 +53,24 @@ class CourseViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """GET /api/courses/ - List all active courses"""
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
     
     def retrieve(self, request, *args, **kwargs):
         """GET /api/courses/{id}/ - Course detail with chapters and students"""
-        return super().retrieve(request, *args, **kwargs)
+        try:
+            course_id = int(kwargs['pk'])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        validators = course_validators(request, course_id)
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+        cached = not_modified(request, *validators)
+        if cached is not None:
+            return cached
+        response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, *validators)
     
     def create(self, request, *args, **kwargs):
         """POST /api/courses/ - Create course (admin only)"""
@@ -68,7 +92,7 @@ class CourseViewSet(viewsets.ModelViewSet):
         student = request.user
         
         # Check if student is already enrolled
-        if course.students.filter(id=student.id).exists():
+        if is_enrolled(request, course.id):
             return Response(
                 {
                     'status': 'already_enrolled',
@@ -98,13 +122,14 @@ class CourseViewSet(viewsets.ModelViewSet):
         List all courses student is enrolled in
         """
         student = request.user
-        courses = student.enrolled_courses.filter(is_active=True)
+        courses = catalog_queryset(
+            student,
+            Course.objects.filter(students=student, is_active=True)
+        )
         
-        serializer = self.get_serializer(courses, many=True, context={'request': request})
-        return Response({
-            'count': courses.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(courses)
+        serializer = self.get_serializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
     
     # ✅ NEW ENDPOINT: List course students (admin)
     @action(detail=True, methods=['GET'], permission_classes=[IsAuthenticated])
@@ -120,7 +145,9 @@ class CourseViewSet(viewsets.ModelViewSet):
             )
         
         course = self.get_object()
-        students = course.students.all()
+        students = self.paginate_queryset(
+            course.students.only('id', 'name', 'email', 'age', 'phone', 'created_at')
+        )
         
         student_data = [
             {
@@ -128,16 +155,19 @@ class CourseViewSet(viewsets.ModelViewSet):
                 'name': s.name,
                 'email': s.email,
                 'age': s.age,
-                'phone_number': s.phone_number
+                'phone_number': s.phone
             }
             for s in students
         ]
+        page = self.paginator.get_envelope(student_data)
         
         return Response({
             'course_id': course.id,
             'course_title': course.title,
-            'total_students': students.count(),
-            'students': student_data
+            'total_students': page['count'],
+            'students': student_data,
+            'next': page['next'],
+            'previous': page['previous']
         })
     
     # ✅ NEW ENDPOINT: Remove student from course (admin)
@@ -192,13 +222,16 @@ class CourseListView(APIView):
         user = request.user
         if user.role == 'STUDENT':
             # NEW: Get courses where student is in students list
-            enrolled_courses = user.enrolled_courses.filter(is_active=True)
+            enrolled_courses = catalog_queryset(
+                user,
+                Course.objects.filter(students=user, is_active=True)
+            )
             
             serializer = CourseSerializer(enrolled_courses, many=True, context={'request': request})
             return Response(serializer.data)
         
         
-        courses = Course.objects.filter(is_active=True)
+        courses = catalog_queryset(user)
         serializer = CourseSerializer(courses, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -207,6 +240,16 @@ class CourseDetailView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, pk):
+        # Answer revalidations from the course's version, before loading
+        # anything else; students only once their enrollment is confirmed
+        validators = course_validators(request, pk)
+        if validators is None:
+            return Response({"error": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.role != 'STUDENT' or is_enrolled(request, pk):
+            cached = not_modified(request, *validators)
+            if cached is not None:
+                return cached
+
         try:
             course = Course.objects.get(id=pk, is_active=True)
         except Course.DoesNotExist:
@@ -215,14 +258,14 @@ class CourseDetailView(APIView):
         
         if request.user.role == 'STUDENT':
             # NEW: Check if student is in course.students
-            if not course.students.filter(id=request.user.id).exists():
+            if not is_enrolled(request, course.id):
                 return Response(
                     {"error": "Not enrolled in this course"},
                     status = status.HTTP_403_FORBIDDEN
                 )
                 
         serializer = CourseDetailSerializer(course, context={'request': request})
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), *validators)
     
     
     
@@ -259,6 +302,7 @@ class VideoLectureViewSet(viewsets.ModelViewSet):
     - DELETE /api/chapters/{chapter_id}/videos/{id}/ - Delete video (admin only)
     """
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly, IsEnrolledStudentOrAdmin]
+    cursor_ordering = ('order', 'id')
     
     def get_queryset(self):
         """Filter videos by chapter"""
@@ -275,12 +319,9 @@ class VideoLectureViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """List all videos in a chapter"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def perform_create(self, serializer):
         """Save created_by when creating videos (for future use)"""
@@ -309,6 +350,7 @@ class AdminNoteViewSet(viewsets.ModelViewSet):
     - DELETE /api/chapters/{chapter_id}/admin-notes/{id}/ - Delete (admin only)
     """
     permission_classes = [IsAuthenticated, IsAdminNoteOwnerOrReadOnly, IsEnrolledStudentOrAdmin]
+    cursor_ordering = '-created_at'
     
     def get_queryset(self):
         """Filter notes by chapter"""
@@ -325,12 +367,9 @@ class AdminNoteViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """List all admin notes for a chapter"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def perform_create(self, serializer):
         """Set created_by to current user"""
@@ -359,6 +398,7 @@ class StudentNoteViewSet(viewsets.ModelViewSet):
     queryset = StudentNote.objects.all()
     serializer_class = StudentNoteSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = '-updated_at'
     
     def get_queryset(self):
         """Get only current user's notes"""
@@ -383,12 +423,9 @@ class StudentNoteViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         """List all personal notes for current student"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def perform_create(self, serializer):
         """Set student to current user"""
@@ -419,21 +456,83 @@ class ChapterContentView(APIView):
     permission_classes = [IsAuthenticated, IsEnrolledStudentOrAdmin]
     
     def get(self, request, chapter_id):
-        try:
-            chapter = Chapter.objects.get(id=chapter_id)
-        except Chapter.DoesNotExist:
+        course_id = chapter_course_id(chapter_id)
+        if course_id is None:
             return Response(
                 {'error': 'Chapter not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
         # Check enrollment
-        if not chapter.course.students.filter(id=request.user.id).exists():
+        if not is_enrolled(request, course_id):
             return Response(
                 {'error': 'You must be enrolled in this course'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        serializer = ChapterWithContentSerializer(chapter, context={'request': request})
-        return Response(serializer.data)
+        version = chapter_version(chapter_id)
+        if version is None:
+            return Response(
+                {'error': 'Chapter not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        # The student's own notes are read every time: they go into the
+        # ETag, as deleting one leaves no version behind
+        notes_json = student_notes_json(request, chapter_id)
+        etag = chapter_etag(request, chapter_id, version, notes_json)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
 
+        # Videos and admin notes come pre-rendered from the cache
+        content = render_chapter_content(chapter_id, version, notes_json)
+        if content is None:
+            return Response(
+                {'error': 'Chapter not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        metrics.CHAPTER_CONTENT_VIEWS.inc()
+        return set_validators(HttpResponse(content, content_type='application/json'), etag)
+
+
+
+# ============================================================================
+# SEARCH
+# ============================================================================
+
+class CourseSearchView(APIView):
+    """
+    GET /api/courses/search/?q=<text>&type=course,chapter,video,note,my_note&limit=20
+    
+    Ranked results across courses, chapters, videos, admin notes and the
+    student's own notes, each with an HTML headline (matches in <mark>).
+    Students only find content of the courses they are enrolled in.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response(
+                {'error': 'Search text (q) is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        types = [t for t in request.query_params.get('type', '').split(',') if t]
+        unknown = set(types) - set(SEARCH_SOURCES)
+        if unknown:
+            return Response(
+                {'error': f"Unknown type: {', '.join(sorted(unknown))}. Use {', '.join(SEARCH_SOURCES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = search(request, text, types=types, limit=limit)
+        return Response({'query': text, 'count': len(results), 'results': results})
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+# Register your models here.
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'task', 'created_at')
+    search_fields = ('task', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'finished_at', 'locked_by', 'locked_at')
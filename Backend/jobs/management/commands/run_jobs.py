@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import default_worker_id, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--worker-id', type=str, help='Identifier recorded on claimed jobs')
+
+    def handle(self, *args, **options):
+        worker_id = options.get('worker_id') or default_worker_id()
+        self.stdout.write(f'Worker {worker_id} started')
+
+        try:
+            while True:
+                processed = run_pending(worker_id=worker_id)
+                if processed:
+                    self.stdout.write(f'Processed {processed} jobs')
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker stopped')
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'task', 'status', 'result', 'last_error',
+            'attempts', 'max_attempts', 'run_after',
+            'created_at', 'updated_at', 'finished_at'
+        )
+        read_only_fields = fields
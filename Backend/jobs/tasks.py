@@ -0,0 +1,46 @@
+from django.db import transaction
+
+from .models import Job
+
+_registry = {}
+
+
+def register(name):
+    """
+    Register a function as a background task.
+
+    The function receives the job payload as keyword arguments and may
+    return a JSON-serialisable result.
+    """
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def enqueue(task, payload=None, user=None, max_attempts=3):
+    """
+    Queue a registered task.
+
+    The job row is written inside the caller's transaction, so a
+    rollback also drops the job.
+    """
+    if task not in _registry:
+        raise KeyError(f"Unknown task: {task}")
+    return Job.objects.create(
+        task=task,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts
+    )
+
+
+def enqueue_on_commit(task, payload=None, user=None, max_attempts=3):
+    """Queue a task once the current transaction commits."""
+    transaction.on_commit(
+        lambda: enqueue(task, payload=payload, user=user, max_attempts=max_attempts)
+    )
@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .tasks import register
+from .worker import STALE_AFTER, claim_job, heartbeat, run_job
+
+
+@register('jobs.tests.wait')
+def wait_task(seconds):
+    time.sleep(seconds)
+    return {'slept': seconds}
+
+
+class ClaimJobTests(TestCase):
+    def test_running_job_is_reclaimed_only_once_stale(self):
+        job = Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0})
+        self.assertEqual(claim_job('worker-a').pk, job.pk)
+        self.assertIsNone(claim_job('worker-b'))
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        reclaimed = claim_job('worker-b')
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_stale_job_on_its_last_attempt_is_failed(self):
+        job = Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0}, max_attempts=1)
+        claim_job('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        next_job = Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0})
+
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            self.assertEqual(claim_job('worker-b').pk, next_job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.locked_by, '')
+        self.assertIn('worker-a', job.last_error)
+
+    def test_outcome_of_a_reclaimed_job_is_discarded(self):
+        job = Job.objects.create(task='jobs.tests.missing')
+        claimed = claim_job('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_by='worker-b')
+
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+        self.assertEqual(job.locked_by, 'worker-b')
+        self.assertEqual(job.last_error, '')
+
+    def test_run_job_records_result(self):
+        Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0})
+        job = run_job(claim_job('worker-a'))
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'slept': 0})
+        self.assertIsNone(job.locked_at)
+
+
+class HeartbeatTests(TransactionTestCase):
+    def test_lock_is_refreshed_while_the_job_runs(self):
+        Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0})
+        job = claim_job('worker-a')
+        claimed_at = job.locked_at
+
+        with heartbeat(job, interval=timedelta(milliseconds=20)):
+            time.sleep(0.2)
+
+        job.refresh_from_db()
+        self.assertGreater(job.locked_at, claimed_at)
+
+    def test_heartbeat_stops_touching_a_job_it_lost(self):
+        Job.objects.create(task='jobs.tests.wait', payload={'seconds': 0})
+        job = claim_job('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_by='worker-b')
+        taken_at = Job.objects.get(pk=job.pk).locked_at
+
+        with heartbeat(job, interval=timedelta(milliseconds=20)):
+            time.sleep(0.1)
+
+        self.assertEqual(Job.objects.get(pk=job.pk).locked_at, taken_at)
@@ -0,0 +1,28 @@
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobStatusView(APIView):
+    """
+    GET /api/jobs/{id}/
+
+    Status of a background job. Visible to admins and to the user who
+    queued it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            job = Job.objects.get(id=pk)
+        except Job.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.user.role != 'ADMIN' and job.created_by_id != request.user.id:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(JobSerializer(job).data)
@@ -0,0 +1,181 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+from .tasks import get_task
+
+logger = logging.getLogger(__name__)
+
+# Retry delay is BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)
+BACKOFF_BASE_SECONDS = 10
+# A running job's locked_at is refreshed this often while it runs...
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+# ...so one not refreshed for this long has lost its worker and is reclaimed
+STALE_AFTER = timedelta(minutes=5)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(worker_id):
+    """
+    Lock and mark the next runnable job as running.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never
+    claim the same row. On backends without row locks (SQLite) the
+    lock clause is simply omitted. A stale job whose worker died on its
+    last attempt is marked failed instead of being run again.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status='queued', run_after__lte=now)
+                    | Q(status='running', locked_at__lt=now - STALE_AFTER)
+                )
+                .order_by('run_after', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == 'running' and job.attempts >= job.max_attempts:
+                logger.warning(
+                    "Job %s (%s) lost its worker on its last attempt (%s)", job.pk, job.task, job.attempts
+                )
+                job.status = 'failed'
+                job.last_error = f"Worker {job.locked_by} stopped responding on attempt {job.attempts}"
+                job.locked_by = ''
+                job.locked_at = None
+                job.finished_at = now
+                job.save(update_fields=[
+                    'status', 'last_error', 'locked_by', 'locked_at', 'finished_at', 'updated_at'
+                ])
+                continue
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at', 'updated_at'])
+        return job
+
+
+def touch_job(job):
+    """
+    Refresh the lock of a job this worker is running. Returns False once
+    the job is no longer held by it.
+    """
+    return Job.objects.filter(
+        pk=job.pk, status='running', locked_by=job.locked_by
+    ).update(locked_at=timezone.now()) == 1
+
+
+@contextmanager
+def heartbeat(job, interval=HEARTBEAT_INTERVAL):
+    """
+    Keep a job's lock fresh from a background thread for as long as the
+    block runs, however long that is, so it is not reclaimed as stale.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval.total_seconds()):
+                if not touch_job(job):
+                    logger.warning("Job %s (%s) lost its lock while running", job.pk, job.task)
+                    return
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _save_outcome(job, locked_by, fields):
+    """
+    Save the outcome of a job's attempt, unless the job has meanwhile
+    been reclaimed from this worker. Returns whether it was saved.
+    """
+    job.updated_at = timezone.now()
+    saved = Job.objects.filter(pk=job.pk, status='running', locked_by=locked_by).update(
+        **{field: getattr(job, field) for field in fields + ['updated_at']}
+    ) == 1
+    if not saved:
+        logger.warning(
+            "Job %s (%s) lost its lock; discarding the outcome of attempt %s", job.pk, job.task, job.attempts
+        )
+        job.refresh_from_db()
+    return saved
+
+
+def run_job(job):
+    """
+    Execute a claimed job and record its outcome. If another worker has
+    reclaimed the job in the meantime, its state is left to that worker.
+    """
+    func = get_task(job.task)
+    locked_by = job.locked_by
+    try:
+        if func is None:
+            raise LookupError(f"No handler registered for task '{job.task}'")
+        with heartbeat(job):
+            result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.pk, job.task, job.attempts)
+        job.last_error = error
+        job.locked_by = ''
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(
+                seconds=BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1)
+            )
+        _save_outcome(job, locked_by, [
+            'status', 'last_error', 'locked_by', 'locked_at', 'run_after', 'finished_at'
+        ])
+        return job
+
+    job.status = 'succeeded'
+    job.result = result
+    job.last_error = ''
+    job.locked_by = ''
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    _save_outcome(job, locked_by, [
+        'status', 'result', 'last_error', 'locked_by', 'locked_at', 'finished_at'
+    ])
+    return job
+
+
+def run_pending(worker_id=None, limit=None):
+    """Run queued jobs until the queue is empty or limit is reached."""
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_job(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,78 @@
+import json
+
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'method', 'path', 'view_name', 'status_code', 'user',
+        'duration_ms', 'query_count', 'db_time_ms', 'downloads'
+    )
+    list_filter = ('view_name', 'method', 'status_code', 'created_at')
+    search_fields = ('path', 'view_name', 'request_id')
+    list_select_related = ('user',)
+    date_hierarchy = 'created_at'
+    readonly_fields = (
+        'request_id', 'method', 'path', 'view_name', 'status_code', 'user',
+        'duration_ms', 'query_count', 'db_time_ms', 'format', 'downloads',
+        'profile_summary', 'created_at'
+    )
+    exclude = ('data', 'sql_log')
+
+    def get_queryset(self, request):
+        # The raw profile and SQL log are only read when downloaded
+        return super().get_queryset(request).defer('data', 'sql_log', 'summary')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_profile),
+                name='profiling_requestprofile_download'
+            ),
+            path(
+                '<int:pk>/sql/',
+                self.admin_site.admin_view(self.download_sql),
+                name='profiling_requestprofile_sql'
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description='Downloads')
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">profile</a> · <a href="{}">SQL</a>',
+            reverse('admin:profiling_requestprofile_download', args=[obj.pk]),
+            reverse('admin:profiling_requestprofile_sql', args=[obj.pk]),
+        )
+
+    @admin.display(description='Summary')
+    def profile_summary(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    def download_profile(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        content_type = 'application/octet-stream' if profile.format == 'pstats' else 'text/html'
+        response = HttpResponse(bytes(profile.data), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="profile-{profile.request_id}.{profile.file_extension}"'
+        )
+        return response
+
+    def download_sql(self, request, pk):
+        profile = get_object_or_404(RequestProfile.objects.only('request_id', 'sql_log'), pk=pk)
+        response = HttpResponse(json.dumps(profile.sql_log, indent=2), content_type='application/json')
+        response['Content-Disposition'] = f'attachment; filename="sql-{profile.request_id}.json"'
+        return response
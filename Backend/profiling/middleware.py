@@ -0,0 +1,212 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import ClaimsJWTAuthentication
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_PARAM = '_profile'
+
+# Longest SQL statement and most statements kept per profile
+SQL_MAX_LENGTH = 5000
+SQL_MAX_STATEMENTS = 2000
+
+SUMMARY_LINES = 40
+
+
+class SQLLog:
+    """Execute wrapper recording each statement with its duration."""
+
+    def __init__(self):
+        self.statements = []
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.time += elapsed
+            if len(self.statements) < SQL_MAX_STATEMENTS:
+                self.statements.append({
+                    'sql': sql[:SQL_MAX_LENGTH],
+                    'params': repr(params)[:SQL_MAX_LENGTH],
+                    'many': many,
+                    'ms': round(elapsed * 1000, 3),
+                    'connection': context['connection'].alias,
+                })
+
+
+class CProfileRunner:
+    format = 'pstats'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.profiler.create_stats()
+
+    def data(self):
+        # Same bytes as Stats.dump_stats, loadable by pstats and snakeviz
+        return marshal.dumps(self.profiler.stats)
+
+    def summary(self):
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+        return out.getvalue()
+
+
+class PyinstrumentRunner:
+    format = 'html'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self.profiler = Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def data(self):
+        return self.profiler.output_html().encode()
+
+    def summary(self):
+        return self.profiler.output_text()
+
+
+def make_runner():
+    """The sampling profiler when pyinstrument is installed, cProfile otherwise."""
+    if getattr(settings, 'PROFILING_USE_SAMPLING', True):
+        try:
+            return PyinstrumentRunner()
+        except ImportError:
+            pass
+    return CProfileRunner()
+
+
+def profile_requested(request):
+    flag = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM)
+    return flag not in (None, '', '0', 'false')
+
+
+def admin_user(request):
+    """
+    The requesting user if they are an active ADMIN, else None.
+
+    Users logged in to the Django admin come from the session
+    (AuthenticationMiddleware runs first). API requests authenticate
+    with JWT inside DRF, after middleware has run, so the token is
+    checked here too. Either way the role is confirmed against the user
+    row, since only requests asking to be profiled get this far.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = ClaimsJWTAuthentication().authenticate(request)
+        except APIException:
+            return None
+        if authenticated is None:
+            return None
+        user = authenticated[0]
+    if user.role != 'ADMIN':
+        return None
+    if not User.objects.filter(pk=user.pk, role='ADMIN', is_active=True).exists():
+        return None
+    return user
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when an ADMIN asks for it with an X-Profile header
+    or ?_profile=1.
+
+    The request runs under pyinstrument if installed (sampling, low
+    overhead) or cProfile, with every SQL statement logged. The result is
+    stored as a RequestProfile, browsable and downloadable from the Django
+    admin, and its request id returned in an X-Profile-Id header.
+    Requests from anyone else, or without the flag, pass straight through.
+
+    Place it below AuthenticationMiddleware, so admins logged in through
+    the Django admin session are recognised, and above
+    RequestTimingMiddleware, so saving the profile does not count against
+    the request's query budget.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PROFILING_ENABLED', True) or not profile_requested(request):
+            return self.get_response(request)
+        user = admin_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        runner = make_runner()
+        sql_log = SQLLog()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sql_log))
+            try:
+                runner.start()
+            except ValueError:
+                # Another profiler is already attached to this thread
+                logger.warning("Could not profile %s: a profiler is already running", request.path)
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                runner.stop()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=match.view_name if match else '',
+            status_code=response.status_code,
+            user_id=user.pk,
+            duration_ms=round(duration * 1000, 2),
+            query_count=sql_log.count,
+            db_time_ms=round(sql_log.time * 1000, 2),
+            format=runner.format,
+            data=runner.data(),
+            summary=runner.summary(),
+            sql_log=sql_log.statements,
+        )
+        prune_profiles()
+
+        response['X-Profile-Id'] = str(profile.request_id)
+        return response
+
+
+def prune_profiles():
+    """Keep only the newest PROFILING_KEEP profiles."""
+    keep = getattr(settings, 'PROFILING_KEEP', 200)
+    stale = RequestProfile.objects.order_by('-created_at').values_list('pk', flat=True)[keep:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
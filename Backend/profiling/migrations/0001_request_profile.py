@@ -0,0 +1,98 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:54
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "request_id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=500)),
+                ("view_name", models.CharField(blank=True, default="", max_length=200)),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                ("duration_ms", models.FloatField()),
+                ("query_count", models.PositiveIntegerField(default=0)),
+                ("db_time_ms", models.FloatField(default=0)),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[
+                            ("pstats", "cProfile stats"),
+                            ("html", "Sampling profiler HTML"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "data",
+                    models.BinaryField(
+                        help_text="Raw profile: marshalled pstats or profiler HTML"
+                    ),
+                ),
+                (
+                    "summary",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Top functions by cumulative time",
+                    ),
+                ),
+                (
+                    "sql_log",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Queries run, in order, with timings",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="request_profiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Request Profile",
+                "verbose_name_plural": "Request Profiles",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="profiling_r_created_e5cab8_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+import uuid
+
+from django.db import models
+from django.conf import settings
+
+User = settings.AUTH_USER_MODEL
+
+
+class RequestProfile(models.Model):
+    """
+    A profile of one request, captured on demand by an admin
+    (see profiling.middleware).
+    """
+    FORMAT_CHOICES = (
+        ('pstats', 'cProfile stats'),
+        ('html', 'Sampling profiler HTML'),
+    )
+
+    request_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True, default='')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='request_profiles'
+    )
+
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    db_time_ms = models.FloatField(default=0)
+
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    data = models.BinaryField(help_text='Raw profile: marshalled pstats or profiler HTML')
+    summary = models.TextField(blank=True, default='', help_text='Top functions by cumulative time')
+    sql_log = models.JSONField(default=list, blank=True, help_text='Queries run, in order, with timings')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.request_id})"
+
+    @property
+    def file_extension(self):
+        return 'prof' if self.format == 'pstats' else 'html'
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import RequestProfile
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_USE_SAMPLING=False)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', name='admin', password='password', role='ADMIN', is_staff=True
+        )
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_admin_logged_in_through_the_session_is_profiled(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(profile.request_id))
+        self.assertEqual(profile.user_id, self.admin.pk)
+
+    def test_admin_with_a_token_is_profiled(self):
+        response = self.client.get('/api/courses/?_profile=1', **self.bearer(self.admin))
+        self.assertIn('X-Profile-Id', response)
+
+    def test_demoted_admin_is_not_profiled(self):
+        headers = self.bearer(self.admin)
+        self.client.get('/api/courses/', **headers)
+        # Demoted behind the cached claims' back
+        User.objects.filter(pk=self.admin.pk).update(role='STUDENT')
+        response = self.client.get('/api/courses/?_profile=1', **headers)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_students_are_not_profiled(self):
+        student = User.objects.create_user(email='student@example.com', name='student', password='password')
+        response = self.client.get('/api/courses/?_profile=1', **self.bearer(student))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
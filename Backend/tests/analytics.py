@@ -0,0 +1,158 @@
+import numpy as np
+from django.core.cache import cache
+
+from .grading import GRADED_STATUSES, results_version
+from .models import AnswerOption, Question, StudentAnswer, TestAssignment
+
+ITEM_ANALYSIS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _round(value, digits=4):
+    """Plain float for JSON, None where the statistic is undefined."""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), digits)
+
+
+def compute_item_analysis(test_id):
+    """
+    Per-question difficulty, discrimination and distractor statistics.
+
+    Every graded attempt of the test is loaded into an attempts x
+    questions matrix with one query for the answers (joined to the
+    attempts, not filtered by a list of their IDs), and the statistics
+    are computed column-wise in NumPy:
+
+    - p_value: share of attempts that answered the question correctly
+      (unanswered counts as incorrect).
+    - discrimination: point-biserial correlation between answering the
+      question correctly and the score on the rest of the test.
+    - options: how often each option was chosen, and the mean test score
+      of the students who chose it.
+    """
+    attempt_ids = np.fromiter(
+        TestAssignment.objects.filter(test_id=test_id, status__in=GRADED_STATUSES)
+        .order_by('id')
+        .values_list('id', flat=True),
+        dtype=np.int64
+    )
+    questions = list(
+        Question.objects.filter(test_id=test_id)
+        .order_by('id')
+        .values_list('id', 'order', 'text', 'marks')
+    )
+    options = list(
+        AnswerOption.objects.filter(question__test_id=test_id)
+        .order_by('id')
+        .values_list('id', 'question_id', 'text', 'is_correct')
+    )
+    answers = list(
+        StudentAnswer.objects.filter(
+            assignment__test_id=test_id,
+            assignment__status__in=GRADED_STATUSES
+        )
+        .values_list('assignment_id', 'question_id', 'selected_option_id', 'is_correct', 'marks_obtained')
+    )
+
+    question_ids = np.array([row[0] for row in questions], dtype=np.int64)
+    option_ids = np.array([row[0] for row in options], dtype=np.int64)
+    n_attempts = len(attempt_ids)
+    n_questions = len(question_ids)
+
+    correct = np.zeros((n_attempts, n_questions))
+    marks = np.zeros((n_attempts, n_questions))
+    answered = np.zeros((n_attempts, n_questions), dtype=bool)
+
+    if answers:
+        data = np.array(
+            [(a, q, o if o is not None else -1, c, m) for a, q, o, c, m in answers],
+            dtype=np.int64
+        )
+        # Answers to questions that have since been deleted, or of attempts
+        # graded after the attempts were read, are ignored
+        known = np.isin(data[:, 1], question_ids) & np.isin(data[:, 0], attempt_ids)
+        data = data[known]
+        rows = np.searchsorted(attempt_ids, data[:, 0])
+        cols = np.searchsorted(question_ids, data[:, 1])
+        correct[rows, cols] = data[:, 3]
+        marks[rows, cols] = data[:, 4]
+        answered[rows, cols] = True
+
+        chosen = np.isin(data[:, 2], option_ids)
+        choice_rows = rows[chosen]
+        choice_options = np.searchsorted(option_ids, data[chosen, 2])
+    else:
+        choice_rows = np.zeros(0, dtype=np.int64)
+        choice_options = np.zeros(0, dtype=np.int64)
+
+    scores = marks.sum(axis=1)
+    rest = scores[:, None] - marks
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if n_attempts:
+            p_values = correct.mean(axis=0)
+            correct_dev = correct - p_values
+            rest_dev = rest - rest.mean(axis=0)
+            covariance = (correct_dev * rest_dev).sum(axis=0)
+            spread = np.sqrt((correct_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+            discrimination = np.where(spread > 0, covariance / spread, np.nan)
+        else:
+            p_values = discrimination = np.full(n_questions, np.nan)
+
+        option_counts = np.bincount(choice_options, minlength=len(option_ids))
+        option_score_sums = np.bincount(
+            choice_options, weights=scores[choice_rows], minlength=len(option_ids)
+        )
+        option_mean_scores = option_score_sums / option_counts
+
+    options_by_question = {}
+    for index, (option_id, question_id, text, is_correct) in enumerate(options):
+        count = int(option_counts[index])
+        options_by_question.setdefault(question_id, []).append({
+            'option_id': option_id,
+            'text': text,
+            'is_correct': is_correct,
+            'count': count,
+            'share': _round(count / n_attempts) if n_attempts else None,
+            'mean_score': _round(option_mean_scores[index], 2) if count else None,
+        })
+
+    answered_counts = answered.sum(axis=0)
+    items = []
+    for index, (question_id, order, text, question_marks) in enumerate(questions):
+        items.append({
+            'question_id': question_id,
+            'order': order,
+            'text': text,
+            'marks': question_marks,
+            'answered': int(answered_counts[index]),
+            'omitted': n_attempts - int(answered_counts[index]),
+            'p_value': _round(p_values[index]),
+            'discrimination': _round(discrimination[index]),
+            'options': options_by_question.get(question_id, []),
+        })
+    items.sort(key=lambda item: (item['order'], item['question_id']))
+
+    return {
+        'test_id': test_id,
+        'attempts': n_attempts,
+        'mean_score': _round(scores.mean(), 2) if n_attempts else None,
+        'score_std': _round(scores.std(), 2) if n_attempts else None,
+        'questions': items,
+    }
+
+
+def get_item_analysis(test_id, test_version):
+    """
+    Item analysis served from the cache.
+
+    Keyed on the test version (questions and options) and the results
+    version, which is bumped whenever an attempt is submitted or the
+    test is regraded.
+    """
+    key = f'item-analysis:{test_id}:v{test_version}:r{results_version(test_id)}'
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = compute_item_analysis(test_id)
+        cache.set(key, analysis, ITEM_ANALYSIS_CACHE_TIMEOUT)
+    return analysis
@@ -5,4 +5,5 @@ class TestsConfig(AppConfig):
     name = "tests"
     
     def ready(self):
+        import core.checks
         import tests.signals
@@ -0,0 +1,228 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .grading import get_answer_key, grade_answers, upsert_answers
+from .models import StudentAnswer, TestAssignment
+from .services import _chunked
+
+# Autosaves are buffered in the cache and persisted in bulk by the
+# flush_autosaves command, so the cache must be shared by every worker
+# process and the flusher (see CACHES in core.settings).
+
+# Buffers must outlive the longest test plus the gap between flushes
+AUTOSAVE_CACHE_TIMEOUT = 60 * 60 * 6
+
+AUTOSAVE_FLUSH_BATCH_SIZE = 500
+
+
+def _session_key(student_id, test_id):
+    return f'autosave-session:{student_id}:{test_id}'
+
+
+def _answer_key(assignment_id, question_id):
+    return f'autosave:{assignment_id}:{question_id}'
+
+
+def _revision_key(assignment_id):
+    return f'autosave-revision:{assignment_id}'
+
+
+def _flushed_key(assignment_id):
+    return f'autosave-flushed:{assignment_id}'
+
+
+# ==================== Sessions ====================
+
+def started_attempt(student_id, test_id):
+    """The student's started attempt of a test, or None."""
+    return TestAssignment.objects.filter(
+        student_id=student_id,
+        test_id=test_id,
+        status='started'
+    ).only(
+        'id', 'student_id', 'test_id', 'test_version', 'due_at', 'expires_at'
+    ).order_by('-attempt_number').first()
+
+
+def open_session(assignment):
+    """Remember the started attempt so autosaves can skip the database."""
+    cache.set(
+        _session_key(assignment.student_id, assignment.test_id),
+        assignment,
+        AUTOSAVE_CACHE_TIMEOUT
+    )
+
+
+def get_session(student_id, test_id):
+    """The student's started attempt of a test, from the cache; None if there is none."""
+    key = _session_key(student_id, test_id)
+    assignment = cache.get(key)
+    if assignment is None:
+        assignment = started_attempt(student_id, test_id)
+        if assignment is None:
+            return None
+        cache.set(key, assignment, AUTOSAVE_CACHE_TIMEOUT)
+    return assignment
+
+
+def close_sessions(attempts):
+    """
+    Drop the sessions and buffers of finished attempts, given as
+    (assignment, answer_key) pairs.
+    """
+    keys = []
+    for assignment, answer_key in attempts:
+        keys += [
+            _session_key(assignment.student_id, assignment.test_id),
+            _revision_key(assignment.id),
+            _flushed_key(assignment.id),
+        ]
+        keys += [_answer_key(assignment.id, question_id) for question_id in answer_key.question_ids]
+    cache.delete_many(keys)
+
+
+def close_session(assignment, answer_key):
+    close_sessions([(assignment, answer_key)])
+
+
+# ==================== Buffer ====================
+
+def buffer_answers(assignment_id, answers):
+    """
+    Buffer {question_id: option_id} answers of an attempt and return the
+    buffer's new revision. Touches only the cache.
+
+    Every answer is its own cache key, written as is: saves of different
+    questions never read or overwrite each other, whichever worker they
+    reach. The revision is bumped afterwards with an atomic increment, so
+    the flusher never records a revision whose answers it has not seen.
+    """
+    cache.set_many(
+        {_answer_key(assignment_id, question_id): option_id for question_id, option_id in answers.items()},
+        AUTOSAVE_CACHE_TIMEOUT
+    )
+    key = _revision_key(assignment_id)
+    cache.add(key, 0, AUTOSAVE_CACHE_TIMEOUT)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted in between; the next flush picks the answers up anyway
+        cache.add(key, 1, AUTOSAVE_CACHE_TIMEOUT)
+        return 1
+
+
+def buffered_answers_many(answer_keys):
+    """
+    Buffered answers of each attempt, given {assignment_id: answer_key},
+    with one cache round trip for the whole batch.
+    """
+    keys = {
+        _answer_key(assignment_id, question_id): (assignment_id, question_id)
+        for assignment_id, answer_key in answer_keys.items()
+        for question_id in answer_key.question_ids
+    }
+    answers = {assignment_id: {} for assignment_id in answer_keys}
+    for key, option_id in cache.get_many(list(keys)).items():
+        assignment_id, question_id = keys[key]
+        answers[assignment_id][question_id] = option_id
+    return answers
+
+
+def saved_answers_many(answer_keys):
+    """
+    Answers saved so far for each attempt, given {assignment_id:
+    answer_key}: what the flusher has persisted, overlaid with the newer
+    answers still in the buffer. Either side may be missing, e.g. before
+    the first flush or after a cache eviction.
+
+    One query and one cache round trip for the whole batch.
+    """
+    answers = {assignment_id: {} for assignment_id in answer_keys}
+    persisted = StudentAnswer.objects.filter(assignment_id__in=list(answer_keys)).values_list(
+        'assignment_id', 'question_id', 'selected_option_id'
+    )
+    for assignment_id, question_id, option_id in persisted:
+        answers[assignment_id][question_id] = option_id
+
+    for assignment_id, buffered in buffered_answers_many(answer_keys).items():
+        answers[assignment_id].update(buffered)
+    return answers
+
+
+def saved_answers(assignment_id, answer_key):
+    return saved_answers_many({assignment_id: answer_key})[assignment_id]
+
+
+def valid_answers(answer_key, answers):
+    """Drop answers that no longer match the answer key."""
+    return {
+        question_id: option_id
+        for question_id, option_id in answers.items()
+        if answer_key.question_for(option_id) == question_id
+    }
+
+
+# ==================== Flushing ====================
+
+def _flush_batch(batch, now):
+    revision_keys = {_revision_key(assignment_id): assignment_id for assignment_id, _, _ in batch}
+    flushed_keys = {_flushed_key(assignment_id): assignment_id for assignment_id, _, _ in batch}
+    cached = cache.get_many(list(revision_keys) + list(flushed_keys))
+
+    dirty = {}
+    for assignment_id, test_id, test_version in batch:
+        revision = cached.get(_revision_key(assignment_id))
+        if revision and revision > cached.get(_flushed_key(assignment_id), 0):
+            dirty[assignment_id] = (get_answer_key(test_id, test_version), revision)
+    if not dirty:
+        return 0, 0
+
+    rows = []
+    with transaction.atomic():
+        # Attempts being submitted right now are locked by the submit view
+        # and are skipped; submit writes the final answers itself
+        still_started = list(
+            TestAssignment.objects.select_for_update(skip_locked=True).filter(
+                id__in=list(dirty),
+                status='started'
+            ).values_list('id', flat=True)
+        )
+        # Read after the revisions, so every answer up to them is included
+        buffered = buffered_answers_many({assignment_id: dirty[assignment_id][0] for assignment_id in still_started})
+        for assignment_id in still_started:
+            answer_key, revision = dirty[assignment_id]
+            graded = grade_answers(answer_key, valid_answers(answer_key, buffered[assignment_id]))
+            rows.append((assignment_id, graded, revision))
+
+        upsert_answers([(assignment_id, graded) for assignment_id, graded, _ in rows], now)
+
+    cache.set_many(
+        {_flushed_key(assignment_id): revision for assignment_id, _, revision in rows},
+        AUTOSAVE_CACHE_TIMEOUT
+    )
+    return len(rows), sum(graded.total_questions for _, graded, _ in rows)
+
+
+def flush_autosaves(batch_size=AUTOSAVE_FLUSH_BATCH_SIZE):
+    """
+    Persist buffered answers of every started attempt to StudentAnswer.
+
+    Revisions are read in batches with get_many and only attempts saved
+    since their last flush are read and written, each batch with one
+    bulk upsert. Returns counts of attempts and answers written.
+    """
+    now = timezone.now()
+    attempts = 0
+    answers = 0
+
+    started = TestAssignment.objects.filter(status='started').values_list(
+        'id', 'test_id', 'test_version'
+    ).order_by().iterator(chunk_size=batch_size)
+
+    for batch in _chunked(started, batch_size):
+        flushed_attempts, flushed_answers = _flush_batch(batch, now)
+        attempts += flushed_attempts
+        answers += flushed_answers
+
+    return {'attempts': attempts, 'answers': answers}
@@ -0,0 +1,232 @@
+import csv
+import re
+import zipfile
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.contrib.auth import get_user_model
+from django.db.models import FilteredRelation, IntegerField, Q, Value
+
+from .models import Test, TestAssignment
+
+User = get_user_model()
+
+GRADEBOOK_CHUNK_SIZE = 2000
+
+ATTEMPT_MODES = ('latest', 'best')
+
+
+# ==================== Gradebook rows ====================
+
+def gradebook_tests(course):
+    return list(
+        Test.objects.filter(course=course, is_active=True)
+        .order_by('created_at', 'id')
+        .only('id', 'title', 'total_marks')
+    )
+
+
+def gradebook_header(tests):
+    return (
+        ['Student', 'Email']
+        + [f'{test.title} (/{test.total_marks})' for test in tests]
+        + ['Tests Attempted', 'Obtained Marks', 'Total Marks', 'Percentage']
+    )
+
+
+def gradebook_rows(course, tests, mode='latest', chunk_size=GRADEBOOK_CHUNK_SIZE):
+    """
+    Yield one row per enrolled student with a column per test.
+
+    Enrolled students are left-joined to their graded attempts of the
+    course's tests in a single query, ordered by student, and read
+    through a server-side cursor. Each student's rows are pivoted into
+    columns as they arrive, so memory use does not grow with the size of
+    the course. `mode` picks the latest or the best attempt per test.
+    """
+    test_ids = [test.id for test in tests]
+    total_possible = sum(test.total_marks for test in tests)
+
+    students = User.objects.filter(enrolled_courses=course)
+    if test_ids:
+        rows = (
+            students.annotate(
+                graded=FilteredRelation(
+                    'test_assignments',
+                    condition=Q(
+                        test_assignments__test_id__in=test_ids,
+                        test_assignments__status__in=TestAssignment.GRADED_STATUSES,
+                        test_assignments__obtained_marks__isnull=False
+                    )
+                )
+            )
+            .order_by('name', 'id', 'graded__test_id', 'graded__attempt_number')
+            .values_list('id', 'name', 'email', 'graded__test_id', 'graded__obtained_marks')
+        )
+    else:
+        # An empty IN in the join condition would match no row at all and
+        # drop every student, so with no tests they are listed without marks
+        no_marks = Value(None, output_field=IntegerField())
+        rows = students.order_by('name', 'id').values_list('id', 'name', 'email', no_marks, no_marks)
+    rows = rows.iterator(chunk_size=chunk_size)
+
+    for (student_id, name, email), attempts in groupby(rows, key=lambda row: row[:3]):
+        marks = {}
+        for *_, test_id, obtained in attempts:
+            if test_id is None:
+                continue
+            if mode == 'best':
+                marks[test_id] = max(obtained, marks.get(test_id, obtained))
+            else:
+                marks[test_id] = obtained
+
+        obtained_total = sum(marks.values())
+        yield (
+            [name, email]
+            + [marks.get(test_id, '') for test_id in test_ids]
+            + [
+                len(marks),
+                obtained_total,
+                total_possible,
+                round(obtained_total / total_possible * 100, 2) if total_possible else 0,
+            ]
+        )
+
+
+# ==================== Streaming writers ====================
+
+class _StreamBuffer:
+    """File-like sink that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: returns each row instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets read text cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """Text cells that a spreadsheet would run as a formula, quoted with a leading '."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    """
+    Write CSV as it is generated. Names, emails and titles come from
+    users, so they are defused against formula injection; numbers are
+    written as is.
+    """
+    writer = csv.writer(_Echo())
+    # Byte order mark so Excel opens the file as UTF-8
+    yield '\ufeff' + writer.writerow([_csv_cell(value) for value in header])
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Gradebook" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_FLUSH_SIZE = 64 * 1024
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None or value == '':
+            cells.append('<c/>')
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            text = escape(_XML_ILLEGAL.sub('', str(value)))
+            cells.append(f'<c t="inlineStr"><is><t>{text}</t></is></c>')
+        else:
+            cells.append(f'<c><v>{value}</v></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def stream_xlsx(header, rows):
+    """
+    Write a single-sheet workbook as it is generated.
+
+    The package is zipped into an in-memory buffer that is drained every
+    XLSX_FLUSH_SIZE bytes, and cells use inline strings so there is no
+    shared string table to hold on to. No spreadsheet library is needed.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode())
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode())
+                if buffer.size >= XLSX_FLUSH_SIZE:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield buffer.drain()
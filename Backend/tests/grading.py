@@ -0,0 +1,300 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from core import metrics
+
+from .leaderboard import rebuild_leaderboard, record_scores
+from .models import AnswerOption, Question, StudentAnswer, TestAssignment
+
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+
+GRADED_STATUSES = TestAssignment.GRADED_STATUSES
+
+
+def _results_version_key(test_id):
+    return f'test-results-version:{test_id}'
+
+
+def results_version(test_id):
+    """
+    Version of a test's graded results, for keying derived caches.
+
+    Starts from the current time in milliseconds so a counter that has
+    been evicted from the cache never comes back with an old value.
+    """
+    key = _results_version_key(test_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_results_version(test_id):
+    """
+    Invalidate everything cached against the test's results and return
+    the new version.
+    """
+    key = _results_version_key(test_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return results_version(test_id)
+
+
+def _submission_committed(assignment):
+    bump_results_version(assignment.test_id)
+    metrics.TESTS_GRADED.labels(source='submission').inc()
+
+
+def _regrade_committed(test_id, attempts):
+    bump_results_version(test_id)
+    metrics.TESTS_GRADED.labels(source='regrade').inc(attempts)
+
+
+class GradingError(Exception):
+    """Raised when a submission does not match the test's answer key."""
+
+
+class AnswerKey:
+    """
+    Correct option, marks and valid options for every question of a test.
+
+    Loaded with a single query so a whole submission can be validated and
+    scored in memory.
+    """
+
+    def __init__(self, rows):
+        self.correct = {}
+        self.marks = {}
+        self.options = {}
+        for option_id, question_id, is_correct, marks in rows:
+            self.marks[question_id] = marks
+            self.options[option_id] = question_id
+            if is_correct:
+                self.correct[question_id] = option_id
+
+    def __contains__(self, question_id):
+        return question_id in self.marks
+
+    @property
+    def question_ids(self):
+        return list(self.marks)
+
+    def question_for(self, option_id):
+        return self.options.get(option_id)
+
+
+def load_answer_key(test_id):
+    rows = AnswerOption.objects.filter(question__test_id=test_id).values_list(
+        'id', 'question_id', 'is_correct', 'question__marks'
+    )
+    return AnswerKey(rows)
+
+
+def get_answer_key(test_id, version):
+    """Answer key for a test version, cached like the compiled paper."""
+    key = f'answer-key:{test_id}:v{version}'
+    answer_key = cache.get(key)
+    metrics.record_cache_lookup('answer_key', answer_key is not None)
+    if answer_key is None:
+        answer_key = load_answer_key(test_id)
+        cache.set(key, answer_key, ANSWER_KEY_CACHE_TIMEOUT)
+    return answer_key
+
+
+def parse_answers(items):
+    """
+    Turn submitted [{question_id, selected_option_id}, ...] items into a
+    {question_id: option_id} dict. Later answers for the same question
+    replace earlier ones.
+    """
+    answers = {}
+    for item in items:
+        try:
+            question_id = int(item['question_id'])
+            option_id = int(item['selected_option_id'])
+        except (KeyError, TypeError, ValueError):
+            raise GradingError("Each answer needs integer question_id and selected_option_id.")
+        answers[question_id] = option_id
+    return answers
+
+
+class GradedSubmission:
+    def __init__(self, answers, obtained_marks, correct_answers):
+        self.answers = answers
+        self.obtained_marks = obtained_marks
+        self.correct_answers = correct_answers
+
+    @property
+    def total_questions(self):
+        return len(self.answers)
+
+
+def grade_answers(answer_key, answers):
+    """
+    Validate and score {question_id: option_id} against the answer key.
+
+    No queries are made. Raises GradingError when a question is not part
+    of the test or an option does not belong to its question.
+    """
+    graded = []
+    obtained_marks = 0
+    correct_answers = 0
+
+    for question_id, option_id in answers.items():
+        if question_id not in answer_key:
+            raise GradingError("Question does not belong to this test")
+        if answer_key.question_for(option_id) != question_id:
+            raise GradingError("Selected option doesn't belong to this question.")
+
+        question_marks = answer_key.marks[question_id]
+        is_correct = answer_key.correct.get(question_id) == option_id
+        marks_obtained = question_marks if is_correct else 0
+
+        graded.append((question_id, option_id, is_correct, marks_obtained, question_marks))
+        obtained_marks += marks_obtained
+        correct_answers += int(is_correct)
+
+    return GradedSubmission(graded, obtained_marks, correct_answers)
+
+
+def upsert_answers(rows, now, evaluated_at=None):
+    """
+    Write graded answers as one bulk upsert.
+
+    `rows` is an iterable of (assignment_id, GradedSubmission) pairs, so
+    answers of many attempts can go in the same statement.
+    """
+    StudentAnswer.objects.bulk_create(
+        [
+            StudentAnswer(
+                assignment_id=assignment_id,
+                question_id=question_id,
+                selected_option_id=option_id,
+                is_correct=is_correct,
+                marks_obtained=marks_obtained,
+                question_marks=question_marks,
+                answered_at=now,
+                evaluated_at=evaluated_at
+            )
+            for assignment_id, graded in rows
+            for question_id, option_id, is_correct, marks_obtained, question_marks in graded.answers
+        ],
+        update_conflicts=True,
+        unique_fields=['assignment', 'question'],
+        update_fields=[
+            'selected_option', 'is_correct', 'marks_obtained',
+            'question_marks', 'answered_at', 'evaluated_at'
+        ]
+    )
+
+
+def save_graded_submission(assignment, graded, total_marks, now=None):
+    """
+    Persist a graded submission: one bulk upsert for the answers, one
+    update for the assignment and the student's place on the leaderboard.
+    The caller is expected to hold a lock on the assignment row.
+    """
+    now = now or timezone.now()
+
+    upsert_answers([(assignment.id, graded)], now, evaluated_at=now)
+
+    assignment.status = 'submitted'
+    assignment.submitted_at = now
+    assignment.obtained_marks = graded.obtained_marks
+    assignment.total_marks = total_marks
+    assignment.percentage = assignment.calculate_percentage()
+    assignment.evaluated_at = now
+    assignment.save(update_fields=[
+        'status', 'submitted_at', 'obtained_marks', 'total_marks',
+        'percentage', 'evaluated_at', 'updated_at'
+    ])
+    record_scores([assignment])
+    transaction.on_commit(lambda: _submission_committed(assignment))
+    return assignment
+
+
+def regrade_test(test):
+    """
+    Re-score every graded attempt of a test against its current answer
+    key and question marks.
+
+    Runs as a handful of set-based UPDATE statements, whatever the number
+    of attempts, and returns a summary of what changed.
+    """
+    with transaction.atomic():
+        # Keeps total_marks in step with the questions and bumps the version
+        test.save()
+
+        assignments = TestAssignment.objects.filter(test=test, status__in=GRADED_STATUSES)
+        answers = StudentAnswer.objects.filter(
+            assignment__test=test,
+            assignment__status__in=GRADED_STATUSES
+        )
+
+        before = dict(assignments.values_list('id', 'obtained_marks'))
+
+        option_is_correct = Exists(
+            AnswerOption.objects.filter(pk=OuterRef('selected_option_id'), is_correct=True)
+        )
+        current_marks = Subquery(
+            Question.objects.filter(pk=OuterRef('question_id')).values('marks')[:1]
+        )
+        answers_changed = answers.annotate(
+            new_is_correct=option_is_correct,
+            new_question_marks=current_marks
+        ).exclude(
+            is_correct=F('new_is_correct'),
+            question_marks=F('new_question_marks')
+        ).count()
+
+        answers.update(is_correct=option_is_correct, question_marks=current_marks)
+        answers.update(
+            marks_obtained=Case(
+                When(is_correct=True, then=F('question_marks')),
+                default=Value(0)
+            )
+        )
+
+        obtained = Subquery(
+            StudentAnswer.objects.filter(assignment_id=OuterRef('pk'))
+            .order_by()
+            .values('assignment_id')
+            .annotate(total=Sum('marks_obtained'))
+            .values('total')
+        )
+        assignments.update(
+            obtained_marks=Coalesce(obtained, Value(0)),
+            total_marks=test.total_marks
+        )
+        if test.total_marks:
+            assignments.update(
+                percentage=Round(
+                    Cast(F('obtained_marks'), FloatField()) * 100.0 / test.total_marks,
+                    2
+                )
+            )
+        else:
+            assignments.update(percentage=None)
+
+        after = dict(assignments.values_list('id', 'obtained_marks'))
+        # Scores may have gone down, which the board cannot apply in place
+        rebuild_leaderboard(test.id)
+        transaction.on_commit(lambda: _regrade_committed(test.id, len(after)))
+
+    deltas = [after[pk] - (before.get(pk) or 0) for pk in after]
+    return {
+        'test_id': test.id,
+        'total_marks': test.total_marks,
+        'attempts_regraded': len(after),
+        'answers_changed': answers_changed,
+        'attempts_changed': sum(1 for pk in after if after[pk] != before.get(pk)),
+        'marks_gained': sum(delta for delta in deltas if delta > 0),
+        'marks_lost': -sum(delta for delta in deltas if delta < 0),
+    }
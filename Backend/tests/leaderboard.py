@@ -0,0 +1,197 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+
+from .models import LeaderboardEntry, LeaderboardScore, TestAssignment
+
+# Every test keeps its board in two tables, updated in the transaction
+# that grades an attempt: LeaderboardEntry holds each student's best score
+# and LeaderboardScore how many students hold each score. A rank is one
+# plus the students on higher scores, so it is read from at most
+# total_marks + 1 score rows, never from the attempts themselves.
+
+
+def _apply_score_changes(test_id, changes):
+    """Move students between score rows, given {marks: change in students}."""
+    changes = {marks: change for marks, change in changes.items() if change}
+    if not changes:
+        return
+    # Scores reached for the first time; a concurrent first student on the
+    # same score may create the row first
+    LeaderboardScore.objects.bulk_create(
+        [LeaderboardScore(test_id=test_id, marks=marks) for marks, change in changes.items() if change > 0],
+        ignore_conflicts=True
+    )
+    LeaderboardScore.objects.filter(test_id=test_id, marks__in=list(changes)).update(
+        students=F('students') + Case(
+            *[When(marks=marks, then=Value(change)) for marks, change in changes.items()],
+            default=Value(0)
+        )
+    )
+
+
+def record_scores(attempts):
+    """
+    Put newly graded attempts on their tests' boards. Only a student's
+    best score counts, and of equal scores the one reached first.
+
+    Meant to run inside the transaction that grades the attempts, so the
+    board changes commit or roll back with them. A handful of queries
+    per test, whatever the size of the board.
+    """
+    by_test = {}
+    for attempt in attempts:
+        if attempt.obtained_marks is None:
+            continue
+        best = by_test.setdefault(attempt.test_id, {})
+        current = best.get(attempt.student_id)
+        score = (attempt.obtained_marks, attempt.submitted_at)
+        if current is None or score[0] > current[0]:
+            best[attempt.student_id] = score
+
+    for test_id, best in by_test.items():
+        entries = {
+            entry.student_id: entry
+            for entry in LeaderboardEntry.objects.select_for_update().filter(
+                test_id=test_id,
+                student_id__in=list(best)
+            )
+        }
+        changes = Counter()
+        created = []
+        improved = []
+        for student_id, (marks, reached_at) in best.items():
+            entry = entries.get(student_id)
+            if entry is None:
+                created.append(LeaderboardEntry(
+                    test_id=test_id, student_id=student_id, best_marks=marks, reached_at=reached_at
+                ))
+            elif marks > entry.best_marks:
+                changes[entry.best_marks] -= 1
+                entry.best_marks = marks
+                entry.reached_at = reached_at
+                improved.append(entry)
+            else:
+                continue
+            changes[marks] += 1
+
+        LeaderboardEntry.objects.bulk_create(created)
+        LeaderboardEntry.objects.bulk_update(improved, ['best_marks', 'reached_at'])
+        _apply_score_changes(test_id, changes)
+
+
+def rebuild_leaderboard(test_id):
+    """
+    Recompute a test's board from its graded attempts, e.g. after a
+    regrade moved scores down. Reads every attempt, so it is kept off
+    the request path.
+    """
+    graded = TestAssignment.objects.filter(
+        test_id=test_id,
+        status__in=TestAssignment.GRADED_STATUSES,
+        obtained_marks__isnull=False
+    )
+    reached_at = (
+        graded.filter(student_id=OuterRef('student_id'))
+        .order_by('-obtained_marks', 'submitted_at')
+        .values('submitted_at')[:1]
+    )
+    best = graded.values('student_id').annotate(
+        best_marks=Max('obtained_marks'),
+        reached_at=Subquery(reached_at)
+    ).order_by()
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(test_id=test_id).delete()
+        LeaderboardScore.objects.filter(test_id=test_id).delete()
+        entries = LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(test_id=test_id, **row) for row in best.iterator(chunk_size=2000)],
+            batch_size=2000
+        )
+        scores = Counter(entry.best_marks for entry in entries)
+        LeaderboardScore.objects.bulk_create(
+            [LeaderboardScore(test_id=test_id, marks=marks, students=students) for marks, students in scores.items()]
+        )
+    return len(entries)
+
+
+def _students_above(test_id):
+    """{marks: students scoring higher} for every score on the board."""
+    above = {}
+    higher = 0
+    for marks, students in (
+        LeaderboardScore.objects.filter(test_id=test_id, students__gt=0)
+        .order_by('-marks').values_list('marks', 'students')
+    ):
+        above[marks] = higher
+        higher += students
+    return above
+
+
+class Leaderboard:
+    """
+    Best score of every student who has completed a test, highest first,
+    as dicts of rank, student_id, obtained_marks and submitted_at.
+
+    Rank is competition style (tied scores share the better rank); among
+    tied students whoever reached the score first is listed first. Works
+    as a paginator's object list: the count comes from the score rows
+    and a slice reads one page of entries off the board index.
+    """
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+
+    def count(self):
+        return LeaderboardScore.objects.filter(test_id=self.test_id).aggregate(
+            students=Sum('students')
+        )['students'] or 0
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        rows = list(
+            LeaderboardEntry.objects.filter(test_id=self.test_id)
+            .order_by('-best_marks', 'reached_at', 'student_id')
+            .values('student_id', obtained_marks=F('best_marks'), submitted_at=F('reached_at'))[index]
+        )
+        if rows:
+            above = _students_above(self.test_id)
+            for row in rows:
+                row['rank'] = above.get(row['obtained_marks'], 0) + 1
+        return rows
+
+
+def leaderboard(test_id):
+    return Leaderboard(test_id)
+
+
+def student_standing(test_id, student_id):
+    """
+    Rank and percentile of a student's best score, or None if they have
+    no graded attempt.
+
+    One indexed lookup for the student's entry and one sum over the
+    test's score rows; percentile is the share of students scoring the
+    same or lower.
+    """
+    best = LeaderboardEntry.objects.filter(
+        test_id=test_id,
+        student_id=student_id
+    ).values_list('best_marks', flat=True).first()
+    if best is None:
+        return None
+    counts = LeaderboardScore.objects.filter(test_id=test_id).aggregate(
+        participants=Sum('students'),
+        higher=Sum('students', filter=Q(marks__gt=best)),
+    )
+    participants = counts['participants']
+    higher = counts['higher'] or 0
+    return {
+        'rank': higher + 1,
+        'percentile': round((participants - higher) / participants * 100, 2),
+        'participants': participants,
+        'best_marks': best,
+    }
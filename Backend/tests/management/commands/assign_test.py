@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from tests.models import Test, TestAssignment
+from tests.models import Test
+from tests.services import bulk_assign_test, assign_test_to_course
 from courses.models import Course
 
 User = get_user_model()
@@ -32,58 +33,36 @@ class Command(BaseCommand):
         from datetime import timedelta
         due_at = timezone.now() + timedelta(hours=due_hours)
 
-        students = []
-        
         if course_id:
             try:
                 course = Course.objects.get(id=course_id)
-                students = list(course.students.all())
-                self.stdout.write(f'Found {len(students)} students in course: {course.title}')
             except Course.DoesNotExist:
                 self.stdout.write(
                     self.style.ERROR(f'Course with ID {course_id} not found')
                 )
                 return
+            self.stdout.write(f'Assigning to students in course: {course.title}')
+            result = assign_test_to_course(test, course, due_at=due_at)
         
         elif student_email:
             try:
                 student = User.objects.get(email=student_email, role='STUDENT')
-                students = [student]
                 self.stdout.write(f'Found student: {student.name}')
             except User.DoesNotExist:
                 self.stdout.write(
                     self.style.ERROR(f'Student with email {student_email} not found')
                 )
                 return
+            result = bulk_assign_test(test, [student.id], due_at=due_at)
         else:
             self.stdout.write(
                 self.style.ERROR('Either --course-id or --student-email is required')
             )
             return
 
-        # Create assignments
-        created_count = 0
-        for student in students:
-            # Check if already assigned
-            existing = TestAssignment.objects.filter(
-                student=student,
-                test=test,
-                status='assigned'
-            ).first()
-            
-            if not existing:
-                TestAssignment.objects.create(
-                    student=student,
-                    test=test,
-                    due_at=due_at
-                )
-                created_count += 1
-                self.stdout.write(f'  Assigned to: {student.name} ({student.email})')
-            else:
-                self.stdout.write(f'  Already assigned: {student.name} ({student.email})')
-
+        self.stdout.write(f'  Already assigned: {result["skipped"]}')
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully assigned test "{test.title}" to {created_count} students'
+                f'Successfully assigned test "{test.title}" to {result["created"]} students'
             )
         )
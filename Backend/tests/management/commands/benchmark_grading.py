@@ -0,0 +1,129 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from courses.models import Course
+from tests.models import Test, Question, AnswerOption, TestAssignment, StudentAnswer
+from tests.serializers import StudentAnswerSubmitSerializer
+from tests.grading import load_answer_key, parse_answers, grade_answers, save_graded_submission
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_grade(assignment, test, answers_data):
+    """The per-answer submission path this engine replaced"""
+    validated_answers = []
+    for answer_item in answers_data:
+        serializer = StudentAnswerSubmitSerializer(data=answer_item)
+        serializer.is_valid(raise_exception=True)
+        validated_answers.append(serializer.validated_data)
+
+    with transaction.atomic():
+        assignment = TestAssignment.objects.select_for_update().get(pk=assignment.pk)
+        total_marks = 0
+        for validated_data in validated_answers:
+            question = validated_data['question']
+            selected_option = validated_data['option']
+            StudentAnswer.objects.update_or_create(
+                assignment=assignment,
+                question=question,
+                defaults={
+                    'selected_option': selected_option,
+                    'is_correct': selected_option.is_correct,
+                    'marks_obtained': question.marks if selected_option.is_correct else 0,
+                    'question_marks': question.marks,
+                    'answered_at': timezone.now(),
+                    'evaluated_at': timezone.now()
+                }
+            )
+            if selected_option.is_correct:
+                total_marks += question.marks
+        assignment.status = 'submitted'
+        assignment.obtained_marks = total_marks
+        assignment.save(update_fields=['status', 'obtained_marks', 'updated_at'])
+    return total_marks
+
+
+def engine_grade(assignment, test, answers_data):
+    graded = grade_answers(load_answer_key(test.id), parse_answers(answers_data))
+    with transaction.atomic():
+        assignment = TestAssignment.objects.select_for_update().get(pk=assignment.pk)
+        save_graded_submission(assignment, graded, test.total_marks)
+    return graded.obtained_marks
+
+
+class Command(BaseCommand):
+    help = 'Compare the batched grading engine with the legacy per-answer path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100, help='Questions in the synthetic test')
+        parser.add_argument('--options', type=int, default=4, help='Options per question')
+        parser.add_argument('--rounds', type=int, default=5, help='Submissions graded per path')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                # Everything created for the benchmark is thrown away
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        course = Course.objects.create(title=f'Benchmark {time.time_ns()}', description='Grading benchmark')
+        test = Test.objects.create(
+            title='Grading benchmark', description='', course=course,
+            duration_minutes=60, is_published=True
+        )
+        questions = Question.objects.bulk_create([
+            Question(test=test, text=f'Question {i}', order=i, marks=1 + i % 3)
+            for i in range(1, options['questions'] + 1)
+        ])
+        AnswerOption.objects.bulk_create([
+            AnswerOption(question=question, text=f'Option {j}', is_correct=(j == 0))
+            for question in questions
+            for j in range(options['options'])
+        ])
+        test.save()
+
+        option_ids = {}
+        for option_id, question_id in AnswerOption.objects.filter(
+            question__test=test
+        ).order_by('id').values_list('id', 'question_id'):
+            option_ids.setdefault(question_id, option_id)
+        answers_data = [
+            {'question_id': question_id, 'selected_option_id': option_id}
+            for question_id, option_id in option_ids.items()
+        ]
+
+        for label, grade in (('legacy', legacy_grade), ('engine', engine_grade)):
+            timings = []
+            queries = 0
+            for round_number in range(options['rounds']):
+                student = User.objects.create(
+                    email=f'bench-{label}-{round_number}-{time.time_ns()}@example.com',
+                    name='Benchmark Student'
+                )
+                assignment = TestAssignment.objects.create(
+                    student=student, test=test, status='started', total_marks=test.total_marks
+                )
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    grade(assignment, test, answers_data)
+                    timings.append(time.perf_counter() - started)
+                queries = len(ctx.captured_queries)
+
+            timings.sort()
+            self.stdout.write(
+                f'{label:>7}: {len(answers_data)} answers, {queries} queries, '
+                f'median {timings[len(timings) // 2] * 1000:.1f} ms, '
+                f'max {timings[-1] * 1000:.1f} ms'
+            )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tests.autosave import AUTOSAVE_FLUSH_BATCH_SIZE, flush_autosaves
+
+
+class Command(BaseCommand):
+    help = 'Persist autosaved answers of tests in progress to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Flush once and exit')
+        parser.add_argument('--interval', type=float, default=15.0, help='Seconds between flushes')
+        parser.add_argument('--batch-size', type=int, default=AUTOSAVE_FLUSH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                result = flush_autosaves(batch_size=options['batch_size'])
+                if result['attempts'] or options['once']:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Flushed {result["answers"]} answers from {result["attempts"]} attempts'
+                        )
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Flusher stopped')
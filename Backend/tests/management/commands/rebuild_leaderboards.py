@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tests.leaderboard import rebuild_leaderboard
+from tests.models import Test
+
+
+class Command(BaseCommand):
+    help = 'Recompute test leaderboards from their graded attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-id', type=int, action='append', help='Test ID to rebuild (repeatable; default all)')
+
+    def handle(self, *args, **options):
+        test_ids = options['test_id'] or Test.objects.order_by('id').values_list('id', flat=True)
+        for test_id in test_ids:
+            students = rebuild_leaderboard(test_id)
+            self.stdout.write(f'  Test {test_id}: {students} students')
+        self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from tests.models import Test
+from tests.grading import regrade_test
+
+
+class Command(BaseCommand):
+    help = 'Re-score all graded attempts of a test against its current answer key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--test-id', type=int, required=True, help='Test ID to regrade')
+
+    def handle(self, *args, **options):
+        test_id = options['test_id']
+
+        try:
+            test = Test.objects.get(id=test_id)
+        except Test.DoesNotExist:
+            self.stdout.write(
+                self.style.ERROR(f'Test with ID {test_id} not found')
+            )
+            return
+
+        summary = regrade_test(test)
+
+        self.stdout.write(f'  Attempts regraded: {summary["attempts_regraded"]}')
+        self.stdout.write(f'  Answers changed:   {summary["answers_changed"]}')
+        self.stdout.write(f'  Attempts changed:  {summary["attempts_changed"]}')
+        self.stdout.write(f'  Marks gained:      {summary["marks_gained"]}')
+        self.stdout.write(f'  Marks lost:        {summary["marks_lost"]}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Regraded test "{test.title}" (total marks {summary["total_marks"]})'
+            )
+        )
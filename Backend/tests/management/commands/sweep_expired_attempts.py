@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tests.models import EXPIRY_GRACE_PERIOD
+from tests.sweeper import SWEEP_BATCH_SIZE, sweep_expired_attempts
+
+
+class Command(BaseCommand):
+    help = 'Auto-submit started test attempts that have run out of time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Sweep once and exit')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between sweeps')
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+        parser.add_argument(
+            '--grace-seconds',
+            type=float,
+            default=EXPIRY_GRACE_PERIOD.total_seconds(),
+            help='How long past the deadline an attempt is left open'
+        )
+
+    def handle(self, *args, **options):
+        grace = timedelta(seconds=options['grace_seconds'])
+
+        try:
+            while True:
+                result = sweep_expired_attempts(batch_size=options['batch_size'], grace=grace)
+                if result['attempts'] or options['once']:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Submitted {result["attempts"]} expired attempts in {result["batches"]} batches'
+                        )
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Sweeper stopped')
@@ -0,0 +1,123 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0006_test_duration_minutes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="question",
+            options={
+                "ordering": ["order"],
+                "verbose_name": "Question",
+                "verbose_name_plural": "Questions",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="test",
+            options={
+                "ordering": ["-created_at"],
+                "verbose_name": "Test",
+                "verbose_name_plural": "Tests",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="testassignment",
+            options={
+                "ordering": ["-assigned_at"],
+                "verbose_name": "Test Assignment",
+                "verbose_name_plural": "Test Assignments",
+            },
+        ),
+        migrations.AddField(
+            model_name="studentanswer",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="testassignment",
+            name="percentage",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="answeroption",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name="answeroption",
+            name="text",
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="order",
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="studentanswer",
+            name="assignment",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="student_answers",
+                to="tests.testassignment",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="studentanswer",
+            name="question",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="tests.question"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="studentanswer",
+            name="selected_option",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="tests.answeroption"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="test",
+            name="description",
+            field=models.TextField(),
+        ),
+        migrations.AlterField(
+            model_name="testassignment",
+            name="student",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="test_assignments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="testassignment",
+            name="test",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="assignments",
+                to="tests.test",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="question",
+            unique_together={("test", "order")},
+        ),
+    ]
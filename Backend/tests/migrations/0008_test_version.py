@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0007_sync_model_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="test",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, help_text="Bumped whenever the test paper changes"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:42
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_expires_at(apps, schema_editor):
+    TestAssignment = apps.get_model("tests", "TestAssignment")
+    started = TestAssignment.objects.filter(status="started").select_related("test")
+    batch = []
+    for assignment in started.iterator(chunk_size=1000):
+        deadlines = [assignment.due_at] if assignment.due_at else []
+        if assignment.test.duration_minutes and assignment.started_at:
+            deadlines.append(
+                assignment.started_at
+                + timedelta(minutes=assignment.test.duration_minutes)
+            )
+        if deadlines:
+            assignment.expires_at = min(deadlines)
+            batch.append(assignment)
+        if len(batch) >= 1000:
+            TestAssignment.objects.bulk_update(batch, ["expires_at"])
+            batch = []
+    if batch:
+        TestAssignment.objects.bulk_update(batch, ["expires_at"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0008_test_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testassignment",
+            name="expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When a started attempt runs out of time (time limit or due date)",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="testassignment",
+            index=models.Index(
+                condition=models.Q(("status", "started")),
+                fields=["expires_at"],
+                name="tests_testa_started_expiry_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
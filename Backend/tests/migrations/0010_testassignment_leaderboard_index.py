@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0009_testassignment_expires_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="testassignment",
+            index=models.Index(
+                condition=models.Q(("status__in", ("submitted", "evaluated"))),
+                fields=["test", "-obtained_marks", "student"],
+                name="tests_testa_leaderboard_idx",
+            ),
+        ),
+    ]
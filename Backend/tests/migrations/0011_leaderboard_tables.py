@@ -0,0 +1,129 @@
+# Generated by Django 6.0.1 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def build_leaderboards(apps, schema_editor):
+    TestAssignment = apps.get_model("tests", "TestAssignment")
+    LeaderboardEntry = apps.get_model("tests", "LeaderboardEntry")
+    LeaderboardScore = apps.get_model("tests", "LeaderboardScore")
+    graded = TestAssignment.objects.filter(
+        status__in=("submitted", "evaluated"), obtained_marks__isnull=False
+    )
+    reached_at = (
+        graded.filter(test_id=OuterRef("test_id"), student_id=OuterRef("student_id"))
+        .order_by("-obtained_marks", "submitted_at")
+        .values("submitted_at")[:1]
+    )
+    best = (
+        graded.values("test_id", "student_id")
+        .annotate(best_marks=Max("obtained_marks"), reached_at=Subquery(reached_at))
+        .order_by()
+    )
+    LeaderboardEntry.objects.bulk_create(
+        (LeaderboardEntry(**row) for row in best.iterator(chunk_size=2000)),
+        batch_size=2000,
+    )
+    scores = (
+        LeaderboardEntry.objects.values("test_id", "best_marks")
+        .annotate(students=Count("id"))
+        .order_by()
+    )
+    LeaderboardScore.objects.bulk_create(
+        LeaderboardScore(
+            test_id=row["test_id"], marks=row["best_marks"], students=row["students"]
+        )
+        for row in scores
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0010_testassignment_leaderboard_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("best_marks", models.PositiveIntegerField()),
+                ("reached_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LeaderboardScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("marks", models.PositiveIntegerField()),
+                ("students", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="testassignment",
+            name="tests_testa_leaderboard_idx",
+        ),
+        migrations.AddField(
+            model_name="leaderboardentry",
+            name="student",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="leaderboard_entries",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="leaderboardentry",
+            name="test",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="leaderboard_entries",
+                to="tests.test",
+            ),
+        ),
+        migrations.AddField(
+            model_name="leaderboardscore",
+            name="test",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="leaderboard_scores",
+                to="tests.test",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leaderboardentry",
+            index=models.Index(
+                fields=["test", "-best_marks", "reached_at", "student"],
+                name="tests_leade_board_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="leaderboardentry",
+            unique_together={("test", "student")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="leaderboardscore",
+            unique_together={("test", "marks")},
+        ),
+        migrations.RunPython(build_leaderboards, migrations.RunPython.noop),
+    ]
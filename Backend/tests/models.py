@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -6,9 +8,12 @@ from django.conf import settings
 
 User = settings.AUTH_USER_MODEL
 
+# Slack allowed after a deadline before an attempt counts as timed out
+EXPIRY_GRACE_PERIOD = timedelta(seconds=30)
+
 
 class Test(models.Model):
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=255)
     description = models.TextField()
     course = models.ForeignKey(
         Course,
@@ -22,15 +27,29 @@ class Test(models.Model):
         blank=True,
         related_name='tests'
     )
-    duration_minutes = models.PositiveIntegerField()
+    duration_minutes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Duration in minutes for timed tests'
+    )
     total_marks = models.PositiveIntegerField(default=0)
-    is_published = models.BooleanField(default=False)
-    is_active = models.BooleanField(default=True)
+    is_published = models.BooleanField(default=False, db_index=True)
+    is_active = models.BooleanField(default=True, db_index=True)
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text='Bumped whenever the test paper changes'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        verbose_name = 'Test'
+        verbose_name_plural = 'Tests'
+        indexes = [
+            models.Index(fields=['course', 'is_active'], name='tests_test_course__7c00aa_idx'),
+            models.Index(fields=['is_published'], name='tests_test_is_publ_9388ca_idx'),
+        ]
     
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -42,7 +61,15 @@ class Test(models.Model):
     def save(self, *args, **kwargs):
         if self.pk:
             self.total_marks = self.calculate_total_marks()
+            self.version = models.F('version') + 1
         super().save(*args, **kwargs)
+        if hasattr(self.version, 'resolve_expression'):
+            self.refresh_from_db(fields=['version'])
+    
+    @classmethod
+    def bump_version(cls, test_id):
+        """Invalidate the compiled paper after a question or option change"""
+        cls.objects.filter(pk=test_id).update(version=models.F('version') + 1)
 
 
 class Question(models.Model):
@@ -59,6 +86,8 @@ class Question(models.Model):
     class Meta:
         ordering = ['order']
         unique_together = ['test', 'order']
+        verbose_name = 'Question'
+        verbose_name_plural = 'Questions'
     
     def __str__(self):
         return f"Q{self.order}: {self.text[:50]}"
@@ -75,6 +104,8 @@ class AnswerOption(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        verbose_name = 'Answer Option'
+        verbose_name_plural = 'Answer Options'
         constraints = [
             models.UniqueConstraint(
                 fields=["question"],
@@ -107,6 +138,7 @@ class TestAssignment(models.Model):
         ('evaluated', 'Evaluated'),
         ('cancelled', 'Cancelled'),
     ]
+    GRADED_STATUSES = ('submitted', 'evaluated')
     
     student = models.ForeignKey(
         User,
@@ -118,25 +150,48 @@ class TestAssignment(models.Model):
         on_delete=models.CASCADE,
         related_name='assignments'
     )
-    attempt_number = models.PositiveIntegerField(default=1)
+    attempt_number = models.PositiveSmallIntegerField(default=1)
+    test_version = models.PositiveIntegerField(default=1)
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
         default='assigned'
     )
-    assigned_at = models.DateTimeField(auto_now_add=True)
+    assigned_at = models.DateTimeField(default=timezone.now)
     started_at = models.DateTimeField(null=True, blank=True)
     submitted_at = models.DateTimeField(null=True, blank=True)
     evaluated_at = models.DateTimeField(null=True, blank=True)
+    due_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When a started attempt runs out of time (time limit or due date)'
+    )
     
     # Marks
     obtained_marks = models.PositiveIntegerField(null=True, blank=True)
     total_marks = models.PositiveIntegerField(null=True, blank=True)
     percentage = models.FloatField(null=True, blank=True)
     
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
     class Meta:
         ordering = ['-assigned_at']
         unique_together = ['student', 'test', 'attempt_number']
+        verbose_name = 'Test Assignment'
+        verbose_name_plural = 'Test Assignments'
+        indexes = [
+            models.Index(fields=['student', 'status'], name='tests_testa_student_a6e2a8_idx'),
+            models.Index(fields=['test', 'status'], name='tests_testa_test_id_dfa58d_idx'),
+            models.Index(fields=['assigned_at'], name='tests_testa_assigne_1bfde5_idx'),
+            # Lets the sweeper find timed-out attempts without scanning
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='started'),
+                name='tests_testa_started_expiry_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.name} - {self.test.title} (Attempt {self.attempt_number})"
@@ -146,6 +201,19 @@ class TestAssignment(models.Model):
         if self.obtained_marks is not None and self.total_marks and self.total_marks > 0:
             return round((self.obtained_marks / self.total_marks) * 100, 2)
         return None
+    
+    def calculate_expires_at(self, duration_minutes):
+        """Earliest of the time limit counted from started_at and the due date"""
+        deadlines = [self.due_at] if self.due_at else []
+        if duration_minutes and self.started_at:
+            deadlines.append(self.started_at + timedelta(minutes=duration_minutes))
+        return min(deadlines) if deadlines else None
+    
+    def is_expired(self, now=None, grace=EXPIRY_GRACE_PERIOD):
+        """Past the due date or time limit, allowing for network latency"""
+        now = now or timezone.now()
+        deadline = self.expires_at or self.due_at
+        return deadline is not None and now > deadline + grace
 
 
 class StudentAnswer(models.Model):
@@ -164,10 +232,73 @@ class StudentAnswer(models.Model):
     )
     is_correct = models.BooleanField(default=False)
     marks_obtained = models.PositiveIntegerField(default=0)
+    question_marks = models.PositiveIntegerField(default=1)
+    answered_at = models.DateTimeField(default=timezone.now)
+    evaluated_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['assignment', 'question']
+        verbose_name = 'Student Answer'
+        verbose_name_plural = 'Student Answers'
+        indexes = [
+            models.Index(fields=['assignment'], name='tests_stude_assignm_8e72aa_idx'),
+            models.Index(fields=['question'], name='tests_stude_questio_574cab_idx'),
+        ]
     
     def __str__(self):
         return f"{self.assignment.student.name} - Q{self.question.order} - {'Correct' if self.is_correct else 'Wrong'}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    A student's best graded score on a test, kept up to date as attempts
+    are graded (see tests.leaderboard).
+    """
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries'
+    )
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries'
+    )
+    best_marks = models.PositiveIntegerField()
+    # When the student first reached best_marks; breaks ties on the board
+    reached_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['test', 'student']
+        indexes = [
+            # Board pages, best first
+            models.Index(
+                fields=['test', '-best_marks', 'reached_at', 'student'],
+                name='tests_leade_board_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.test_id}: {self.best_marks}"
+
+
+class LeaderboardScore(models.Model):
+    """
+    How many students have a given best score on a test. A test has at
+    most total_marks + 1 of these, so ranks and percentiles are sums over
+    a handful of rows however many students took it.
+    """
+    test = models.ForeignKey(
+        Test,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_scores'
+    )
+    marks = models.PositiveIntegerField()
+    students = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['test', 'marks']
+    
+    def __str__(self):
+        return f"{self.test_id}: {self.students} at {self.marks}"
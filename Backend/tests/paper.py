@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from core import metrics
+
+from .models import Test, Question, AnswerOption
+from .serializers import TestDetailSerializer, QuestionSerializer
+
+PAPER_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def paper_cache_key(test_id, version):
+    return f'test-paper:{test_id}:v{version}'
+
+
+def compile_test_paper(test_id):
+    """
+    Render the test and its questions to JSON once.
+
+    Returns the body of a JSON object without the surrounding braces
+    ('"test": {...}, "questions": [...]') so callers can splice in
+    per-student fields without re-serialising the paper.
+    """
+    questions = Question.objects.prefetch_related(
+        Prefetch('options', queryset=AnswerOption.objects.order_by('id'))
+    ).order_by('order')
+    test = Test.objects.select_related('course').prefetch_related(
+        Prefetch('questions', queryset=questions)
+    ).get(id=test_id)
+
+    rendered = JSONRenderer().render({
+        'test': TestDetailSerializer(test).data,
+        'questions': QuestionSerializer(test.questions.all(), many=True).data,
+    })
+    return rendered[1:-1]
+
+
+def get_test_paper(test_id, version):
+    """
+    Compiled paper for a test version, served from the cache.
+
+    The version is part of the key, so editing a question or option
+    (which bumps Test.version) makes the next request compile afresh.
+    """
+    key = paper_cache_key(test_id, version)
+    paper = cache.get(key)
+    metrics.record_cache_lookup('test_paper', paper is not None)
+    if paper is None:
+        paper = compile_test_paper(test_id)
+        cache.set(key, paper, PAPER_CACHE_TIMEOUT)
+    return paper
+
+
+def render_paper_response(paper, **fields):
+    """Prefix the compiled paper with per-assignment fields."""
+    head = JSONRenderer().render(fields)
+    return head[:-1] + b',' + paper + b'}'
@@ -21,6 +21,8 @@ class TestSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
     
     def get_questions_count(self, obj):
+        if hasattr(obj, 'questions_total'):
+            return obj.questions_total
         return obj.questions.count()
 
 
@@ -217,7 +219,8 @@ class StudentAnswerReviewSerializer(serializers.ModelSerializer):
         )
 
     def get_correct_option_text(self, obj):
-        correct = obj.question.options.filter(is_correct=True).first()
+        # Reads the prefetched options instead of querying per answer
+        correct = next((option for option in obj.question.options.all() if option.is_correct), None)
         return correct.text if correct else None
         
         
\ No newline at end of file
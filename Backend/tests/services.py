@@ -0,0 +1,132 @@
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Test, TestAssignment
+
+User = get_user_model()
+
+ASSIGNMENT_CHUNK_SIZE = 1000
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_due_at(due_at):
+    """
+    A due date given as a datetime or an ISO 8601 string, as an aware
+    datetime (naive values are taken in the current time zone), or None.
+
+    Raises ValidationError keyed by 'due_at' when it cannot be parsed.
+    """
+    if due_at in (None, ''):
+        return None
+    try:
+        value = TestAssignment._meta.get_field('due_at').to_python(due_at)
+    except ValidationError:
+        value = None
+    if value is None:
+        raise ValidationError({'due_at': 'due_at must be a valid date and time'})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _student_pks(student_ids):
+    to_pk = User._meta.pk.to_python
+    try:
+        return list(dict.fromkeys(to_pk(student_id) for student_id in student_ids))
+    except (TypeError, ValidationError):
+        raise ValidationError({'student_ids': 'student_ids must be valid student IDs'})
+
+
+def bulk_assign_test(test, student_ids, due_at=None, chunk_size=ASSIGNMENT_CHUNK_SIZE):
+    """
+    Assign a test to many students.
+
+    The due date and every student ID are validated before anything is
+    written, so bad input raises ValidationError (keyed by the offending
+    argument) without assigning anyone. Each chunk of student IDs is then
+    diffed against the existing assignments in one query and the missing
+    rows are inserted with a single bulk_create. Chunks commit separately
+    so no lock is held for the whole run; a run cut short by a database
+    error can simply be repeated, as existing assignments are skipped.
+    Students who already have an attempt for this test, or who do not
+    exist, are counted as skipped.
+
+    Returns a dict with 'created' and 'skipped' counts.
+    """
+    due_at = parse_due_at(due_at)
+    student_ids = _student_pks(student_ids)
+    created = 0
+    skipped = 0
+
+    for chunk in _chunked(student_ids, chunk_size):
+
+        with transaction.atomic():
+            missing = list(
+                User.objects.filter(pk__in=chunk)
+                .exclude(test_assignments__test=test)
+                .values_list('pk', flat=True)
+            )
+            TestAssignment.objects.bulk_create(
+                [
+                    TestAssignment(
+                        student_id=student_id,
+                        test=test,
+                        attempt_number=1,
+                        test_version=1,
+                        total_marks=test.total_marks,
+                        due_at=due_at
+                    )
+                    for student_id in missing
+                ],
+                ignore_conflicts=True
+            )
+
+        created += len(missing)
+        skipped += len(chunk) - len(missing)
+
+    return {'created': created, 'skipped': skipped}
+
+
+def assign_test_to_course(test, course, due_at=None, chunk_size=ASSIGNMENT_CHUNK_SIZE):
+    """Assign a test to every student enrolled in a course."""
+    student_ids = course.students.values_list('id', flat=True).iterator(chunk_size=chunk_size)
+    return bulk_assign_test(test, student_ids, due_at=due_at, chunk_size=chunk_size)
+
+
+def assign_published_tests(course_ids, student_ids):
+    """
+    Assign every published, active test of the given courses to the
+    given students. Used when students are enrolled, so only the newly
+    added memberships are considered.
+    """
+    student_ids = list(
+        User.objects.filter(pk__in=student_ids, role='STUDENT').values_list('pk', flat=True)
+    )
+    created = 0
+    skipped = 0
+    if not student_ids:
+        return {'created': created, 'skipped': skipped}
+
+    tests = Test.objects.filter(
+        course_id__in=course_ids,
+        is_published=True,
+        is_active=True
+    )
+    for test in tests:
+        result = bulk_assign_test(test, student_ids)
+        created += result['created']
+        skipped += result['skipped']
+
+    return {'created': created, 'skipped': skipped}
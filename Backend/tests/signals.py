@@ -1,75 +1,58 @@
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
 from courses.models import Course
-from tests.models import Test, TestAssignment
+from jobs.tasks import enqueue_on_commit
+from tests.models import Test, Question, AnswerOption
+from tests.services import assign_published_tests
 
-User = get_user_model()
+# Enrollments larger than this are handed to the background job queue
+INLINE_ENROLLMENT_LIMIT = 50
 
-@receiver(post_save, sender=User)
-def assign_published_tests_to_new_student(sender, instance, created, **kwargs):
+
+@receiver(m2m_changed, sender=Course.students.through)
+def assign_published_tests_on_enrollment(sender, instance, action, reverse, pk_set, **kwargs):
     """
-    When a new student enrolls in a course, automatically assign them published tests for that course
+    When students are added to a course, assign them its published tests.
+
+    Only the memberships that were actually added are processed, so
+    editing or archiving a course costs nothing.
     """
-    if not created or instance.role != 'STUDENT':
+    if action != 'post_add' or not pk_set:
+        return
+
+    if reverse:
+        # user.enrolled_courses.add(course, ...)
+        course_ids, student_ids = pk_set, [instance.pk]
+    else:
+        # course.students.add(student, ...)
+        course_ids, student_ids = [instance.pk], pk_set
+
+    if len(pk_set) > INLINE_ENROLLMENT_LIMIT:
+        enqueue_on_commit('tests.assign_published_tests', {
+            'course_ids': list(course_ids),
+            'student_ids': [str(pk) for pk in student_ids],
+        })
         return
-    
-    # Get all courses the student is enrolled in
-    enrolled_courses = instance.enrolled_courses.all()
-    
-    for course in enrolled_courses:
-        # Get all published tests for this course
-        published_tests = Test.objects.filter(
-            course=course,
-            is_published=True,
-            is_active=True
-        )
-        
-        # Create test assignments
-        for test in published_tests:
-            # Check if assignment already exists
-            existing = TestAssignment.objects.filter(
-                student=instance,
-                test=test,
-                status='assigned'
-            ).first()
-            
-            if not existing:
-                TestAssignment.objects.create(
-                    student=instance,
-                    test=test,
-                    status='assigned'
-                )
+
+    assign_published_tests(course_ids, student_ids)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_paper_on_question_change(sender, instance, **kwargs):
+    """Compiled test papers are keyed by Test.version"""
+    Test.bump_version(instance.test_id)
+
+
+@receiver(post_save, sender=AnswerOption)
+@receiver(post_delete, sender=AnswerOption)
+def invalidate_paper_on_option_change(sender, instance, **kwargs):
+    Test.objects.filter(questions=instance.question_id).update(version=F('version') + 1)
 
 
 @receiver(post_save, sender=Course)
-def handle_course_student_change(sender, instance, **kwargs):
-    """
-    When students are added to a course, assign them published tests
-    """
-    # This is a simplified approach - in production, you'd want to track the actual changes
-    # For now, we'll check all enrolled students and ensure they have assignments for published tests
-    published_tests = Test.objects.filter(
-        course=instance,
-        is_published=True,
-        is_active=True
-    )
-    
-    if published_tests.exists():
-        students = instance.students.all()
-        
-        for student in students:
-            if student.role == 'STUDENT':
-                for test in published_tests:
-                    existing = TestAssignment.objects.filter(
-                        student=student,
-                        test=test,
-                        status='assigned'
-                    ).first()
-                    
-                    if not existing:
-                        TestAssignment.objects.create(
-                            student=student,
-                            test=test,
-                            status='assigned'
-                        )
+def invalidate_paper_on_course_change(sender, instance, created, **kwargs):
+    """Papers embed the course title"""
+    if not created:
+        Test.objects.filter(course=instance).update(version=F('version') + 1)
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core import metrics
+
+from .autosave import close_sessions, saved_answers_many, valid_answers
+from .grading import bump_results_version, get_answer_key, grade_answers, upsert_answers
+from .leaderboard import record_scores
+from .models import EXPIRY_GRACE_PERIOD, Test, TestAssignment
+
+SWEEP_BATCH_SIZE = 200
+
+
+def _sweep_batch(cutoff, batch_size, now):
+    """
+    Auto-submit one batch of timed-out attempts in its own transaction.
+
+    Rows are claimed with SKIP LOCKED, so attempts a student is
+    submitting at this moment are left to the submit view, and locks are
+    only held for the duration of the batch. Returns the swept attempts.
+    """
+    with transaction.atomic():
+        attempts = list(
+            TestAssignment.objects.select_for_update(skip_locked=True)
+            .filter(status='started', expires_at__lte=cutoff)
+            .order_by('expires_at')
+            .only('id', 'student_id', 'test_id', 'test_version', 'expires_at')[:batch_size]
+        )
+        if not attempts:
+            return []
+
+        total_marks = dict(
+            Test.objects.filter(id__in={attempt.test_id for attempt in attempts})
+            .values_list('id', 'total_marks')
+        )
+        answer_keys = {
+            attempt.id: get_answer_key(attempt.test_id, attempt.test_version)
+            for attempt in attempts
+        }
+        # Buffered autosaves that the flusher has not persisted yet included
+        answers = saved_answers_many(answer_keys)
+
+        graded_rows = []
+        for attempt in attempts:
+            answer_key = answer_keys[attempt.id]
+            graded = grade_answers(answer_key, valid_answers(answer_key, answers[attempt.id]))
+            graded_rows.append((attempt.id, graded))
+
+            attempt.status = 'submitted'
+            attempt.submitted_at = attempt.expires_at
+            attempt.evaluated_at = now
+            attempt.obtained_marks = graded.obtained_marks
+            attempt.total_marks = total_marks.get(attempt.test_id, 0)
+            attempt.percentage = attempt.calculate_percentage()
+            attempt.updated_at = now
+
+        upsert_answers(graded_rows, now, evaluated_at=now)
+        TestAssignment.objects.bulk_update(attempts, [
+            'status', 'submitted_at', 'evaluated_at', 'obtained_marks',
+            'total_marks', 'percentage', 'updated_at'
+        ])
+        record_scores(attempts)
+
+    close_sessions([(attempt, answer_keys[attempt.id]) for attempt in attempts])
+    metrics.TEST_SUBMISSIONS.labels(source='timeout').inc(len(attempts))
+    metrics.TESTS_GRADED.labels(source='timeout').inc(len(attempts))
+    for test_id in {attempt.test_id for attempt in attempts}:
+        bump_results_version(test_id)
+    return attempts
+
+
+def sweep_expired_attempts(batch_size=SWEEP_BATCH_SIZE, grace=EXPIRY_GRACE_PERIOD, now=None):
+    """
+    Submit every started attempt whose time limit or due date has passed,
+    grading whatever answers were saved.
+
+    Candidates come from the partial index on expires_at for started
+    attempts. Each batch costs a fixed number of queries: claim, test
+    marks, saved answers (plus one cache round trip for the buffered
+    ones), one answer upsert, one bulk update and the leaderboard
+    update of each test in the batch.
+
+    Returns a dict with 'attempts' and 'batches' counts.
+    """
+    now = now or timezone.now()
+    cutoff = now - grace
+    swept = 0
+    batches = 0
+
+    while True:
+        attempts = _sweep_batch(cutoff, batch_size, now)
+        if not attempts:
+            break
+        swept += len(attempts)
+        batches += 1
+        if len(attempts) < batch_size:
+            break
+
+    return {'attempts': swept, 'batches': batches}
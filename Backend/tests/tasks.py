@@ -0,0 +1,18 @@
+from jobs.tasks import register
+from courses.models import Course
+from .models import Test
+from .services import assign_test_to_course, assign_published_tests
+
+
+@register('tests.assign_to_course')
+def assign_to_course_task(test_id, course_id, due_at=None):
+    test = Test.objects.get(id=test_id)
+    course = Course.objects.get(id=course_id)
+    result = assign_test_to_course(test, course, due_at=due_at)
+    result['course'] = course.title
+    return result
+
+
+@register('tests.assign_published_tests')
+def assign_published_tests_task(course_ids, student_ids):
+    return assign_published_tests(course_ids, student_ids)
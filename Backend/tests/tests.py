@@ -1,3 +1,509 @@
+import csv
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from jobs.models import Job
+from .analytics import compute_item_analysis, get_item_analysis
+from .autosave import flush_autosaves
+from .gradebook import gradebook_rows, gradebook_tests
+from .grading import regrade_test
+from .leaderboard import leaderboard, rebuild_leaderboard, record_scores, student_standing
+from .models import AnswerOption, LeaderboardEntry, LeaderboardScore, Question, StudentAnswer, Test, TestAssignment
+from .services import bulk_assign_test
+from .sweeper import sweep_expired_attempts
+
+User = get_user_model()
+
+
+def make_user(email, role='STUDENT', **extra_fields):
+    return User.objects.create_user(
+        email=email, name=email.split('@')[0], password='password', role=role, **extra_fields
+    )
+
+
+class TestFixturesMixin:
+    """A course with a published two-question test, an admin and a student."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin@example.com', role='ADMIN')
+        cls.student = make_user('student@example.com', is_profile_completed=True)
+        cls.course = Course.objects.create(title='Physics', description='Mechanics')
+        cls.course.students.add(cls.student)
+        cls.test = Test.objects.create(
+            title='Quiz', description='Week 1', course=cls.course, is_published=True
+        )
+        cls.questions = []
+        cls.correct = {}
+        cls.wrong = {}
+        for order in (1, 2):
+            question = Question.objects.create(test=cls.test, text=f'Q{order}', marks=2, order=order)
+            cls.correct[question.pk] = AnswerOption.objects.create(
+                question=question, text='right', is_correct=True
+            )
+            cls.wrong[question.pk] = AnswerOption.objects.create(question=question, text='wrong')
+            cls.questions.append(question)
+        cls.test.save()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class BulkAssignTestTests(TestFixturesMixin, TestCase):
+    def test_assigns_each_student_once(self):
+        other = make_user('other@example.com')
+        result = bulk_assign_test(self.test, [self.student.pk, str(other.pk), self.student.pk])
+        self.assertEqual(result, {'created': 2, 'skipped': 0})
+
+        result = bulk_assign_test(self.test, [self.student.pk, other.pk])
+        self.assertEqual(result, {'created': 0, 'skipped': 2})
+
+    def test_parses_due_at(self):
+        bulk_assign_test(self.test, [self.student.pk], due_at='2030-01-02T03:04:05Z')
+        assignment = TestAssignment.objects.get(student=self.student)
+        self.assertEqual(assignment.due_at, datetime(2030, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc))
+
+    def test_invalid_due_at_writes_nothing(self):
+        with self.assertRaises(ValidationError) as raised:
+            bulk_assign_test(self.test, [self.student.pk], due_at='next tuesday')
+        self.assertEqual(list(raised.exception.message_dict), ['due_at'])
+        self.assertFalse(TestAssignment.objects.exists())
+
+    def test_invalid_student_id_in_a_later_chunk_writes_nothing(self):
+        other = make_user('other@example.com')
+        with self.assertRaises(ValidationError) as raised:
+            bulk_assign_test(self.test, [self.student.pk, other.pk, 'not-a-uuid'], chunk_size=1)
+        self.assertEqual(list(raised.exception.message_dict), ['student_ids'])
+        self.assertFalse(TestAssignment.objects.exists())
+
+    def test_view_reports_the_invalid_field(self):
+        response = self.client_for(self.admin).post(
+            reverse('admin-test-assign-to-students', args=[self.test.pk]),
+            {'student_ids': [str(self.student.pk)], 'due_at': 'soon'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('due_at', response.data)
+        self.assertNotIn('student_ids', response.data)
+
+
+class AssignToCourseTests(TestFixturesMixin, TestCase):
+    def test_invalid_due_at_is_rejected_before_enqueueing(self):
+        response = self.client_for(self.admin).post(
+            reverse('admin-test-assign-to-course', args=[self.test.pk]),
+            {'course_id': self.course.pk, 'due_at': '31/12/2030'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('due_at', response.data)
+        self.assertFalse(Job.objects.exists())
+
+    def test_due_at_is_enqueued_as_iso_8601(self):
+        response = self.client_for(self.admin).post(
+            reverse('admin-test-assign-to-course', args=[self.test.pk]),
+            {'course_id': self.course.pk, 'due_at': '2030-12-31 18:00'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().payload['due_at'], '2030-12-31T18:00:00+00:00')
+
+
+def grade_attempt(student, test, choices, status='evaluated'):
+    """A graded attempt with the given {question: option} answers."""
+    assignment = TestAssignment.objects.create(
+        student=student, test=test, status=status, total_marks=test.total_marks,
+        submitted_at=timezone.now()
+    )
+    obtained = 0
+    for question, option in choices.items():
+        StudentAnswer.objects.create(
+            assignment=assignment,
+            question=question,
+            selected_option=option,
+            is_correct=option.is_correct,
+            marks_obtained=question.marks if option.is_correct else 0,
+            question_marks=question.marks,
+        )
+        obtained += question.marks if option.is_correct else 0
+    assignment.obtained_marks = obtained
+    assignment.percentage = assignment.calculate_percentage()
+    assignment.save()
+    if status in TestAssignment.GRADED_STATUSES:
+        record_scores([assignment])
+    return assignment
+
+
+class ItemAnalysisTests(TestFixturesMixin, TestCase):
+    def test_statistics_over_graded_attempts_only(self):
+        first, second = self.questions
+        grade_attempt(self.student, self.test, {first: self.correct[first.pk], second: self.wrong[second.pk]})
+        other = make_user('other@example.com')
+        grade_attempt(other, self.test, {first: self.wrong[first.pk]})
+        # Answers of an attempt still in progress are not counted
+        grade_attempt(make_user('third@example.com'), self.test, {first: self.correct[first.pk]}, status='started')
+
+        with CaptureQueriesContext(connection) as queries:
+            analysis = compute_item_analysis(self.test.pk)
+
+        self.assertEqual(analysis['attempts'], 2)
+        items = {item['question_id']: item for item in analysis['questions']}
+        self.assertEqual(items[first.pk]['p_value'], 0.5)
+        self.assertEqual(items[first.pk]['answered'], 2)
+        self.assertEqual(items[second.pk]['omitted'], 1)
+        answers_sql = next(query['sql'] for query in queries if 'tests_studentanswer' in query['sql'])
+        self.assertIn('JOIN', answers_sql)
+
+
+class GradebookTests(TestFixturesMixin, TestCase):
+    def export(self, course):
+        response = self.client_for(self.admin).get(reverse('course-gradebook', args=[course.pk]))
+        self.assertEqual(response.status_code, 200)
+        return list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+
+    def test_students_are_listed_in_a_course_without_tests(self):
+        course = Course.objects.create(title='Chemistry', description='Bonds')
+        course.students.add(self.student)
+        self.assertEqual(
+            list(gradebook_rows(course, gradebook_tests(course))),
+            [['student', self.student.email, 0, 0, 0, 0]]
+        )
+        self.assertEqual(self.export(course)[1], ['student', self.student.email, '0', '0', '0', '0'])
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        self.student.name = '=HYPERLINK("http://example.com")'
+        self.student.save()
+        grade_attempt(self.student, self.test, {self.questions[0]: self.correct[self.questions[0].pk]})
+        row = self.export(self.course)[1]
+        self.assertEqual(row[0], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(row[2], '2')
+
+
+class RegradeTests(TestFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first, self.second = self.questions
+        self.attempt = grade_attempt(self.student, self.test, {
+            self.first: self.correct[self.first.pk],
+            self.second: self.wrong[self.second.pk],
+        })
+
+    def fix_answer_key(self):
+        """The second question's 'wrong' option turns out to be the right one."""
+        AnswerOption.objects.filter(pk=self.correct[self.second.pk].pk).update(is_correct=False)
+        AnswerOption.objects.filter(pk=self.wrong[self.second.pk].pk).update(is_correct=True)
+        self.test.refresh_from_db()
+
+    def test_graded_attempts_are_rescored_against_the_new_key(self):
+        other = make_user('other@example.com')
+        in_progress = grade_attempt(other, self.test, {self.second: self.wrong[self.second.pk]}, status='started')
+        self.fix_answer_key()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = regrade_test(self.test)
+
+        self.assertEqual(
+            {key: summary[key] for key in ('attempts_regraded', 'answers_changed', 'marks_gained', 'marks_lost')},
+            {'attempts_regraded': 1, 'answers_changed': 1, 'marks_gained': 2, 'marks_lost': 0}
+        )
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.obtained_marks, self.attempt.percentage), (4, 100.0))
+        # Attempts still in progress are graded on submission
+        self.assertFalse(in_progress.student_answers.get().is_correct)
+
+    def test_results_and_statistics_follow_the_regrade(self):
+        before = get_item_analysis(self.test.pk, self.test.version)
+        self.fix_answer_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            regrade_test(self.test)
+
+        after = get_item_analysis(self.test.pk, self.test.version)
+        p_values = [
+            {item['question_id']: item['p_value'] for item in analysis['questions']}[self.second.pk]
+            for analysis in (before, after)
+        ]
+        self.assertEqual(p_values, [0.0, 1.0])
+        response = self.client_for(self.student).get(reverse('test-result', args=[self.test.pk]))
+        self.assertEqual(response.data['results']['obtained_marks'], 4)
+        self.assertEqual(response.data['standing']['best_marks'], 4)
+
+
+class LeaderboardTests(TestFixturesMixin, TestCase):
+    def setUp(self):
+        first, second = self.questions
+        self.everything = {first: self.correct[first.pk], second: self.correct[second.pk]}
+        self.half = {first: self.correct[first.pk], second: self.wrong[second.pk]}
+
+    def test_ranks_best_attempts_with_ties_sharing_a_rank(self):
+        top = make_user('top@example.com')
+        tied = make_user('tied@example.com')
+        grade_attempt(self.student, self.test, self.half)
+        grade_attempt(tied, self.test, self.half)
+        grade_attempt(top, self.test, self.half)
+        # A retake only counts with its best score
+        TestAssignment.objects.filter(student=top).update(attempt_number=2)
+        grade_attempt(top, self.test, self.everything)
+
+        rows = leaderboard(self.test.pk)[:10]
+        self.assertEqual(
+            [(row['rank'], row['student_id'], row['obtained_marks']) for row in rows],
+            [(1, top.pk, 4), (2, self.student.pk, 2), (2, tied.pk, 2)]
+        )
+        self.assertEqual(
+            student_standing(self.test.pk, self.student.pk),
+            {'rank': 2, 'percentile': 66.67, 'participants': 3, 'best_marks': 2}
+        )
+        self.assertIsNone(student_standing(self.test.pk, make_user('absent@example.com').pk))
+
+    def test_every_graded_attempt_is_reflected_immediately(self):
+        grade_attempt(self.student, self.test, self.half)
+        self.assertEqual(student_standing(self.test.pk, self.student.pk)['rank'], 1)
+        for index in range(3):
+            grade_attempt(make_user(f'rival{index}@example.com'), self.test, self.everything)
+        self.assertEqual(student_standing(self.test.pk, self.student.pk)['rank'], 4)
+
+    def test_standing_is_read_from_the_board_not_the_attempts(self):
+        for index in range(5):
+            grade_attempt(make_user(f'rival{index}@example.com'), self.test, self.everything)
+        grade_attempt(self.student, self.test, self.half)
+        with CaptureQueriesContext(connection) as queries:
+            standing = student_standing(self.test.pk, self.student.pk)
+        self.assertEqual((standing['rank'], standing['participants']), (6, 6))
+        self.assertEqual(len(queries), 2)
+        self.assertFalse([query for query in queries if 'tests_testassignment' in query['sql']])
+
+    def test_lower_retake_keeps_the_best_score(self):
+        grade_attempt(self.student, self.test, self.everything)
+        TestAssignment.objects.filter(student=self.student).update(attempt_number=2)
+        grade_attempt(self.student, self.test, self.half)
+        self.assertEqual(student_standing(self.test.pk, self.student.pk)['best_marks'], 4)
+        self.assertEqual(
+            dict(LeaderboardScore.objects.filter(students__gt=0).values_list('marks', 'students')), {4: 1}
+        )
+
+    def test_regrade_moves_scores_down_on_the_board(self):
+        grade_attempt(self.student, self.test, self.everything)
+        rival = make_user('rival@example.com')
+        grade_attempt(rival, self.test, self.half)
+        second = self.questions[1]
+        AnswerOption.objects.filter(question=second).update(is_correct=~F('is_correct'))
+        self.test.refresh_from_db()
+
+        regrade_test(self.test)
+
+        self.assertEqual(
+            [(row['rank'], row['student_id'], row['obtained_marks']) for row in leaderboard(self.test.pk)[:10]],
+            [(1, rival.pk, 4), (2, self.student.pk, 2)]
+        )
+        self.assertEqual(student_standing(self.test.pk, self.student.pk)['rank'], 2)
+
+    def test_rebuild_matches_the_board_kept_up_to_date(self):
+        grade_attempt(self.student, self.test, self.half)
+        for index in range(3):
+            grade_attempt(make_user(f'rival{index}@example.com'), self.test, self.everything)
+
+        def board():
+            return (
+                sorted(LeaderboardEntry.objects.values_list('student_id', 'best_marks', 'reached_at')),
+                sorted(LeaderboardScore.objects.filter(students__gt=0).values_list('marks', 'students')),
+            )
+        kept = board()
+        self.assertEqual(rebuild_leaderboard(self.test.pk), 4)
+        self.assertEqual(board(), kept)
+
+    def test_admin_endpoint_pages_the_ranked_board(self):
+        for index in range(3):
+            grade_attempt(make_user(f'rival{index}@example.com'), self.test, self.everything)
+        grade_attempt(self.student, self.test, self.half)
+
+        response = self.client_for(self.admin).get(
+            reverse('admin-test-leaderboard', args=[self.test.pk]), {'page': 2, 'page_size': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 4)
+        last = response.data['results'][-1]
+        self.assertEqual((last['rank'], last['student_email']), (4, self.student.email))
+        self.assertEqual(last['percentage'], 50.0)
+
+
+class AttemptMixin(TestFixturesMixin):
+    """The student has the test assigned and talks to the API."""
+
+    def setUp(self):
+        cache.clear()
+        bulk_assign_test(self.test, [self.student.pk])
+        self.client = self.client_for(self.student)
+        self.first, self.second = self.questions
+
+    def start(self):
+        response = self.client.get(reverse('start-test', args=[self.test.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def autosave(self, question, option):
+        return self.client.post(
+            reverse('autosave-test', args=[self.test.pk]),
+            {'question_id': question.pk, 'selected_option_id': option.pk},
+            format='json'
+        )
+
+    def submit(self, answers=()):
+        return self.client.post(
+            reverse('submit-test', args=[self.test.pk]),
+            [{'question_id': question.pk, 'selected_option_id': option.pk} for question, option in answers],
+            format='json'
+        )
+
+
+class AutosaveTests(AttemptMixin, TestCase):
+    def persisted(self):
+        return dict(StudentAnswer.objects.values_list('question_id', 'selected_option_id'))
+
+    def test_saves_only_touch_the_cache(self):
+        self.start()
+        # The first save loads the answer key into the cache
+        self.assertEqual(self.autosave(self.first, self.correct[self.first.pk]).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.autosave(self.first, self.wrong[self.first.pk]).status_code, 200)
+            self.assertEqual(self.autosave(self.second, self.correct[self.second.pk]).status_code, 200)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(StudentAnswer.objects.exists())
+
+        response = self.client.get(reverse('autosave-test', args=[self.test.pk]))
+        self.assertEqual(
+            {answer['question_id']: answer['selected_option_id'] for answer in response.data['answers']},
+            {self.first.pk: self.wrong[self.first.pk].pk, self.second.pk: self.correct[self.second.pk].pk}
+        )
+
+    def test_flusher_persists_each_revision_once(self):
+        self.start()
+        self.autosave(self.first, self.wrong[self.first.pk])
+        self.autosave(self.second, self.correct[self.second.pk])
+        self.assertEqual(flush_autosaves(), {'attempts': 1, 'answers': 2})
+        self.assertEqual(flush_autosaves(), {'attempts': 0, 'answers': 0})
+
+        # Changing one answer leaves the other in place
+        self.autosave(self.first, self.correct[self.first.pk])
+        self.assertEqual(flush_autosaves(), {'attempts': 1, 'answers': 2})
+        self.assertEqual(
+            self.persisted(),
+            {self.first.pk: self.correct[self.first.pk].pk, self.second.pk: self.correct[self.second.pk].pk}
+        )
+
+    def test_submit_grades_buffered_answers_over_flushed_ones(self):
+        self.start()
+        self.autosave(self.first, self.wrong[self.first.pk])
+        flush_autosaves()
+        # Newer than what was flushed, and only in the buffer
+        self.autosave(self.first, self.correct[self.first.pk])
+        self.autosave(self.second, self.correct[self.second.pk])
+
+        response = self.submit([(self.second, self.wrong[self.second.pk])])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['obtained_marks'], response.data['total_questions']), (2, 2))
+
+    def test_flushed_answers_survive_losing_the_buffer(self):
+        self.start()
+        self.autosave(self.first, self.correct[self.first.pk])
+        flush_autosaves()
+        cache.clear()
+
+        response = self.submit()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['obtained_marks'], 2)
+
+    def test_submitted_attempts_are_not_flushed(self):
+        self.start()
+        self.autosave(self.first, self.wrong[self.first.pk])
+        self.assertEqual(self.submit([(self.first, self.correct[self.first.pk])]).status_code, 200)
+        self.assertEqual(flush_autosaves(), {'attempts': 0, 'answers': 0})
+        self.assertEqual(self.persisted(), {self.first.pk: self.correct[self.first.pk].pk})
+
+    def test_invalid_answer_is_not_buffered(self):
+        self.start()
+        response = self.autosave(self.first, self.correct[self.second.pk])
+        self.assertEqual(response.status_code, 400)
+        flush_autosaves()
+        self.assertFalse(StudentAnswer.objects.exists())
+
+    def test_no_saves_outside_a_started_attempt(self):
+        self.assertEqual(self.autosave(self.first, self.correct[self.first.pk]).status_code, 404)
+        self.start()
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertEqual(self.autosave(self.first, self.correct[self.first.pk]).status_code, 404)
+
+    def test_no_saves_after_the_deadline(self):
+        TestAssignment.objects.update(due_at=timezone.now() - timedelta(minutes=5))
+        self.start()
+        self.assertEqual(self.autosave(self.first, self.correct[self.first.pk]).status_code, 400)
+
+
+class SweeperTests(AttemptMixin, TestCase):
+    def expire(self):
+        TestAssignment.objects.update(expires_at=timezone.now() - timedelta(minutes=5))
+
+    def test_timed_out_attempt_is_graded_on_its_autosaved_answers(self):
+        self.start()
+        self.autosave(self.first, self.correct[self.first.pk])
+        self.autosave(self.second, self.wrong[self.second.pk])
+        self.expire()
+
+        # Nothing was flushed; the sweeper reads the shared buffer
+        self.assertEqual(sweep_expired_attempts(), {'attempts': 1, 'batches': 1})
+        assignment = TestAssignment.objects.get(student=self.student)
+        self.assertEqual((assignment.status, assignment.obtained_marks), ('submitted', 2))
+        self.assertEqual(assignment.student_answers.count(), 2)
+        self.assertEqual(student_standing(self.test.pk, self.student.pk)['best_marks'], 2)
+
+    def test_submit_after_the_sweeper_is_a_conflict(self):
+        self.start()
+        self.expire()
+        sweep_expired_attempts()
+
+        response = self.submit([(self.first, self.correct[self.first.pk])])
+        self.assertEqual(response.status_code, 409)
+
+    def test_attempts_still_in_time_are_left_alone(self):
+        self.start()
+        self.assertEqual(sweep_expired_attempts(), {'attempts': 0, 'batches': 0})
+        self.assertEqual(TestAssignment.objects.get().status, 'started')
+
+
+class GradedMetricTests(AttemptMixin, TestCase):
+    def graded(self, source):
+        return REGISTRY.get_sample_value('tests_graded_total', {'source': source}) or 0
+
+    def test_submissions_timeouts_and_regrades_are_counted(self):
+        before = {source: self.graded(source) for source in ('submission', 'timeout', 'regrade')}
+
+        self.start()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit([(self.first, self.correct[self.first.pk])]).status_code, 200)
+
+        other = make_user('other@example.com', is_profile_completed=True)
+        self.course.students.add(other)
+        bulk_assign_test(self.test, [other.pk])
+        TestAssignment.objects.filter(student=other).update(
+            status='started', expires_at=timezone.now() - timedelta(minutes=5)
+        )
+        sweep_expired_attempts()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            regrade_test(self.test)
 
-# Create your tests here.
+        self.assertEqual(
+            {source: self.graded(source) - count for source, count in before.items()},
+            {'submission': 1, 'timeout': 1, 'regrade': 2}
+        )
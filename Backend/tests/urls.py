@@ -7,13 +7,15 @@ from .views_student import (
     StudentTestResultView,
     StudentTestHistoryView,
     StudentRetakeTestView,
-    StudentTestAttemptDetailView
+    StudentTestAttemptDetailView,
+    StudentAutosaveView
 )
 from .views_admin import (
     TestViewSet,
     QuestionViewSet,
     AnswerOptionViewSet,
-    TestAssignmentViewSet
+    TestAssignmentViewSet,
+    CourseGradebookExportView
 )
 
 # Admin router for test management
@@ -26,12 +28,14 @@ admin_router.register(r'assignments', TestAssignmentViewSet, basename='admin-ass
 urlpatterns = [
     # Admin endpoints
     path('admin/', include(admin_router.urls)),
+    path('admin/courses/<int:course_id>/gradebook/', CourseGradebookExportView.as_view(), name='course-gradebook'),
     
     # Student endpoints
     path('student/my-tests/', StudentAssignedTestView.as_view(), name='my-tests'),
     path('student/test/<int:test_id>/history/', StudentTestHistoryView.as_view(), name='test-history'),
     path('student/start/<int:test_id>/', StudentStartTestView.as_view(), name='start-test'),
     path('student/submit/<int:test_id>/', StudentSubmitTestView.as_view(), name='submit-test'),
+    path('student/autosave/<int:test_id>/', StudentAutosaveView.as_view(), name='autosave-test'),
     path('student/result/<int:test_id>/', StudentTestResultView.as_view(), name='test-result'),
     path('student/retake/<int:test_id>/', StudentRetakeTestView.as_view(), name='retake-test'),
     path('student/test/<int:test_id>/attempt/<int:attempt_number>/', 
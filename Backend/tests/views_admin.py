@@ -3,9 +3,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.contrib.auth import get_user_model
 
 from .models import Test, Question, AnswerOption, TestAssignment, StudentAnswer
 from .serializers import (
@@ -13,16 +18,42 @@ from .serializers import (
     AnswerOptionSerializer, TestAssignmentSerializer,
     StudentTestListSerializer
 )
+from .services import bulk_assign_test, parse_due_at
+from .grading import regrade_test
+from .analytics import get_item_analysis
+from .leaderboard import leaderboard
+from .gradebook import ATTEMPT_MODES, gradebook_tests, gradebook_header, gradebook_rows, stream_csv, stream_xlsx
+from jobs.tasks import enqueue
 from courses.models import Course, Chapter
 
+User = get_user_model()
+
 # Admin Test Management Views
 
+class LeaderboardPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class TestViewSet(viewsets.ModelViewSet):
     """
     Admin endpoints for test management
     """
     queryset = Test.objects.all()
     permission_classes = [IsAuthenticated]
+    cursor_ordering = '-created_at'
+    
+    def get_queryset(self):
+        """Join course and chapter and count questions up front for listings"""
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.select_related('course', 'chapter').annotate(
+                questions_total=Count('questions')
+            )
+        if self.action == 'retrieve':
+            return queryset.prefetch_related('questions__options')
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -126,27 +157,18 @@ class TestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        assignments_created = []
-        with transaction.atomic():
-            for student_id in student_ids:
-                # Check if already assigned
-                existing = TestAssignment.objects.filter(
-                    student_id=student_id,
-                    test=test,
-                    status='assigned'
-                ).first()
-                
-                if not existing:
-                    assignment = TestAssignment.objects.create(
-                        student_id=student_id,
-                        test=test,
-                        due_at=due_at
-                    )
-                    assignments_created.append(assignment.id)
+        try:
+            result = bulk_assign_test(test, student_ids, due_at=due_at)
+        except DjangoValidationError as exc:
+            return Response(
+                {'error': ' '.join(exc.messages), **exc.message_dict},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response({
-            'message': f'Test assigned to {len(assignments_created)} students',
-            'assignments_created': len(assignments_created)
+            'message': f'Test assigned to {result["created"]} students',
+            'assignments_created': result['created'],
+            'assignments_skipped': result['skipped']
         })
     
     @action(detail=True, methods=['POST'])
@@ -182,41 +204,93 @@ class TestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get all enrolled students
-        students = course.students.all()
-        assignments_created = []
+        try:
+            due_at = parse_due_at(due_at)
+        except DjangoValidationError as exc:
+            return Response(
+                {'error': ' '.join(exc.messages), **exc.message_dict},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        with transaction.atomic():
-            for student in students:
-                # Check if already assigned
-                existing = TestAssignment.objects.filter(
-                    student=student,
-                    test=test,
-                    status='assigned'
-                ).first()
-                
-                if not existing:
-                    assignment = TestAssignment.objects.create(
-                        student=student,
-                        test=test,
-                        due_at=due_at
-                    )
-                    assignments_created.append(assignment.id)
+        # Fan-out to every enrolled student runs in the background worker
+        job = enqueue('tests.assign_to_course', {
+            'test_id': test.id,
+            'course_id': course.id,
+            'due_at': due_at.isoformat() if due_at else None
+        }, user=request.user)
         
         return Response({
-            'message': f'Test assigned to {len(assignments_created)} students in {course.title}',
-            'assignments_created': len(assignments_created),
+            'message': f'Assigning test to students in {course.title}',
+            'job_id': job.id,
+            'job_status': job.status,
             'course': course.title
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['POST'])
+    def regrade(self, request, pk=None):
+        """Re-score all graded attempts after the answer key or marks change"""
+        if request.user.role != 'ADMIN':
+            return Response(
+                {'error': 'Only admins can regrade tests'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        test = self.get_object()
+        summary = regrade_test(test)
+        
+        return Response({
+            'message': f'Regraded {summary["attempts_regraded"]} attempts of "{test.title}"',
+            'summary': summary
         })
+    
+    @action(detail=True, methods=['GET'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        """Per-question difficulty, discrimination and option statistics"""
+        if request.user.role != 'ADMIN':
+            return Response(
+                {'error': 'Only admins can view item analysis'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        test = self.get_object()
+        return Response(get_item_analysis(test.id, test.version))
+    
+    @action(detail=True, methods=['GET'])
+    def leaderboard(self, request, pk=None):
+        """Students ranked by their best graded attempt, paginated"""
+        if request.user.role != 'ADMIN':
+            return Response(
+                {'error': 'Only admins can view the leaderboard'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        test = self.get_object()
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(leaderboard(test.id), request, view=self)
+        
+        students = {
+            student.pk: student
+            for student in User.objects.filter(
+                pk__in=[row['student_id'] for row in page]
+            ).only('id', 'name', 'email')
+        }
+        for row in page:
+            student = students.get(row['student_id'])
+            row['student_name'] = student.name if student else None
+            row['student_email'] = student.email if student else None
+            row['percentage'] = round(row['obtained_marks'] / test.total_marks * 100, 2) if test.total_marks else 0
+        
+        return paginator.get_paginated_response(page)
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
     """
     Admin endpoints for question management
     """
-    queryset = Question.objects.all()
+    queryset = Question.objects.prefetch_related('options')
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('order', 'id')
     
     def create(self, request, *args, **kwargs):
         """Only admins can create questions"""
@@ -286,9 +360,10 @@ class TestAssignmentViewSet(viewsets.ModelViewSet):
     """
     Admin endpoints for test assignment management
     """
-    queryset = TestAssignment.objects.all()
+    queryset = TestAssignment.objects.select_related('student', 'test')
     serializer_class = TestAssignmentSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = '-assigned_at'
     
     def get_permissions(self):
         """Only admins can manage assignments"""
@@ -322,3 +397,52 @@ class TestAssignmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         return super().destroy(request, *args, **kwargs)
+
+
+class CourseGradebookExportView(APIView):
+    """
+    Stream a course gradebook: one row per enrolled student, one column
+    per test, as CSV (default) or XLSX.
+    
+    Query params: file_format=csv|xlsx, attempt=latest|best
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, course_id):
+        if request.user.role != 'ADMIN':
+            return Response(
+                {'error': 'Only admins can export gradebooks'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            course = Course.objects.only('id', 'title').get(id=course_id)
+        except Course.DoesNotExist:
+            return Response(
+                {'error': 'Course not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        file_format = request.query_params.get('file_format', 'csv')
+        mode = request.query_params.get('attempt', 'latest')
+        if file_format not in ('csv', 'xlsx') or mode not in ATTEMPT_MODES:
+            return Response(
+                {'error': 'file_format must be csv or xlsx and attempt must be latest or best'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        tests = gradebook_tests(course)
+        header = gradebook_header(tests)
+        rows = gradebook_rows(course, tests, mode=mode)
+        
+        if file_format == 'xlsx':
+            response = StreamingHttpResponse(
+                stream_xlsx(header, rows),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        else:
+            response = StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv; charset=utf-8')
+        
+        filename = f'{slugify(course.title) or course.id}-gradebook.{file_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
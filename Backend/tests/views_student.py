@@ -4,18 +4,26 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import Max, Q, Prefetch
+from django.db.models import Max, Q
+from django.http import HttpResponse
 
-from .models import TestAssignment, Question, Test, StudentAnswer, AnswerOption
+from .models import TestAssignment, Test, StudentAnswer
 from .serializers import (
     StudentTestListSerializer,
-    QuestionSerializer,
-    TestDetailSerializer,
-    StudentAnswerSubmitSerializer,
     StudentAnswerReviewSerializer,
     TestAssignmentSerializer,
     TestAssignmentListSerializer,
 )
+from .paper import get_test_paper, render_paper_response
+from .grading import (
+    GradingError, parse_answers, grade_answers, get_answer_key, save_graded_submission
+)
+from .leaderboard import student_standing
+from .autosave import (
+    open_session, get_session, close_session, buffer_answers, saved_answers, valid_answers
+)
+from courses.enrollment import is_enrolled
+from core import metrics
 
 
 class StudentAssignedTestView(APIView):
@@ -116,7 +124,7 @@ class StudentStartTestView(APIView):
             )
 
         try:
-            test = Test.objects.get(id=test_id, is_active=True)
+            test = Test.objects.only('id', 'course_id', 'version', 'duration_minutes').get(id=test_id, is_active=True)
         except Test.DoesNotExist:
             return Response(
                 {"error": "Test not found or inactive"},
@@ -125,8 +133,7 @@ class StudentStartTestView(APIView):
         
         # ✅ Check if student is enrolled in course
         try:
-            is_enrolled = test.course.students.filter(id=user.id).exists()
-            if not is_enrolled:
+            if not is_enrolled(request, test.course_id):
                 return Response(
                     {"error": "You are not enrolled in the course for this test"},
                     status=status.HTTP_403_FORBIDDEN
@@ -148,36 +155,27 @@ class StudentStartTestView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        print(f"Found assignment: {assignment.id} for test {test.id}")
-    
-        assignment.status = 'started'
-        assignment.started_at = timezone.now()
-        assignment.save(update_fields=['status', 'started_at', 'updated_at'])
-
-        # Optimize queries with Prefetch
-        questions = Question.objects.filter(
-            test=test
-        ).prefetch_related(
-            Prefetch('options', queryset=AnswerOption.objects.order_by('id'))
-        ).order_by('order')
-
-        print(f"Found {questions.count()} questions for test {test.id}")
-
-        test_serializer = TestDetailSerializer(test)
-        questions_serializer = QuestionSerializer(questions, many=True)
-
-        response_data = {
-            "assignment_id": assignment.id,
-            "attempt_number": assignment.attempt_number,
-            "test": test_serializer.data,
-            "questions": questions_serializer.data,
-            "due_at": assignment.due_at
-        }
-        
-        print(f"Response data keys: {list(response_data.keys())}")
-        print(f"Questions in response: {len(response_data['questions'])}")
-
-        return Response(response_data)
+        # Reloading the page resumes the attempt rather than restarting the clock
+        if assignment.status != 'started':
+            assignment.status = 'started'
+            assignment.started_at = timezone.now()
+            assignment.expires_at = assignment.calculate_expires_at(test.duration_minutes)
+            metrics.TEST_ATTEMPTS_STARTED.inc()
+        assignment.test_version = test.version
+        assignment.save(update_fields=['status', 'started_at', 'expires_at', 'test_version', 'updated_at'])
+        open_session(assignment)
+
+        # The paper is identical for every student taking this version of
+        # the test, so it is compiled once and served from the cache.
+        paper = get_test_paper(test.id, test.version)
+        content = render_paper_response(
+            paper,
+            assignment_id=assignment.id,
+            attempt_number=assignment.attempt_number,
+            due_at=assignment.due_at,
+            expires_at=assignment.expires_at
+        )
+        return HttpResponse(content, content_type='application/json')
 
 
 class StudentSubmitTestView(APIView):
@@ -193,7 +191,7 @@ class StudentSubmitTestView(APIView):
             )
 
         try:
-            test = Test.objects.get(id=test_id)
+            test = Test.objects.only('id', 'total_marks', 'version').get(id=test_id)
         except Test.DoesNotExist:
             return Response(
                 {"error": "Test not found"},
@@ -204,84 +202,60 @@ class StudentSubmitTestView(APIView):
         if not isinstance(answers_data, list):
             answers_data = [answers_data]
 
-        # Validate all answers first
-        validated_answers = []
-        for answer_item in answers_data:
-            serializer = StudentAnswerSubmitSerializer(data=answer_item)
-            if not serializer.is_valid():
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            validated_answers.append(serializer.validated_data)
+        # Validate the submission in memory against the answer key before
+        # taking any lock
+        answer_key = get_answer_key(test.id, test.version)
+        try:
+            answers = parse_answers(answers_data)
+            grade_answers(answer_key, answers)
+        except GradingError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         # Use atomic transaction for submission
         with transaction.atomic():
             # Lock the assignment to prevent concurrent submissions
-            assignment = TestAssignment.objects.select_for_update().get(
+            assignment = TestAssignment.objects.select_for_update().filter(
                 student=user,
                 test=test,
                 status='started'
-            )
+            ).order_by('-attempt_number').first()
 
-            # Check deadline
-            if assignment.due_at and timezone.now() > assignment.due_at:
+            # Already submitted by another request or by the expiry sweeper
+            if assignment is None:
+                return Response(
+                    {"error": "No test in progress; it may already have been submitted"},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # Check deadline; attempts past their time limit are submitted
+            # by the sweeper with whatever was autosaved
+            if assignment.is_expired():
                 return Response(
                     {"error": "Test submission deadline has passed"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Process answers
-            total_marks = 0
-            correct_answers = 0
-            total_questions = 0
-
-            for validated_data in validated_answers:
-                question = validated_data['question']
-                selected_option = validated_data['option']
-
-                if question.test_id != test_id:
-                    return Response(
-                        {"error": "Question does not belong to this test"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Upsert answer
-                answer, created = StudentAnswer.objects.update_or_create(
-                    assignment=assignment,
-                    question=question,
-                    defaults={
-                        'selected_option': selected_option,
-                        'is_correct': selected_option.is_correct,
-                        'marks_obtained': question.marks if selected_option.is_correct else 0,
-                        'question_marks': question.marks,
-                        'answered_at': timezone.now(),
-                        'evaluated_at': timezone.now()
-                    }
-                )
+            # Autosaved answers, buffered or already flushed, fill in
+            # anything the final request leaves out
+            answers = {**valid_answers(answer_key, saved_answers(assignment.id, answer_key)), **answers}
+            graded = grade_answers(answer_key, answers)
+            save_graded_submission(assignment, graded, test.total_marks)
 
-                if selected_option.is_correct:
-                    total_marks += question.marks
-                    correct_answers += 1
-                total_questions += 1
-
-            # Update assignment
-            assignment.status = 'submitted'
-            assignment.submitted_at = timezone.now()
-            assignment.obtained_marks = total_marks
-            assignment.total_marks = test.total_marks
-            assignment.evaluated_at = timezone.now()
-            assignment.save(update_fields=[
-                'status', 'submitted_at', 'obtained_marks',
-                'total_marks', 'evaluated_at', 'updated_at'
-            ])
+        close_session(assignment, answer_key)
+        metrics.TEST_SUBMISSIONS.labels(source='student').inc()
 
         return Response({
             "message": "Test submitted successfully",
             "assignment_id": assignment.id,
             "attempt_number": assignment.attempt_number,
-            "obtained_marks": total_marks,
+            "obtained_marks": graded.obtained_marks,
             "total_marks": test.total_marks,
-            "correct_answers": correct_answers,
-            "total_questions": total_questions,
-            "percentage": round((total_marks / test.total_marks * 100), 2) if test.total_marks else 0,
+            "correct_answers": graded.correct_answers,
+            "total_questions": graded.total_questions,
+            "percentage": round((graded.obtained_marks / test.total_marks * 100), 2) if test.total_marks else 0,
             "evaluated_at": assignment.evaluated_at
         }, status=status.HTTP_200_OK)
 
@@ -321,10 +295,14 @@ class StudentTestResultView(APIView):
 
         answers = StudentAnswer.objects.filter(
             assignment=assignment
-        ).select_related('question', 'selected_option')
+        ).select_related('question', 'selected_option').prefetch_related('question__options')
 
         answers_serializer = StudentAnswerReviewSerializer(answers, many=True)
 
+        # Rank of the student's best attempt among everyone who took the test
+        standing = student_standing(test.id, user.pk)
+        metrics.TEST_RESULTS_VIEWED.inc()
+
         return Response({
             "assignment_id": assignment.id,
             "attempt_number": assignment.attempt_number,
@@ -342,6 +320,7 @@ class StudentTestResultView(APIView):
                 "submitted_at": assignment.submitted_at,
                 "evaluated_at": assignment.evaluated_at
             },
+            "standing": standing,
             "answers": answers_serializer.data
         })
 
@@ -367,7 +346,7 @@ class StudentRetakeTestView(APIView):
             )
 
         # Check enrollment
-        if not test.course.students.filter(id=user.id).exists():
+        if not is_enrolled(request, test.course_id):
             return Response(
                 {"error": "You are not enrolled in this course"},
                 status=status.HTTP_403_FORBIDDEN
@@ -438,3 +417,77 @@ class StudentTestAttemptDetailView(APIView):
         serializer = TestAssignmentSerializer(assignment)
         return Response(serializer.data)
 
+
+class StudentAutosaveView(APIView):
+    """
+    GET  /api/tests/student/autosave/{test_id}/ - answers saved so far
+    POST /api/tests/student/autosave/{test_id}/ - save one or more answers
+
+    Answers go to a buffer in the shared cache that the flush_autosaves
+    command persists in bulk, and submit (or the expiry sweeper) picks
+    them up. A save makes no database queries while the attempt's
+    session is cached.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_started_session(self, request, test_id):
+        if request.user.role != 'STUDENT':
+            return None, Response(
+                {"error": "Only Students allowed"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        assignment = get_session(request.user.pk, test_id)
+        if assignment is None:
+            return None, Response(
+                {"error": "No test in progress"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return assignment, None
+
+    def get(self, request, test_id):
+        assignment, error = self.get_started_session(request, test_id)
+        if error:
+            return error
+
+        answer_key = get_answer_key(test_id, assignment.test_version)
+        answers = saved_answers(assignment.id, answer_key)
+        return Response({
+            "assignment_id": assignment.id,
+            "answers": [
+                {"question_id": question_id, "selected_option_id": option_id}
+                for question_id, option_id in answers.items()
+            ]
+        })
+
+    def post(self, request, test_id):
+        assignment, error = self.get_started_session(request, test_id)
+        if error:
+            return error
+
+        if assignment.is_expired():
+            return Response(
+                {"error": "Test submission deadline has passed"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        answers_data = request.data
+        if not isinstance(answers_data, list):
+            answers_data = [answers_data]
+
+        try:
+            answers = parse_answers(answers_data)
+            grade_answers(get_answer_key(test_id, assignment.test_version), answers)
+        except GradingError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        revision = buffer_answers(assignment.id, answers)
+        metrics.TEST_AUTOSAVES.inc()
+        return Response({
+            "assignment_id": assignment.id,
+            "saved": len(answers),
+            "revision": revision
+        })